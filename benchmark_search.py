@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+전화번호 조회(search_phone) 인덱스 벤치마크
+기존 idx_phone(phone_number) 대비 (phone_number, created_at DESC) 정렬 인덱스 idx_phone_created의
+실행 계획과 조회 지연시간을 비교합니다. (임시 데이터 사용, 운영 데이터 변경 없음)
+"""
+
+import os
+import sys
+import time
+import random
+import sqlite3
+import tempfile
+
+# 현재 디렉토리를 모듈 경로에 추가
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# 변경 전 조회 쿼리 (SELECT * + phone_number 단일 인덱스)
+OLD_QUERY = 'SELECT * FROM {table} WHERE phone_number = {ph} ORDER BY created_at DESC'
+# 변경 후 조회 쿼리 (bot/queries.py의 search_phone과 동일한 컬럼)
+NEW_QUERY = 'SELECT id, phone_number, content, created_at FROM {table} WHERE phone_number = {ph} ORDER BY created_at DESC'
+
+def generate_rows(total_rows, hot_ratio=0.01, hot_dupes=200):
+    """중복이 많은 번호가 섞인 테스트 데이터 생성 (삽입 순서는 무작위)"""
+    rows = []
+    hot_count = max(1, int(total_rows * hot_ratio / hot_dupes))
+    hot_numbers = [f"010{random.randint(10000000, 99999999)}" for _ in range(hot_count)]
+    
+    for phone in hot_numbers:
+        for i in range(hot_dupes):
+            rows.append(phone)
+    while len(rows) < total_rows:
+        rows.append(f"010{random.randint(10000000, 99999999)}")
+    
+    random.shuffle(rows)
+    data = []
+    for i, phone in enumerate(rows):
+        created = f"2024-{random.randint(1, 12):02d}-{random.randint(1, 28):02d} {i % 24:02d}:{i % 60:02d}:00"
+        data.append((phone, f"이름: 테스트{i} | 회사: 벤치마크 | 메모: {'x' * random.randint(10, 80)}", created))
+    return data, hot_numbers
+
+def measure(execute, query, numbers, repeat):
+    """조회 반복 실행 후 평균/p95 지연시간(ms) 반환"""
+    timings = []
+    for _ in range(repeat):
+        for phone in numbers:
+            start = time.perf_counter()
+            execute(query, phone)
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return sum(timings) / len(timings), timings[int(len(timings) * 0.95) - 1]
+
+def print_result(label, plan, avg_ms, p95_ms):
+    print(f"\n[{label}]")
+    print("  실행 계획:")
+    for line in plan:
+        print(f"    {line}")
+    print(f"  평균 {avg_ms:.3f}ms / p95 {p95_ms:.3f}ms")
+
+def benchmark_sqlite(total_rows, repeat=20):
+    """SQLite 임시 파일로 벤치마크"""
+    print(f"🧪 SQLite 벤치마크: {total_rows:,}행")
+    data, hot_numbers = generate_rows(total_rows)
+    lookups = hot_numbers[:20] + [row[0] for row in random.sample(data, 20)]
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, 'bench.sqlite'))
+        conn.execute('''
+            CREATE TABLE phone_data (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                phone_number VARCHAR(15) NOT NULL,
+                content TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                content_hash BIGINT,
+                quality_flags SMALLINT
+            )
+        ''')
+        conn.executemany('INSERT INTO phone_data (phone_number, content, created_at) VALUES (?, ?, ?)', data)
+        conn.commit()
+        
+        def execute(query, phone):
+            return conn.execute(query, (phone,)).fetchall()
+        
+        def plan(query):
+            rows = conn.execute('EXPLAIN QUERY PLAN ' + query, (hot_numbers[0],)).fetchall()
+            return [row[-1] for row in rows]
+        
+        # 변경 전
+        old_query = OLD_QUERY.format(table='phone_data', ph='?')
+        conn.execute('CREATE INDEX idx_phone ON phone_data(phone_number)')
+        conn.execute('ANALYZE')
+        print_result("변경 전: idx_phone", plan(old_query), *measure(execute, old_query, lookups, repeat))
+        
+        # 변경 후 (bot/queries.py의 ONLINE_INDEXES와 동일)
+        from bot.queries import ONLINE_INDEXES, SQLITE
+        new_query = NEW_QUERY.format(table='phone_data', ph='?')
+        for statement in ONLINE_INDEXES[SQLITE]:
+            conn.execute(statement)
+        conn.execute('ANALYZE')
+        print_result("변경 후: idx_phone_created", plan(new_query), *measure(execute, new_query, lookups, repeat))
+        conn.close()
+
+def benchmark_postgres(total_rows, repeat=20):
+    """PostgreSQL 세션 임시 테이블로 벤치마크 (DATABASE_URL 필요)"""
+    import psycopg
+    from dotenv import load_dotenv
+    
+    load_dotenv()
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url:
+        print("❌ DATABASE_URL 환경변수가 설정되지 않았습니다.")
+        return
+    
+    print(f"🧪 PostgreSQL 벤치마크: {total_rows:,}행 (TEMP 테이블)")
+    data, hot_numbers = generate_rows(total_rows)
+    lookups = hot_numbers[:20] + [row[0] for row in random.sample(data, 20)]
+    
+    with psycopg.connect(database_url, autocommit=True) as conn:
+        conn.execute('''
+            CREATE TEMP TABLE bench_phone_data (
+                id SERIAL PRIMARY KEY,
+                phone_number VARCHAR(15) NOT NULL,
+                content TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        with conn.cursor() as cursor:
+            with cursor.copy('COPY bench_phone_data (phone_number, content, created_at) FROM STDIN') as copy:
+                for row in data:
+                    copy.write_row(row)
+        
+        def execute(query, phone):
+            return conn.execute(query, (phone,), prepare=True).fetchall()
+        
+        def plan(query):
+            rows = conn.execute('EXPLAIN (ANALYZE, BUFFERS) ' + query, (hot_numbers[0],)).fetchall()
+            return [row[0] for row in rows]
+        
+        old_query = OLD_QUERY.format(table='bench_phone_data', ph='%s')
+        conn.execute('CREATE INDEX bench_idx_phone ON bench_phone_data(phone_number)')
+        conn.execute('VACUUM ANALYZE bench_phone_data')
+        print_result("변경 전: idx_phone", plan(old_query), *measure(execute, old_query, lookups, repeat))
+        
+        new_query = NEW_QUERY.format(table='bench_phone_data', ph='%s')
+        conn.execute('''
+            CREATE INDEX bench_idx_phone_created
+            ON bench_phone_data (phone_number, created_at DESC) INCLUDE (id)
+        ''')
+        conn.execute('DROP INDEX bench_idx_phone')
+        conn.execute('VACUUM ANALYZE bench_phone_data')
+        print_result("변경 후: idx_phone_created", plan(new_query), *measure(execute, new_query, lookups, repeat))
+
+def show_help():
+    """도움말 출력"""
+    print("""
+📈 전화번호 조회 인덱스 벤치마크
+
+사용법:
+  python3 benchmark_search.py [sqlite|postgres] [행수]
+
+예시:
+  python3 benchmark_search.py sqlite 500000
+  python3 benchmark_search.py postgres 1000000
+
+  postgres는 DATABASE_URL의 세션 임시 테이블만 사용합니다.
+""")
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] == 'help':
+        show_help()
+    else:
+        rows = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+        if sys.argv[1] == 'sqlite':
+            benchmark_sqlite(rows)
+        elif sys.argv[1] == 'postgres':
+            benchmark_postgres(rows)
+        else:
+            print(f"❌ 알 수 없는 명령어: {sys.argv[1]}")
+            print("사용 가능한 명령어: sqlite, postgres, help")
@@ -0,0 +1,252 @@
+"""
+등록된 전화번호 Bloom 필터
+"확실히 없는 번호"는 DB 조회 없이 바로 응답하기 위한 메모리 구조
+"""
+
+import os
+import math
+import time
+import hashlib
+import logging
+import threading
+from collections import deque
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bloom 필터 설정
+BLOOM_ENABLED = os.getenv('BLOOM_ENABLED', 'true').lower() == 'true'
+BLOOM_CAPACITY = int(os.getenv('BLOOM_CAPACITY', 1000000))  # 예상 번호 수
+BLOOM_ERROR_RATE = float(os.getenv('BLOOM_ERROR_RATE', 0.01))  # 목표 오탐률
+BLOOM_CATCHUP_INTERVAL = float(os.getenv('BLOOM_CATCHUP_INTERVAL', 30))  # 다른 프로세스가 추가한 행 반영 주기(초)
+BLOOM_REBUILD_INTERVAL = float(os.getenv('BLOOM_REBUILD_INTERVAL', 21600))  # 삭제 반영을 위한 전체 재구성 주기(초)
+
+# id 순서와 커밋 순서가 다를 수 있으므로 따라잡기 스캔은 조금 겹쳐서 읽음
+# (오래 걸리는 트랜잭션이 늦게 커밋한 행은 horizon으로 따로 처리)
+CATCHUP_OVERLAP = 1000
+# 재구성 중 진행 중이던 쓰기를 놓치지 않도록 최근 추가된 번호를 보관하는 시간(초)
+RECENT_ADD_WINDOW = 120
+
+class BloomFilter:
+    """고정 크기 Bloom 필터 (오탐 가능, 미탐 없음)"""
+    
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+    
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+    
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+    
+    def __contains__(self, item: str) -> bool:
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+    
+    def stats(self) -> Dict:
+        set_bits = int.from_bytes(self.bits, 'little').bit_count()
+        fill = set_bits / self.size
+        # 채워진 비트 수로 추정한 고유 항목 수와 현재 오탐률
+        if fill < 1:
+            estimated_items = int(-self.size / self.hash_count * math.log(1 - fill))
+        else:
+            estimated_items = self.capacity
+        return {
+            'capacity': self.capacity,
+            'target_error_rate': self.error_rate,
+            'estimated_items': estimated_items,
+            'estimated_error_rate': round(fill ** self.hash_count, 6),
+            'hash_count': self.hash_count,
+            'memory_bytes': len(self.bits),
+        }
+
+class PhoneNumberFilter:
+    """재구성 중에도 끊김 없이 쓸 수 있는 전화번호 Bloom 필터 관리자"""
+    
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._current = None
+        self._building = None
+        self._recent = deque()
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self.watermark = 0  # 필터에 반영된 최대 phone_data.id
+        self.definite_misses = 0
+        self.last_build_seconds = 0.0
+        self.last_build_at = None
+        # (스캔 시작 시 다음 트랜잭션 번호, 그 시점의 watermark) - 늦게 커밋될 수 있는 행의 최소 id 계산용
+        self._horizons = deque()
+        self._thread = None
+        self._stop = threading.Event()
+    
+    @property
+    def ready(self) -> bool:
+        return self._current is not None
+    
+    def might_contain(self, phone_number: str) -> bool:
+        """False면 확실히 없는 번호, 필터 준비 전에는 항상 True"""
+        current = self._current
+        if current is None or phone_number in current:
+            return True
+        with self._lock:
+            self.definite_misses += 1
+        return False
+    
+    def add(self, phone_number: str):
+        """새 번호 등록 (DB 쓰기 전에 호출해야 미탐이 생기지 않음)"""
+        with self._lock:
+            if self._current is not None:
+                self._current.add(phone_number)
+            if self._building is not None:
+                self._building.add(phone_number)
+            
+            now = time.monotonic()
+            self._recent.append((now, phone_number))
+            while self._recent and self._recent[0][0] < now - RECENT_ADD_WINDOW:
+                self._recent.popleft()
+    
+    def reset(self):
+        """필터를 버리고 다음 갱신 주기에 처음부터 재구성 (그 전까지는 항상 True)
+        
+        phone_data가 통째로 교체되면 기존 필터와 watermark가 새 테이블과 맞지 않으므로 호출합니다.
+        """
+        with self._lock:
+            self._current = None
+            self.watermark = 0
+            self._horizons.clear()
+    
+    def rebuild(self, scan: Callable[[int], Iterable[Tuple[int, str]]],
+                horizon: Callable[[], Optional[Tuple[int, int]]] = None):
+        """전체 스캔으로 새 필터를 만들어 교체 (scan(after_id)는 (id, 번호)를 순서대로 반환)
+        
+        horizon()은 (진행 중인 가장 오래된 트랜잭션, 다음 트랜잭션) 번호를 반환합니다.
+        커밋 순서와 id 순서가 같은 엔진(SQLite)에서는 생략합니다.
+        """
+        with self._rebuild_lock:
+            start = time.monotonic()
+            previous = self._current
+            snapshot = horizon() if horizon else None
+            capacity = self.capacity
+            if previous is not None:
+                # 데이터가 늘어난 만큼 다음 필터 크기를 키워 오탐률 유지
+                capacity = max(capacity, int(previous.stats()['estimated_items'] * 1.25))
+            
+            previous_watermark = self.watermark if previous is not None else 0
+            building = BloomFilter(capacity, self.error_rate)
+            with self._lock:
+                self._building = building
+            
+            try:
+                watermark = 0
+                for row_id, phone_number in scan(0):
+                    building.add(phone_number)
+                    watermark = max(watermark, row_id)
+            except Exception:
+                with self._lock:
+                    self._building = None
+                raise
+            
+            with self._lock:
+                # 스캔 시작 전에 시작되어 스캔 이후 커밋된 쓰기 반영
+                for _, phone_number in self._recent:
+                    building.add(phone_number)
+                self._current = building
+                self._building = None
+                self.watermark = watermark
+            if snapshot is not None:
+                self._record_horizon(snapshot, previous_watermark)
+            
+            self.last_build_seconds = round(time.monotonic() - start, 2)
+            self.last_build_at = time.time()
+            stats = building.stats()
+            logger.info(f"전화번호 Bloom 필터 구성 완료: 약 {stats['estimated_items']:,}개, "
+                        f"{stats['memory_bytes'] / 1024:.0f}KB, {self.last_build_seconds}초")
+            if stats['estimated_items'] > building.capacity:
+                logger.warning(f"Bloom 필터 용량 초과 - 예상 오탐률 {stats['estimated_error_rate']}")
+    
+    def catch_up(self, scan: Callable[[int], Iterable[Tuple[int, str]]],
+                 horizon: Callable[[], Optional[Tuple[int, int]]] = None):
+        """마지막 반영 이후 추가된 행만 읽어 반영 (다른 프로세스의 쓰기 대비)
+        
+        horizon이 있으면 아직 진행 중인 트랜잭션이 가질 수 있는 가장 작은 id부터 다시 읽으므로
+        watermark보다 작은 id로 늦게 커밋된 행(COPY, 다른 프로세스의 가져오기)도 놓치지 않습니다.
+        """
+        if not self.ready or self._rebuild_lock.locked():
+            return
+        
+        watermark = start_id = self.watermark
+        snapshot = horizon() if horizon else None
+        if snapshot is not None and self._horizons:
+            start_id = min(start_id, self._horizons[0][1])
+        for row_id, phone_number in scan(max(0, start_id - CATCHUP_OVERLAP)):
+            self.add(phone_number)
+            watermark = max(watermark, row_id)
+        if snapshot is not None:
+            self._record_horizon(snapshot, self.watermark)
+        self.watermark = watermark
+    
+    def _record_horizon(self, snapshot: Tuple[int, int], watermark: int):
+        """스캔 시점 기록 후 이미 끝난 트랜잭션 기록 정리
+        
+        이 스캔 이후 시작한 트랜잭션의 id는 스캔 전 watermark보다 크고, snapshot[0] 이전에 시작한
+        트랜잭션은 이번 스캔에 모두 보였으므로 그 범위의 기록은 마지막 하나만 다음 스캔 시작점으로 남깁니다.
+        """
+        oldest_running, next_xid = snapshot
+        self._horizons.append((next_xid, watermark))
+        while len(self._horizons) > 1 and self._horizons[1][0] <= oldest_running:
+            self._horizons.popleft()
+    
+    def start(self, scan: Callable[[int], Iterable[Tuple[int, str]]],
+              horizon: Callable[[], Optional[Tuple[int, int]]] = None):
+        """백그라운드 스레드에서 최초 구성 후 주기적으로 따라잡기/재구성"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._refresh_loop, args=(scan, horizon),
+                                        name='teledb-bloom', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """백그라운드 갱신 중지"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+    
+    def _refresh_loop(self, scan, horizon):
+        while not self._stop.is_set():
+            try:
+                if not self.ready or time.time() - self.last_build_at >= BLOOM_REBUILD_INTERVAL:
+                    self.rebuild(scan, horizon)
+                else:
+                    self.catch_up(scan, horizon)
+            except Exception as e:
+                # 실패하면 기존 필터를 그대로 두고 다음 주기에 재시도 (기본 엔진에 연결할 수 없을 때 포함)
+                logger.error(f"Bloom 필터 갱신 오류: {e}")
+            self._stop.wait(BLOOM_CATCHUP_INTERVAL)
+    
+    def stats(self) -> Dict:
+        current = self._current
+        stats = current.stats() if current is not None else {}
+        stats.update({
+            'enabled': True,
+            'ready': current is not None,
+            'definite_misses': self.definite_misses,
+            'watermark': self.watermark,
+            'last_build_seconds': self.last_build_seconds,
+        })
+        return stats
+
+# 전체 전화번호 필터 (BLOOM_ENABLED=false 이면 None)
+phone_filter = PhoneNumberFilter(BLOOM_CAPACITY, BLOOM_ERROR_RATE) if BLOOM_ENABLED else None
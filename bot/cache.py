@@ -0,0 +1,139 @@
+"""
+조회 결과 캐시
+search_phone 결과를 정규화된 전화번호 기준으로 메모리에 보관 (LRU + TTL)
+DB 오류 때 대신 응답할 마지막 정상 결과도 따로 더 오래 보관
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Tuple, Any
+
+# 캐시 설정 (SEARCH_CACHE_SIZE=0 이면 비활성화)
+SEARCH_CACHE_SIZE = int(os.getenv('SEARCH_CACHE_SIZE', 10000))
+SEARCH_CACHE_TTL = float(os.getenv('SEARCH_CACHE_TTL', 300))  # 초
+# 마지막 정상 결과 보관 (STALE_CACHE_SIZE=0 이면 비활성화, DB 오류 시 바로 실패)
+STALE_CACHE_SIZE = int(os.getenv('STALE_CACHE_SIZE', 10000))
+STALE_CACHE_MAX_AGE = float(os.getenv('STALE_CACHE_MAX_AGE', 86400))  # 이보다 오래된 결과는 쓰지 않음(초)
+
+class LRUCache:
+    """크기 제한과 만료 시간이 있는 스레드 안전 LRU 캐시"""
+    
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        # 쓰기로 무효화될 때마다 증가 (조회 중 변경된 결과가 저장되는 것 방지)
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+    
+    def get(self, key) -> Tuple[bool, Any]:
+        """(찾음 여부, 값) 반환"""
+        if self.max_size <= 0:
+            return False, None
+        
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return False, None
+            
+            self._data.move_to_end(key)
+            self.hits += 1
+            return True, value
+    
+    def put(self, key, value, generation: int = None):
+        """값 저장 (generation이 조회 시작 시점과 다르면 저장하지 않음)"""
+        if self.max_size <= 0:
+            return
+        
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+    
+    def invalidate(self, keys: Iterable):
+        """지정한 키들의 캐시 삭제"""
+        with self._lock:
+            self.generation += 1
+            for key in keys:
+                if self._data.pop(key, None) is not None:
+                    self.invalidations += 1
+    
+    def clear(self):
+        """전체 캐시 삭제"""
+        with self._lock:
+            self.generation += 1
+            self.invalidations += len(self._data)
+            self._data.clear()
+    
+    def stats(self) -> Dict:
+        """적중/실패/제거 카운터 반환"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups * 100, 2) if lookups else 0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
+
+class StaleStore(LRUCache):
+    """DB 조회에 성공한 마지막 결과 (DB 오류 시 저장 후 경과 시간과 함께 반환)"""
+    
+    def __init__(self, max_size: int, max_age: float):
+        super().__init__(max_size, max_age)
+        # DB 오류로 보관된 결과를 돌려준 횟수 / 보관된 결과도 없어 실패한 횟수
+        self.degraded = 0
+        self.unavailable = 0
+    
+    def put(self, key, value, generation: int = None):
+        super().put(key, (value, time.monotonic()), generation)
+    
+    def get_stale(self, key) -> Tuple[bool, Any, float]:
+        """(찾음 여부, 값, 저장 후 경과 초) 반환하고 응답 결과를 집계"""
+        found, entry = self.get(key)
+        with self._lock:
+            if found:
+                self.degraded += 1
+            else:
+                self.unavailable += 1
+        if not found:
+            return False, None, 0.0
+        value, saved_at = entry
+        return True, value, time.monotonic() - saved_at
+    
+    def stats(self) -> Dict:
+        stats = super().stats()
+        with self._lock:
+            stats['degraded'] = self.degraded
+            stats['unavailable'] = self.unavailable
+        return stats
+
+# search_phone 결과 캐시 (키: 정규화된 전화번호)
+search_cache = LRUCache(SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL)
+# DB 오류 시 응답용 마지막 정상 결과 (키: 정규화된 전화번호)
+stale_results = StaleStore(STALE_CACHE_SIZE, STALE_CACHE_MAX_AGE)
@@ -0,0 +1,137 @@
+"""
+회로 차단기 (PostgreSQL → SQLite 폴백)
+연결 실패가 연속으로 쌓이면 회로를 열어(OPEN) 이후 요청은 연결을 시도하지 않고 바로 폴백합니다.
+열려 있는 동안 백그라운드 스레드가 주기적으로 복구를 확인하고, 성공하면 반열림(HALF_OPEN)으로
+요청 일부만 보내 본 뒤 정상이면 다시 닫습니다(CLOSED).
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+STATE_LABELS = {
+    CLOSED: '닫힘 (정상)',
+    OPEN: '열림 (폴백 중)',
+    HALF_OPEN: '반열림 (복구 확인 중)',
+}
+
+class CircuitBreaker:
+    """연속 실패 failure_threshold회에 열리고, probe 성공 후 시험 요청 success_threshold회 성공하면 닫힘
+    
+    probe가 없으면 열린 지 probe_interval초가 지난 뒤 들어온 요청을 시험 요청으로 보냅니다.
+    반열림 상태에서는 시험 요청을 한 번에 하나만 보내고 나머지는 계속 폴백합니다.
+    """
+    
+    def __init__(self, name: str, failure_threshold: int, probe_interval: float, success_threshold: int = 1,
+                 probe: Optional[Callable[[], object]] = None):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.probe_interval = probe_interval
+        self.success_threshold = max(1, success_threshold)
+        self.probe = probe
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_count = 0
+        self.rejected = 0
+        self.probes = 0
+        self._successes = 0
+        self._trial_running = False
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def allow_request(self) -> bool:
+        """이번 요청을 보내도 되는지 (False면 호출자가 바로 폴백)"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if (self.state == OPEN and self.probe is None
+                    and time.monotonic() - self._opened_at >= self.probe_interval):
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            self.rejected += 1
+            return False
+    
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            if self.state == HALF_OPEN:
+                self._trial_running = False
+                self._successes += 1
+                if self._successes >= self.success_threshold:
+                    self._set_state(CLOSED)
+    
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                self._trial_running = False
+                self._set_state(OPEN)
+    
+    def release_trial(self):
+        """서버 상태와 무관하게 끝난 요청 (반열림 시험 요청이었다면 자리만 반납, 상태와 실패 수는 그대로)"""
+        with self._lock:
+            self._trial_running = False
+    
+    def _set_state(self, state: str):
+        previous, self.state = self.state, state
+        self._successes = 0
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+            self.opened_count += 1
+            logger.warning(f"회로 차단기 열림 ({self.name}): 연속 실패 {self.failures}회, 복구될 때까지 폴백 사용")
+            self._start_probe()
+        elif state == CLOSED:
+            logger.info(f"회로 차단기 닫힘 ({self.name}): 복구됨")
+        else:
+            logger.info(f"회로 차단기 반열림 ({self.name}): 시험 요청 전송 (이전 상태: {previous})")
+    
+    def _start_probe(self):
+        if self.probe is None or self._stop.is_set() or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._thread = threading.Thread(target=self._probe_loop, name=f'teledb-{self.name}-probe', daemon=True)
+        self._thread.start()
+    
+    def _probe_loop(self):
+        """열려 있는 동안 probe_interval초마다 복구 확인, 성공하면 반열림으로 전환"""
+        while not self._stop.wait(self.probe_interval):
+            if self.state != OPEN:
+                return
+            self.probes += 1
+            try:
+                self.probe()
+            except Exception as e:
+                logger.debug(f"복구 확인 실패 ({self.name}): {type(e).__name__}: {e}")
+                continue
+            with self._lock:
+                if self.state == OPEN:
+                    self._set_state(HALF_OPEN)
+            return
+    
+    def stop(self, timeout: float = 5):
+        """복구 확인 스레드 종료 (봇 종료 시 호출)"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+    
+    def stats(self) -> Dict:
+        return {
+            'state': self.state,
+            'state_label': STATE_LABELS[self.state],
+            'failures': self.failures,
+            'opened_count': self.opened_count,
+            'rejected': self.rejected,
+            'probes': self.probes,
+            'open_seconds': round(time.monotonic() - self._opened_at) if self.state != CLOSED else 0,
+        }
@@ -3,78 +3,75 @@
 구조: phone_number + content (중복 허용)
 """
 
-import sqlite3
 import os
 import logging
-from datetime import datetime
 from typing import List, Dict
 
+from .dedup import row_hash
+from .quality import quality_flags
+from .migrations import LATEST_VERSION, read_schema_version, migrate_sqlite
+from .queries import QUERIES, SQLITE, STATS_COUNTERS, build_stats
+from .sqlite_manager import get_sqlite_connection
+
 logger = logging.getLogger(__name__)
 
 # 데이터베이스 파일 경로
 DATABASE_PATH = os.getenv('DATABASE_PATH', './teledb.sqlite')
+# 기존 행 품질 분류 시 한 번에 읽는 행 수
+BACKFILL_BATCH_SIZE = 10000
 
 def get_connection():
-    """데이터베이스 연결 반환"""
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row  # 딕셔너리 형태로 결과 반환
-    return conn
+    """데이터베이스 연결 반환 (스레드별로 재사용되는 연결, close() 금지)"""
+    return get_sqlite_connection(DATABASE_PATH)
 
 def init_database():
-    """데이터베이스 테이블 초기화"""
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        
-        # 단순한 전화번호 정보 테이블 (중복 허용)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS phone_data (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                phone_number TEXT NOT NULL,
-                content TEXT NOT NULL,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # 조회 로그 테이블 (단순화)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS query_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                username TEXT,
-                query_phone TEXT,
-                results_count INTEGER DEFAULT 0,
-                query_time DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # 인덱스 생성 (중복 허용)
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_phone ON phone_data(phone_number)')
-        
-        conn.commit()
-        logger.info("데이터베이스 테이블이 초기화되었습니다.")
+    """스키마를 최신 버전으로 맞춤 (봇과 같은 마이그레이션, 이미 최신이면 버전만 한 번 읽음)"""
+    conn = get_connection()
+    if read_schema_version(conn, SQLITE) >= LATEST_VERSION:
+        return
+    
+    migrate_sqlite(conn)
+    with conn:
+        fill_derived_tables(conn)
+    logger.info("데이터베이스 테이블이 초기화되었습니다.")
+
+def fill_derived_tables(conn):
+    """카운터/요약 테이블, 품질 플래그 컬럼을 처음 만든 경우 기존 데이터로 채움"""
+    sql = QUERIES[SQLITE]
+    
+    if conn.execute(sql['count_unreconciled_stats']).fetchone()['pending']:
+        for name, (query, column) in STATS_COUNTERS.items():
+            conn.execute(sql['set_stats_counter'], (conn.execute(sql[query]).fetchone()[column], name))
+    
+    if conn.execute(sql['phone_summary_pending']).fetchone()['pending']:
+        conn.execute(sql['fill_phone_summary'])
+    
+    after_id = 0
+    while True:
+        rows = conn.execute(sql['scan_unclassified_phone_data'], (after_id, BACKFILL_BATCH_SIZE)).fetchall()
+        if not rows:
+            break
+        conn.executemany(sql['set_quality_flags'],
+                         [(quality_flags(row['phone_number'], row['content']), row['id']) for row in rows])
+        after_id = rows[-1]['id']
 
 def search_phone(phone_number: str) -> List[Dict]:
     """전화번호로 모든 매칭 정보 조회 (중복 허용)"""
     with get_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute('''
-            SELECT * FROM phone_data 
-            WHERE phone_number = ?
-            ORDER BY created_at DESC
-        ''', (phone_number,))
+        cursor.execute(QUERIES[SQLITE]['search_phone'], (phone_number,))
         
         results = cursor.fetchall()
         return [dict(result) for result in results] if results else []
 
 def add_phone_data(phone_number: str, content: str) -> bool:
-    """새 전화번호 정보 추가 (중복 허용)"""
+    """새 전화번호 정보 추가 (중복 제거 모드에서는 같은 내용이면 건너뜀)"""
     try:
         with get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO phone_data (phone_number, content)
-                VALUES (?, ?)
-            ''', (phone_number, content.strip()))
+            content = content.strip()
+            cursor.execute(QUERIES[SQLITE]['insert_phone'], (phone_number, content, row_hash(phone_number, content),
+                                                             quality_flags(phone_number, content)))
             
             conn.commit()
             logger.info(f"전화번호 {phone_number} 정보가 추가되었습니다.")
@@ -88,11 +85,10 @@ def update_phone_data(phone_number: str, old_content: str, new_content: str) ->
     try:
         with get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                UPDATE phone_data 
-                SET content = ?
-                WHERE phone_number = ? AND content = ?
-            ''', (new_content.strip(), phone_number, old_content))
+            new_content = new_content.strip()
+            cursor.execute(QUERIES[SQLITE]['update_phone'],
+                           (new_content, row_hash(phone_number, new_content), quality_flags(phone_number, new_content),
+                            phone_number, old_content))
             
             if cursor.rowcount > 0:
                 conn.commit()
@@ -145,46 +141,13 @@ def log_query(user_id: int, username: str, query_phone: str, results_count: int)
         logger.error(f"조회 로그 저장 중 오류: {e}")
 
 def get_stats() -> Dict:
-    """데이터베이스 통계 반환"""
+    """데이터베이스 통계 반환 (트리거가 유지하는 카운터 조회, 데이터 크기와 무관)"""
     with get_connection() as conn:
-        cursor = conn.cursor()
-        
-        # 총 등록된 데이터 수
-        cursor.execute('SELECT COUNT(*) as total FROM phone_data')
-        total_records = cursor.fetchone()['total']
-        
-        # 유니크한 전화번호 수
-        cursor.execute('SELECT COUNT(DISTINCT phone_number) as unique_count FROM phone_data')
-        unique_phones = cursor.fetchone()['unique_count']
-        
-        # 총 조회 수
-        cursor.execute('SELECT COUNT(*) as total FROM query_logs')
-        total_queries = cursor.fetchone()['total']
-        
-        # 성공한 조회 수
-        cursor.execute('SELECT COUNT(*) as found FROM query_logs WHERE results_count > 0')
-        successful_queries = cursor.fetchone()['found']
-        
-        return {
-            'total_records': total_records,
-            'unique_phones': unique_phones,
-            'total_queries': total_queries,
-            'successful_queries': successful_queries,
-            'success_rate': round((successful_queries / total_queries * 100) if total_queries > 0 else 0, 2)
-        }
+        rows = conn.execute(QUERIES[SQLITE]['read_stats_counters']).fetchall()
+        return build_stats({row['name']: row['value'] for row in rows})
 
 def get_phone_summary() -> List[Dict]:
-    """전화번호별 요약 정보 (중복 수 포함)"""
+    """전화번호별 요약 정보 (중복 수 포함, 트리거가 유지하는 phone_summary 조회)"""
     with get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT phone_number, COUNT(*) as count, 
-                   MIN(created_at) as first_added,
-                   MAX(created_at) as last_added
-            FROM phone_data 
-            GROUP BY phone_number 
-            ORDER BY count DESC, last_added DESC
-        ''')
-        
-        results = cursor.fetchall()
+        results = conn.execute(QUERIES[SQLITE]['phone_summary_by_count']).fetchall()
         return [dict(result) for result in results]
\ No newline at end of file
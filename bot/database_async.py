@@ -0,0 +1,287 @@
+"""
+비동기 데이터베이스 접근 (텔레그램 핸들러용)
+PostgreSQL은 psycopg AsyncConnection 풀, SQLite는 스레드 풀에서 실행
+"""
+
+import asyncio
+import functools
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict
+
+import psycopg
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+
+from . import database_postgres as sync_db
+from .database_postgres import (
+    DATABASE_URL, DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_MAX_IDLE,
+    DB_POOL_MAX_LIFETIME, DB_POOL_TIMEOUT, DB_PREPARE_STATEMENTS,
+    PRIMARY_DIALECT, USE_SQLITE_FALLBACK, pg_breaker, record_pg_outcome, call_on_sqlite,
+    DatabaseBusy, pool_saturated,
+    summarize_pool_stats, invalidate_phone_cache,
+    register_phone_numbers, stale_phone_records, remember_phone_records,
+    SUMMARY_PAGE_SIZE, summary_page_query, build_summary_page,
+)
+from .bloom import phone_filter
+from .cache import search_cache, stale_results
+from .dedup import row_hash, with_hash
+from .quality import quality_flags
+from .queries import QUERIES, POSTGRES, build_stats
+from .utils import clean_phone_number
+
+logger = logging.getLogger(__name__)
+
+# SQLite/동기 경로를 실행할 스레드 수 (스레드마다 SQLite 연결 1개)
+DB_EXECUTOR_WORKERS = int(os.getenv('DB_EXECUTOR_WORKERS', 4))
+
+_executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix='teledb-db')
+_SQL = QUERIES[POSTGRES]
+_async_pool = None
+_async_pool_lock = None
+
+async def get_async_pool():
+    """비동기 PostgreSQL 커넥션 풀 반환 (PostgreSQL 미사용/연결 불가 시 None)"""
+    global _async_pool, _async_pool_lock
+    if _async_pool is not None:
+        return _async_pool
+    
+    if PRIMARY_DIALECT != POSTGRES:
+        return None
+    
+    if _async_pool_lock is None:
+        _async_pool_lock = asyncio.Lock()
+    
+    async with _async_pool_lock:
+        if _async_pool is None:
+            pool = AsyncConnectionPool(
+                DATABASE_URL,
+                min_size=DB_POOL_MIN_SIZE,
+                max_size=DB_POOL_MAX_SIZE,
+                max_idle=DB_POOL_MAX_IDLE,
+                max_lifetime=DB_POOL_MAX_LIFETIME,
+                timeout=DB_POOL_TIMEOUT,
+                kwargs={'row_factory': dict_row},
+                check=AsyncConnectionPool.check_connection,
+                name='teledb-async',
+                open=False,
+            )
+            try:
+                await pool.open(wait=True, timeout=DB_POOL_TIMEOUT)
+            except Exception as e:
+                await pool.close()
+                logger.error(f"비동기 PostgreSQL 풀 생성 오류: {type(e).__name__}: {e}")
+                return None
+            logger.info(f"비동기 PostgreSQL 커넥션 풀 생성 (min={DB_POOL_MIN_SIZE}, max={DB_POOL_MAX_SIZE})")
+            _async_pool = pool
+    return _async_pool
+
+async def close_async_pool():
+    """비동기 풀과 스레드 풀 종료 (봇 종료 시 호출)"""
+    global _async_pool
+    if _async_pool is not None:
+        await _async_pool.close()
+        _async_pool = None
+        logger.info("비동기 PostgreSQL 커넥션 풀 종료")
+    _executor.shutdown(wait=True)
+
+def get_async_pool_stats() -> Dict:
+    """비동기 커넥션 풀 통계 반환"""
+    if _async_pool is None:
+        return {}
+    return summarize_pool_stats(_async_pool.get_stats())
+
+async def run_sync(func, *args, **kwargs):
+    """동기 DB 함수를 이벤트 루프 밖(스레드 풀)에서 실행"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+async def _run(pg_func, sync_func, *args):
+    """PostgreSQL은 비동기 연결로 실행, 연결할 수 없거나 회로가 열려 있으면 SQLite 폴백으로 실행"""
+    if PRIMARY_DIALECT != POSTGRES:
+        return await run_sync(sync_func, *args)
+    
+    if pg_breaker.allow_request():
+        pool = conn = None
+        busy = False
+        try:
+            pool = await get_async_pool()
+            if pool is not None:
+                async with pool.connection() as conn:
+                    return await pg_func(conn, *args)
+        except psycopg.OperationalError as e:
+            # 쿼리 중 오류는 그대로 전달, 연결 대여 실패만 폴백
+            if conn is not None:
+                raise
+            # 풀 포화는 서버 장애가 아니므로 차단기 실패로 세지 않고 폴백하지도 않음 (호출자가 재시도 안내)
+            if pool_saturated(pool, e):
+                busy = True
+                raise DatabaseBusy(f"비동기 PostgreSQL 커넥션 풀 포화 ({DB_POOL_MAX_SIZE}개 모두 사용 중)") from e
+            logger.error(f"비동기 PostgreSQL 연결 오류: {type(e).__name__}: {e}")
+        finally:
+            # 취소(CancelledError)로 끝나도 기록해야 반열림 시험 요청이 풀림
+            if busy:
+                pg_breaker.release_trial()
+            else:
+                record_pg_outcome(conn)
+    
+    if not USE_SQLITE_FALLBACK:
+        raise psycopg.OperationalError("PostgreSQL에 연결할 수 없습니다 (SQLite 폴백 비활성화)")
+    # 동기 풀을 다시 기다리지 않고 바로 SQLite
+    return await run_sync(call_on_sqlite, sync_func, *args)
+
+async def _execute(conn, name, params=()):
+    """등록된 PostgreSQL 쿼리를 prepared statement로 실행"""
+    return await conn.execute(_SQL[name], params, prepare=DB_PREPARE_STATEMENTS or None)
+
+async def _pg_search_phone(conn, phone_number):
+    cursor = await _execute(conn, 'search_phone', (phone_number,))
+    return await cursor.fetchall(), POSTGRES
+
+async def _pg_add_phone_data(conn, phone_number, content):
+    content = content.strip()
+    cursor = await _execute(conn, 'insert_phone',
+                            (*with_hash(phone_number, content), quality_flags(phone_number, content)))
+    if cursor.rowcount:
+        logger.info(f"전화번호 {phone_number} 정보가 추가되었습니다.")
+    else:
+        logger.info(f"전화번호 {phone_number}: 이미 같은 내용이 있어 건너뜀")
+    return True
+
+async def _pg_update_phone_data(conn, phone_number, old_content, new_content):
+    new_content = new_content.strip()
+    cursor = await _execute(conn, 'update_phone',
+                            (new_content, row_hash(phone_number, new_content), quality_flags(phone_number, new_content),
+                             phone_number, old_content))
+    
+    if cursor.rowcount > 0:
+        logger.info(f"전화번호 {phone_number} 정보가 수정되었습니다.")
+        return True
+    logger.warning(f"수정할 데이터를 찾을 수 없습니다: {phone_number}")
+    return False
+
+async def _pg_delete_phone_data(conn, phone_number, content):
+    if content:
+        # 특정 내용만 삭제
+        cursor = await _execute(conn, 'delete_phone_content', (phone_number, content))
+    else:
+        # 해당 번호의 모든 내용 삭제
+        cursor = await _execute(conn, 'delete_phone', (phone_number,))
+    
+    if cursor.rowcount > 0:
+        logger.info(f"전화번호 {phone_number} 정보 {cursor.rowcount}개가 삭제되었습니다.")
+        return True
+    logger.warning(f"삭제할 데이터를 찾을 수 없습니다: {phone_number}")
+    return False
+
+async def _pg_get_stats(conn):
+    cursor = await _execute(conn, 'read_stats_counters')
+    return build_stats({row['name']: row['value'] for row in await cursor.fetchall()})
+
+async def _pg_get_phone_entry_count(conn, phone_number):
+    row = await (await _execute(conn, 'phone_entry_count', (phone_number,))).fetchone()
+    return row['entry_count'] if row else 0
+
+async def _pg_get_phone_summary_page(conn, limit, after, before):
+    name, params = summary_page_query(limit, after, before)
+    cursor = await _execute(conn, name, params)
+    return build_summary_page(await cursor.fetchall(), limit, after, before)
+
+async def search_phone(phone_number: str) -> List[Dict]:
+    """전화번호로 모든 매칭 정보 조회 (비동기, 캐시 우선)"""
+    phone_number = clean_phone_number(phone_number)
+    
+    found, cached = search_cache.get(phone_number)
+    if found:
+        return list(cached)
+    
+    # 등록된 적 없는 번호는 DB 조회 없이 응답
+    if phone_filter is not None and not phone_filter.might_contain(phone_number):
+        return []
+    
+    generation, stale_generation = search_cache.generation, stale_results.generation
+    try:
+        results, dialect = await _run(_pg_search_phone, sync_db.fetch_phone_records, phone_number)
+    except Exception as e:
+        return stale_phone_records(phone_number, e)
+    
+    remember_phone_records(phone_number, results, dialect, generation, stale_generation)
+    return list(results)
+
+async def add_phone_data(phone_number: str, content: str) -> bool:
+    """새 전화번호 정보 추가 (비동기, 커넥션 풀 포화 시 DatabaseBusy)"""
+    try:
+        register_phone_numbers(phone_number)
+        success = await _run(_pg_add_phone_data, sync_db.add_phone_data, phone_number, content)
+    except DatabaseBusy:
+        # 저장되지 않았으므로 실패(False)와 구분해 호출자가 재시도를 안내
+        raise
+    except Exception as e:
+        logger.error(f"데이터 추가 중 오류: {e}")
+        return False
+    
+    invalidate_phone_cache(phone_number)
+    return success
+
+async def update_phone_data(phone_number: str, old_content: str, new_content: str) -> bool:
+    """특정 전화번호의 특정 내용 수정 (비동기, 커넥션 풀 포화 시 DatabaseBusy)"""
+    try:
+        success = await _run(_pg_update_phone_data, sync_db.update_phone_data,
+                             phone_number, old_content, new_content)
+    except DatabaseBusy:
+        # 저장되지 않았으므로 실패(False)와 구분해 호출자가 재시도를 안내
+        raise
+    except Exception as e:
+        logger.error(f"데이터 수정 중 오류: {e}")
+        return False
+    
+    invalidate_phone_cache(phone_number)
+    return success
+
+async def delete_phone_data(phone_number: str, content: str = None) -> bool:
+    """전화번호 정보 삭제 (비동기, 커넥션 풀 포화 시 DatabaseBusy)"""
+    try:
+        success = await _run(_pg_delete_phone_data, sync_db.delete_phone_data, phone_number, content)
+    except DatabaseBusy:
+        # 저장되지 않았으므로 실패(False)와 구분해 호출자가 재시도를 안내
+        raise
+    except Exception as e:
+        logger.error(f"데이터 삭제 중 오류: {e}")
+        return False
+    
+    invalidate_phone_cache(phone_number)
+    return success
+
+async def log_query(user_id: int, username: str, query_phone: str, results_count: int):
+    """조회 기록 저장 (쓰기 버퍼에 넣고 바로 반환)"""
+    sync_db.log_query(user_id, username, query_phone, results_count)
+
+async def get_stats() -> Dict:
+    """데이터베이스 통계 반환 (비동기)"""
+    try:
+        return await _run(_pg_get_stats, sync_db.get_stats)
+    except Exception as e:
+        logger.error(f"통계 조회 중 오류: {e}")
+        return {}
+
+async def get_phone_summary_page(limit: int = SUMMARY_PAGE_SIZE, after: str = None, before: str = None) -> Dict:
+    """전화번호별 요약 한 페이지 (비동기, keyset 페이지네이션)"""
+    try:
+        return await _run(_pg_get_phone_summary_page, sync_db.get_phone_summary_page, limit, after, before)
+    except Exception as e:
+        logger.error(f"요약 정보 조회 중 오류: {e}")
+        return {'items': [], 'has_prev': False, 'has_next': False}
+
+async def get_phone_entry_count(phone_number: str) -> int:
+    """번호에 등록된 정보 수 (비동기, phone_summary 기본키 조회)"""
+    try:
+        return await _run(_pg_get_phone_entry_count, sync_db.get_phone_entry_count,
+                          clean_phone_number(phone_number))
+    except Exception as e:
+        logger.error(f"등록 수 조회 중 오류: {e}")
+        return 0
+
+async def bulk_insert_data(data_list: List[Dict]) -> int:
+    """대량 데이터 삽입 (스레드 풀에서 실행)"""
+    return await run_sync(sync_db.bulk_insert_data, data_list)
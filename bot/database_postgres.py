@@ -4,184 +4,531 @@ PostgreSQL 데이터베이스 연결 및 쿼리 처리
 """
 
 import psycopg
-import sqlite3
+from psycopg import sql
+from psycopg.rows import dict_row, tuple_row
+from psycopg_pool import ConnectionPool, PoolTimeout
 import os
 import logging
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict
+from typing import Callable, Dict, Iterable, List, Tuple
 import urllib.parse as urlparse
 
+from .bloom import phone_filter
+from .cache import search_cache, stale_results
+from .circuit import CircuitBreaker
+from .dedup import DEDUP_ENABLED, content_hash, row_hash, with_hash
+from .quality import quality_flags
+from .jobs import PeriodicJob
+from .query_log import create_writer
+from .migrations import LATEST_VERSION, read_schema_version, migrate_sqlite, migrate_postgres
+from .queries import QUERIES, POSTGRES, SQLITE, STATS_COUNTERS, build_stats, multi_insert
+from .sqlite_manager import get_sqlite_connection
+from .utils import clean_phone_number
+
 logger = logging.getLogger(__name__)
 
 # PostgreSQL 연결 정보
 DATABASE_URL = os.getenv('DATABASE_URL', '')
 USE_SQLITE_FALLBACK = True  # 임시 SQLite 폴백 활성화
 
-def get_connection():
-    """PostgreSQL 연결 반환 (SQLite 폴백 포함)"""
-    logger.info(f"=== 데이터베이스 연결 디버그 ===")
-    logger.info(f"DATABASE_URL 길이: {len(DATABASE_URL) if DATABASE_URL else 0}")
-    logger.info(f"DATABASE_URL 시작: {DATABASE_URL[:30] if DATABASE_URL else 'None'}")
-    logger.info(f"USE_SQLITE_FALLBACK: {USE_SQLITE_FALLBACK}")
+# 커넥션 풀 설정
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', 1))
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', 10))
+DB_POOL_MAX_IDLE = float(os.getenv('DB_POOL_MAX_IDLE', 300))  # 유휴 연결 유지 시간(초)
+DB_POOL_MAX_LIFETIME = float(os.getenv('DB_POOL_MAX_LIFETIME', 3600))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))  # 연결 대여 대기 한도(초)
+DB_PREPARE_STATEMENTS = os.getenv('DB_PREPARE_STATEMENTS', 'true').lower() == 'true'  # PgBouncer(transaction 모드)는 false
+
+# 회로 차단기: 연속 연결 실패 N회에 열려 연결 시도 없이 바로 SQLite 폴백
+DB_BREAKER_FAILURE_THRESHOLD = int(os.getenv('DB_BREAKER_FAILURE_THRESHOLD', 3))
+DB_BREAKER_PROBE_INTERVAL = float(os.getenv('DB_BREAKER_PROBE_INTERVAL', 5))  # 열린 동안 복구 확인 간격(초)
+DB_BREAKER_PROBE_TIMEOUT = int(os.getenv('DB_BREAKER_PROBE_TIMEOUT', 3))  # 복구 확인 연결 제한 시간(초)
+DB_BREAKER_SUCCESS_THRESHOLD = int(os.getenv('DB_BREAKER_SUCCESS_THRESHOLD', 1))  # 다시 닫기 전 시험 요청 성공 수
+
+# Bloom 필터 구성 시 한 번에 읽는 행 수
+SCAN_BATCH_SIZE = int(os.getenv('SCAN_BATCH_SIZE', 10000))
+# COPY 적재 중 진행 상황을 알리는 간격(행)
+COPY_PROGRESS_ROWS = int(os.getenv('COPY_PROGRESS_ROWS', 100000))
+# 통계 카운터를 실제 집계값으로 보정하는 주기(초, 0 이면 비활성화)
+STATS_RECONCILE_INTERVAL = float(os.getenv('STATS_RECONCILE_INTERVAL', 3600))
+# 다른 프로세스의 phone_data 교체(upload_to_postgres.py --mode=replace) 확인 주기(초, 0 이면 비활성화)
+TABLE_SWAP_CHECK_INTERVAL = float(os.getenv('TABLE_SWAP_CHECK_INTERVAL', 30))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ConnectionPool:
+    """PostgreSQL 커넥션 풀 반환 (최초 호출 시 생성)"""
+    global _pool
+    if _pool is not None:
+        return _pool
+    
+    with _pool_lock:
+        if _pool is None:
+            if not DATABASE_URL:
+                raise ValueError("DATABASE_URL이 없습니다")
+            
+            # 연결 전 URL 유효성 검사
+            if not DATABASE_URL.startswith(('postgresql://', 'postgres://')):
+                logger.error(f"잘못된 DATABASE_URL 형태: {DATABASE_URL[:30]}")
+                raise ValueError("DATABASE_URL이 올바른 PostgreSQL URL 형태가 아닙니다")
+            
+            pool = ConnectionPool(
+                DATABASE_URL,
+                min_size=DB_POOL_MIN_SIZE,
+                max_size=DB_POOL_MAX_SIZE,
+                max_idle=DB_POOL_MAX_IDLE,
+                max_lifetime=DB_POOL_MAX_LIFETIME,
+                timeout=DB_POOL_TIMEOUT,
+                kwargs={'row_factory': dict_row},
+                # 매 호출마다 SELECT 1을 보내는 대신 대여 시점에만 상태 확인
+                check=ConnectionPool.check_connection,
+                name='teledb',
+                open=False,
+            )
+            try:
+                pool.open(wait=True, timeout=DB_POOL_TIMEOUT)
+            except Exception:
+                pool.close()
+                raise
+            logger.info(f"PostgreSQL 커넥션 풀 생성 (min={DB_POOL_MIN_SIZE}, max={DB_POOL_MAX_SIZE})")
+            _pool = pool
+    return _pool
+
+def _probe_postgres():
+    """풀과 별개의 단발 연결로 PostgreSQL 복구 확인 (실패 시 예외)"""
+    with psycopg.connect(DATABASE_URL, connect_timeout=DB_BREAKER_PROBE_TIMEOUT) as conn:
+        conn.execute('SELECT 1')
+
+# 동기/비동기 경로가 같은 서버를 보므로 하나를 공유
+pg_breaker = CircuitBreaker(
+    'postgres',
+    failure_threshold=DB_BREAKER_FAILURE_THRESHOLD,
+    probe_interval=DB_BREAKER_PROBE_INTERVAL,
+    success_threshold=DB_BREAKER_SUCCESS_THRESHOLD,
+    probe=_probe_postgres,
+)
+
+class DatabaseBusy(Exception):
+    """커넥션 풀이 가득 차 연결을 받지 못함 (서버는 정상이므로 폴백하지 않고 잠시 후 재시도)"""
+
+def pool_saturated(pool, error: Exception) -> bool:
+    """연결 대여 실패가 서버 장애가 아니라 풀 포화(모든 연결이 사용 중) 때문인지
+    
+    서버가 내려가면 끊긴 연결이 풀에서 빠지고 새 연결도 만들지 못하므로 풀 크기가 최대보다 작아집니다.
+    (동기/비동기 풀 공용)
+    """
+    if pool is None or not isinstance(error, PoolTimeout):
+        return False
+    stats = pool.get_stats()
+    return stats.get('pool_size', 0) >= pool.max_size and stats.get('pool_available', 0) == 0
+
+def record_pg_outcome(conn=None):
+    """PostgreSQL 요청 결과를 회로 차단기에 기록 (반열림 시험 요청은 어떤 경로로 끝나도 반드시 호출)
+    
+    연결을 받지 못했거나(취소 포함) 연결이 끊긴 경우만 실패, 쿼리 취소/잠금 대기 등은 서버가 응답한 것
+    """
+    if conn is None or conn.broken:
+        pg_breaker.record_failure()
+    else:
+        pg_breaker.record_success()
+
+def get_breaker_stats() -> Dict:
+    return pg_breaker.stats()
+
+def close_pool():
+    """커넥션 풀 종료 (봇 종료 시 호출)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+            logger.info("PostgreSQL 커넥션 풀 종료")
+
+def get_pool_stats() -> Dict:
+    """커넥션 풀 크기 및 대기 시간 통계 반환 (튜닝용)"""
+    if _pool is None:
+        return {}
+    return summarize_pool_stats(_pool.get_stats())
+
+def summarize_pool_stats(stats: Dict) -> Dict:
+    """psycopg_pool 통계를 표시용 요약으로 변환 (동기/비동기 풀 공용)"""
+    requests_num = stats.get('requests_num', 0)
+    wait_ms = stats.get('requests_wait_ms', 0)
+    return {
+        'pool_min': stats.get('pool_min', DB_POOL_MIN_SIZE),
+        'pool_max': stats.get('pool_max', DB_POOL_MAX_SIZE),
+        'pool_size': stats.get('pool_size', 0),
+        'pool_available': stats.get('pool_available', 0),
+        'requests_waiting': stats.get('requests_waiting', 0),
+        'requests_num': requests_num,
+        'requests_queued': stats.get('requests_queued', 0),
+        'requests_errors': stats.get('requests_errors', 0),
+        'requests_wait_ms': wait_ms,
+        'avg_wait_ms': round(wait_ms / requests_num, 2) if requests_num else 0,
+        'connections_num': stats.get('connections_num', 0),
+        'connections_errors': stats.get('connections_errors', 0),
+        'connections_lost': stats.get('connections_lost', 0),
+        'returns_bad': stats.get('returns_bad', 0),
+    }
+
+class Session:
+    """한 번의 작업 동안 사용하는 연결 + 해당 엔진용 쿼리 묶음"""
+    
+    dialect = None
+    
+    def __init__(self, conn):
+        self.conn = conn
+        self.sql = QUERIES[self.dialect]
+    
+    def execute(self, name: str, params=()):
+        """등록된 쿼리를 이름으로 실행하고 커서 반환"""
+        return self.conn.execute(self.sql[name], params)
+    
+    def executemany(self, name: str, params_seq) -> int:
+        """등록된 쿼리를 여러 파라미터로 실행하고 영향받은 행 수 반환"""
+        cursor = self.conn.cursor()
+        try:
+            cursor.executemany(self.sql[name], params_seq)
+            return cursor.rowcount
+        finally:
+            cursor.close()
+    
+    def bulk_insert(self, rows: Iterable[tuple]) -> int:
+        """(전화번호, 내용, 등록일) 행 일괄 삽입 후 삽입 수 반환 (중복 제거 모드에서 건너뛴 행 제외)"""
+        return self.executemany('insert_phone_with_time',
+                                ((*with_hash(phone, content), quality_flags(phone, content), created_at)
+                                 for phone, content, created_at in rows))
+    
+    def insert_rows(self, table: str, rows: List[tuple]):
+        """여러 행을 INSERT 한 문장으로 저장 (행 수는 SQLite 변수 한도 안에서 호출자가 조절)"""
+        params = [value for row in rows for value in row]
+        return self.conn.execute(multi_insert(table, len(rows), self.dialect), params)
+
+class PostgresSession(Session):
+    dialect = POSTGRES
+    
+    def execute(self, name: str, params=()):
+        # 서버측 prepared statement로 실행 (연결별로 한 번만 파싱)
+        return self.conn.execute(self.sql[name], params, prepare=DB_PREPARE_STATEMENTS or None)
+    
+    def bulk_insert(self, rows: Iterable[tuple]) -> int:
+        # 행마다 INSERT를 보내는 대신 COPY 프로토콜로 스트리밍
+        return copy_phone_rows(self.conn, rows)
+
+def copy_phone_rows(conn, rows: Iterable[tuple], staging: bool = False,
+                    progress: Callable[[int, float], None] = None, table: str = 'phone_data') -> int:
+    """(전화번호, 내용, 등록일) 행을 COPY로 table(기본 phone_data)에 적재 (호출자 트랜잭션 안에서 실행)
     
+    staging=True 이면 임시 테이블에 COPY한 뒤 INSERT ... SELECT 한 번으로 옮기고
+    빈 전화번호는 제외합니다. progress(적재 행 수, 경과 초)는 COPY_PROGRESS_ROWS마다 호출됩니다.
+    COPY는 충돌을 건너뛸 수 없으므로 중복 제거 모드에서 phone_data에 넣을 때는 항상 스테이징 테이블을 거칩니다.
+    """
+    staging = staging or (DEDUP_ENABLED and table == 'phone_data')
+    
+    # 등록일이 없는 행은 컬럼 기본값과 같은 트랜잭션 시작 시각 사용
+    with conn.cursor(row_factory=tuple_row) as cursor:
+        default_time = cursor.execute('SELECT LOCALTIMESTAMP').fetchone()[0]
+    
+    target = table
+    if staging:
+        conn.execute('''
+            CREATE TEMP TABLE phone_data_staging (
+                phone_number VARCHAR(15),
+                content TEXT,
+                created_at TIMESTAMP,
+                content_hash BIGINT,
+                quality_flags SMALLINT
+            ) ON COMMIT DROP
+        ''')
+        target = 'phone_data_staging'
+    
+    count = 0
+    start = time.perf_counter()
+    with conn.cursor() as cursor:
+        copy_sql = sql.SQL(
+            'COPY {} (phone_number, content, created_at, content_hash, quality_flags) FROM STDIN'
+        ).format(sql.Identifier(target))
+        with cursor.copy(copy_sql) as copy:
+            for phone_number, content, created_at in rows:
+                copy.write_row((phone_number, content, created_at or default_time,
+                                row_hash(phone_number, content), quality_flags(phone_number, content)))
+                count += 1
+                if progress and count % COPY_PROGRESS_ROWS == 0:
+                    progress(count, time.perf_counter() - start)
+    
+    if staging:
+        count = conn.execute(sql.SQL('''
+            INSERT INTO {} (phone_number, content, created_at, content_hash, quality_flags)
+            SELECT phone_number, content, created_at, content_hash, quality_flags FROM phone_data_staging
+            WHERE phone_number IS NOT NULL AND phone_number <> ''
+            ON CONFLICT DO NOTHING
+        ''').format(sql.Identifier(table))).rowcount
+    
+    if progress:
+        progress(count, time.perf_counter() - start)
+    return count
+
+class SqliteSession(Session):
+    # sqlite3는 cached_statements로 같은 SQL의 컴파일 결과를 재사용
+    dialect = SQLITE
+
+def _resolve_dialect() -> str:
+    """설정을 보고 기본 엔진을 한 번만 결정"""
+    if DATABASE_URL and DATABASE_URL.startswith(('postgresql://', 'postgres://')):
+        return POSTGRES
+    if DATABASE_URL:
+        logger.error(f"잘못된 DATABASE_URL 형태: {DATABASE_URL[:30]} - SQLite 사용")
+    else:
+        logger.warning("DATABASE_URL 환경변수가 설정되지 않음 - SQLite 사용")
+    return SQLITE
+
+PRIMARY_DIALECT = _resolve_dialect()
+
+# 비동기 경로가 이미 PostgreSQL 연결에 실패한 요청은 같은 요청에서 동기 풀을 다시 시도하지 않음
+_sqlite_only = threading.local()
+
+def call_on_sqlite(func, *args):
+    """func 안의 get_session()이 PostgreSQL을 건너뛰고 바로 SQLite를 쓰도록 실행"""
+    _sqlite_only.active = True
     try:
-        if not DATABASE_URL:
-            logger.warning("DATABASE_URL 환경변수가 설정되지 않음 - SQLite 사용")
-            if USE_SQLITE_FALLBACK:
-                return get_sqlite_connection()
-            raise ValueError("DATABASE_URL이 없습니다")
-        
-        logger.info(f"PostgreSQL 연결 시도: {DATABASE_URL[:50]}...")
-        
-        # 연결 전 URL 유효성 검사
-        if not DATABASE_URL.startswith(('postgresql://', 'postgres://')):
-            logger.error(f"잘못된 DATABASE_URL 형태: {DATABASE_URL[:30]}")
-            raise ValueError("DATABASE_URL이 올바른 PostgreSQL URL 형태가 아닙니다")
-        
-        # psycopg3는 URL 직접 사용 가능
-        conn = psycopg.connect(DATABASE_URL)
-        logger.info("PostgreSQL 연결 성공")
-        
-        # 연결 테스트
-        with conn.cursor() as cursor:
-            cursor.execute("SELECT 1")
-            result = cursor.fetchone()
-            logger.info(f"PostgreSQL 테스트 쿼리 결과: {result}")
-        
-        return conn
-    except Exception as e:
-        logger.error(f"PostgreSQL 연결 오류: {type(e).__name__}: {e}")
-        if USE_SQLITE_FALLBACK:
-            logger.warning("PostgreSQL 실패 - SQLite 폴백 사용")
-            return get_sqlite_connection()
-        raise
+        return func(*args)
+    finally:
+        _sqlite_only.active = False
 
-def get_sqlite_connection():
-    """SQLite 폴백 연결"""
+@contextmanager
+def get_session(fallback: bool = True):
+    """기본 엔진의 세션 반환 (PostgreSQL 연결 실패 시 SQLite 폴백)
+    
+    with 블록이 끝나면 커밋(예외 시 롤백) 후 연결이 반환됩니다.
+    fallback=False 이면 폴백하지 않고 연결 오류를 그대로 전달합니다 (기본 엔진 결과만 유효한 작업용).
+    """
+    fallback = fallback and USE_SQLITE_FALLBACK
+    if PRIMARY_DIALECT == POSTGRES and not getattr(_sqlite_only, 'active', False):
+        if not pg_breaker.allow_request():
+            # 회로가 열린 동안은 연결을 기다리지 않고 바로 폴백 (복구 확인은 백그라운드)
+            if not fallback:
+                raise psycopg.OperationalError("PostgreSQL 회로 차단 중 (복구 확인 대기)")
+        else:
+            pool = conn = None
+            busy = False
+            try:
+                pool = get_pool()
+                with pool.connection() as conn:
+                    yield PostgresSession(conn)
+                return
+            except psycopg.OperationalError as e:
+                # 쿼리 중 오류는 그대로 전달, 연결 대여 실패만 폴백
+                if conn is not None:
+                    raise
+                # 풀 포화는 서버 장애가 아니므로 차단기 실패로 세지 않고, 쓰기가 SQLite로 갈라지지 않도록 폴백하지 않음
+                if pool_saturated(pool, e):
+                    busy = True
+                    raise DatabaseBusy(f"PostgreSQL 커넥션 풀 포화 ({DB_POOL_MAX_SIZE}개 모두 사용 중)") from e
+                if not fallback:
+                    raise
+                logger.error(f"PostgreSQL 연결 오류: {type(e).__name__}: {e}")
+                logger.warning("PostgreSQL 실패 - SQLite 폴백 사용")
+            finally:
+                if busy:
+                    pg_breaker.release_trial()
+                else:
+                    record_pg_outcome(conn)
+    
+    with sqlite_session() as session:
+        yield session
+
+@contextmanager
+def sqlite_session():
+    """SQLite 세션 (스레드별 연결 재사용)"""
     try:
-        conn = sqlite3.connect('./teledb.sqlite')
-        conn.row_factory = sqlite3.Row  # dict-like access
-        logger.info("SQLite 폴백 연결 성공")
-        return conn
+        conn = get_sqlite_connection()
     except Exception as e:
         logger.error(f"SQLite 연결도 실패: {e}")
         raise
+    
+    with conn:
+        yield SqliteSession(conn)
+
+@contextmanager
+def get_connection():
+    """원시 DB 연결 반환 (스크립트용, get_session 참고)"""
+    with get_session() as session:
+        yield session.conn
 
 def init_database():
-    """데이터베이스 테이블 초기화"""
+    """스키마를 최신 버전으로 맞춤 (이미 최신이면 버전만 한 번 읽고 끝)"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # PostgreSQL과 SQLite 구분해서 테이블 생성
-        if 'sqlite' in str(type(conn)).lower():
-            # SQLite 버전 (SERIAL 대신 AUTOINCREMENT)
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS phone_data (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    phone_number VARCHAR(15) NOT NULL,
-                    content TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS query_logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id BIGINT,
-                    username VARCHAR(100),
-                    query_phone VARCHAR(15),
-                    results_count INTEGER DEFAULT 0,
-                    query_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-        else:
-            # PostgreSQL 버전
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS phone_data (
-                    id SERIAL PRIMARY KEY,
-                    phone_number VARCHAR(15) NOT NULL,
-                    content TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+        with get_session() as session:
+            dialect = session.dialect
+            version = read_schema_version(session.conn, dialect)
+            if version >= LATEST_VERSION:
+                logger.info(f"데이터베이스 스키마 최신 상태 (버전 {version})")
+                return
             
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS query_logs (
-                    id SERIAL PRIMARY KEY,
-                    user_id BIGINT,
-                    username VARCHAR(100),
-                    query_phone VARCHAR(15),
-                    results_count INTEGER DEFAULT 0,
-                    query_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+            if dialect == SQLITE:
+                migrate_sqlite(session.conn)
+        
+        if dialect == POSTGRES:
+            migrate_postgres(DATABASE_URL)
         
-        # 인덱스 생성 (공통)
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_phone ON phone_data(phone_number)')
+        with get_session() as session:
+            unreconciled = session.execute('count_unreconciled_stats').fetchone()['pending']
+            summary_pending = session.execute('phone_summary_pending').fetchone()['pending']
+            unclassified = session.execute('count_unclassified').fetchone()['pending']
         
-        conn.commit()
-        cursor.close()
-        conn.close()
+        # 카운터 테이블을 처음 만든 경우 현재 데이터로 한 번 채움
+        if unreconciled:
+            reconcile_stats()
+        # 요약 테이블을 처음 만든 경우 기존 데이터로 채움
+        if summary_pending:
+            rebuild_phone_summary()
+        # 품질 플래그 컬럼이 새로 생긴 경우 기존 행 분류 (정리 내보내기는 분류된 행만 내보냄)
+        if unclassified:
+            logger.info(f"기존 {unclassified}개 행 품질 분류 중...")
+            backfill_quality_flags()
         
-        logger.info("데이터베이스 테이블이 초기화되었습니다.")
+        logger.info(f"데이터베이스 스키마를 버전 {version}에서 {LATEST_VERSION}(으)로 올렸습니다.")
     except Exception as e:
         logger.error(f"데이터베이스 초기화 오류: {e}")
         raise
 
+def invalidate_phone_cache(*phone_numbers: str):
+    """쓰기 후 해당 번호들의 조회 캐시와 보관된 정상 결과 무효화"""
+    keys = [clean_phone_number(phone) for phone in phone_numbers]
+    search_cache.invalidate(keys)
+    stale_results.invalidate(keys)
+
+def register_phone_numbers(*phone_numbers: str):
+    """추가될 번호를 Bloom 필터에 등록 (INSERT 전에 호출)"""
+    if phone_filter is not None:
+        for phone in phone_numbers:
+            phone_filter.add(phone)
+
+def iter_phone_numbers(after_id: int = 0):
+    """(id, 전화번호)를 id 순으로 배치 단위로 읽어 반환 (메모리 사용량 일정)
+    
+    Bloom 필터가 기본 엔진의 "없음"을 판정하는 데 쓰이므로 SQLite 폴백으로 읽지 않습니다.
+    (PostgreSQL에 연결할 수 없으면 예외, 필터는 다음 주기에 다시 시도)
+    """
+    while True:
+        with get_session(fallback=False) as session:
+            rows = session.execute('scan_phone_numbers', (after_id, SCAN_BATCH_SIZE)).fetchall()
+        if not rows:
+            return
+        for row in rows:
+            yield row['id'], row['phone_number']
+        after_id = rows[-1]['id']
+        if len(rows) < SCAN_BATCH_SIZE:
+            return
+
+def read_scan_horizon():
+    """(진행 중인 가장 오래된 트랜잭션, 다음 트랜잭션) 번호 (SQLite는 커밋이 id 순이므로 None)
+    
+    PostgreSQL 시퀀스 id는 커밋 전에 발급되므로 Bloom 필터 따라잡기가 늦게 커밋된 행의 범위를 계산하는 데 사용합니다.
+    """
+    if PRIMARY_DIALECT != POSTGRES:
+        return None
+    with get_session(fallback=False) as session:
+        row = session.execute('scan_horizon').fetchone()
+    return row['oldest_running'], row['next_xid']
+
+_phone_data_oid = None
+
+def check_table_swap() -> bool:
+    """phone_data가 통째로 교체되었으면 조회 캐시/보관 결과를 비우고 Bloom 필터를 다시 구성 (교체 시 True)
+    
+    일괄 교체는 테이블을 새로 만들어 바꿔 끼우므로 테이블 oid가 바뀐 것으로 감지합니다.
+    """
+    global _phone_data_oid
+    if PRIMARY_DIALECT != POSTGRES:
+        return False
+    with get_session(fallback=False) as session:
+        oid = session.execute('phone_data_oid').fetchone()['table_oid']
+    previous, _phone_data_oid = _phone_data_oid, oid
+    if previous is None or previous == oid:
+        return False
+    
+    logger.warning("phone_data 교체 감지: 조회 캐시를 비우고 Bloom 필터를 다시 구성합니다.")
+    search_cache.clear()
+    stale_results.clear()
+    if phone_filter is not None:
+        phone_filter.reset()
+    return True
+
+table_swap_watcher = PeriodicJob('table-swap-watch', TABLE_SWAP_CHECK_INTERVAL, check_table_swap)
+
+def get_phone_filter_stats() -> Dict:
+    """Bloom 필터 크기/오탐률/미탐 응답 수 통계"""
+    if phone_filter is None:
+        return {'enabled': False}
+    return phone_filter.stats()
+
+def fetch_phone_records(phone_number: str) -> Tuple[List[Dict], str]:
+    """캐시를 거치지 않고 DB에서 조회해 (결과, 응답한 엔진) 반환 (오류는 호출자에게 전달)"""
+    with get_session() as session:
+        return [dict(row) for row in session.execute('search_phone', (phone_number,)).fetchall()], session.dialect
+
+class DatabaseUnavailable(Exception):
+    """DB 조회에 실패했고 보관된 정상 결과도 없음"""
+
+def stale_phone_records(phone_number: str, error: Exception) -> List[Dict]:
+    """DB 조회 실패 시 마지막 정상 결과를 경과 초(stale_seconds)와 함께 반환 (없으면 DatabaseUnavailable)"""
+    found, results, age = stale_results.get_stale(phone_number)
+    if not found:
+        logger.error(f"전화번호 조회 중 오류 (보관된 결과 없음): {error}")
+        raise DatabaseUnavailable(str(error)) from error
+    
+    logger.warning(f"전화번호 조회 중 오류 - {age:.0f}초 전 결과로 응답: {error}")
+    return [dict(row, stale_seconds=age) for row in results]
+
+def remember_phone_records(phone_number: str, results: List[Dict], dialect: str, generation: int, stale_generation: int):
+    """기본 엔진이 응답한 결과만 캐시/정상 결과로 저장 (SQLite 폴백 결과가 복구 후까지 남지 않도록)"""
+    if dialect != PRIMARY_DIALECT:
+        return
+    search_cache.put(phone_number, results, generation)
+    stale_results.put(phone_number, results, stale_generation)
+
+def get_stale_stats() -> Dict:
+    return stale_results.stats()
+
 def search_phone(phone_number: str) -> List[Dict]:
-    """전화번호로 모든 매칭 정보 조회 (중복 허용)"""
+    """전화번호로 모든 매칭 정보 조회 (중복 허용, 캐시 우선)"""
+    phone_number = clean_phone_number(phone_number)
+    
+    found, cached = search_cache.get(phone_number)
+    if found:
+        return list(cached)
+    
+    # 등록된 적 없는 번호는 DB 조회 없이 응답
+    if phone_filter is not None and not phone_filter.might_contain(phone_number):
+        return []
+    
+    generation, stale_generation = search_cache.generation, stale_results.generation
     try:
-        with get_connection() as conn:
-            with conn.cursor() as cursor:
-                # PostgreSQL과 SQLite 호환 쿼리
-                if 'sqlite' in str(type(conn)).lower():
-                    cursor.execute('''
-                        SELECT * FROM phone_data 
-                        WHERE phone_number = ?
-                        ORDER BY created_at DESC
-                    ''', (phone_number,))
-                else:
-                    cursor.execute('''
-                        SELECT * FROM phone_data 
-                        WHERE phone_number = %s
-                        ORDER BY created_at DESC
-                    ''', (phone_number,))
-                
-                results = cursor.fetchall()
-                if results:
-                    # PostgreSQL 결과를 dict로 변환
-                    columns = [desc[0] for desc in cursor.description]
-                    return [dict(zip(columns, row)) for row in results]
-                else:
-                    return []
+        results, dialect = fetch_phone_records(phone_number)
     except Exception as e:
-        logger.error(f"전화번호 조회 중 오류: {e}")
-        # 긴급 테스트용 더미 데이터
-        logger.warning("데이터베이스 조회 실패 - 테스트 데이터 반환")
-        return [{'phone_number': phone_number, 'content': '테스트 데이터 - DB 연결 확인 필요', 'created_at': '2025-01-01'}]
+        return stale_phone_records(phone_number, e)
+    
+    remember_phone_records(phone_number, results, dialect, generation, stale_generation)
+    return list(results)
 
 def add_phone_data(phone_number: str, content: str) -> bool:
-    """새 전화번호 정보 추가 (중복 허용)"""
+    """새 전화번호 정보 추가 (중복 제거 모드에서는 같은 내용이면 건너뜀)"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        if 'sqlite' in str(type(conn)).lower():
-            cursor.execute('''
-                INSERT INTO phone_data (phone_number, content)
-                VALUES (?, ?)
-            ''', (phone_number, content.strip()))
+        register_phone_numbers(phone_number)
+        with get_session() as session:
+            content = content.strip()
+            inserted = session.execute('insert_phone', (*with_hash(phone_number, content),
+                                                        quality_flags(phone_number, content))).rowcount
+        if inserted:
+            invalidate_phone_cache(phone_number)
+            logger.info(f"전화번호 {phone_number} 정보가 추가되었습니다.")
         else:
-            cursor.execute('''
-                INSERT INTO phone_data (phone_number, content)
-                VALUES (%s, %s)
-            ''', (phone_number, content.strip()))
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
-        logger.info(f"전화번호 {phone_number} 정보가 추가되었습니다.")
+            logger.info(f"전화번호 {phone_number}: 이미 같은 내용이 있어 건너뜀")
         return True
     except Exception as e:
         logger.error(f"데이터 추가 중 오류: {e}")
@@ -190,21 +537,20 @@ def add_phone_data(phone_number: str, content: str) -> bool:
 def update_phone_data(phone_number: str, old_content: str, new_content: str) -> bool:
     """특정 전화번호의 특정 내용 수정"""
     try:
-        with get_connection() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute('''
-                    UPDATE phone_data 
-                    SET content = %s
-                    WHERE phone_number = %s AND content = %s
-                ''', (new_content.strip(), phone_number, old_content))
-                
-                if cursor.rowcount > 0:
-                    conn.commit()
-                    logger.info(f"전화번호 {phone_number} 정보가 수정되었습니다.")
-                    return True
-                else:
-                    logger.warning(f"수정할 데이터를 찾을 수 없습니다: {phone_number}")
-                    return False
+        with get_session() as session:
+            new_content = new_content.strip()
+            cursor = session.execute('update_phone',
+                                     (new_content, row_hash(phone_number, new_content),
+                                      quality_flags(phone_number, new_content), phone_number, old_content))
+            updated_count = cursor.rowcount
+        
+        if updated_count > 0:
+            invalidate_phone_cache(phone_number)
+            logger.info(f"전화번호 {phone_number} 정보가 수정되었습니다.")
+            return True
+        else:
+            logger.warning(f"수정할 데이터를 찾을 수 없습니다: {phone_number}")
+            return False
     except Exception as e:
         logger.error(f"데이터 수정 중 오류: {e}")
         return False
@@ -212,117 +558,236 @@ def update_phone_data(phone_number: str, old_content: str, new_content: str) ->
 def delete_phone_data(phone_number: str, content: str = None) -> bool:
     """전화번호 정보 삭제"""
     try:
-        with get_connection() as conn:
-            with conn.cursor() as cursor:
-                
-                if content:
-                    # 특정 내용만 삭제
-                    cursor.execute('DELETE FROM phone_data WHERE phone_number = %s AND content = %s', 
-                                  (phone_number, content))
-                else:
-                    # 해당 번호의 모든 내용 삭제
-                    cursor.execute('DELETE FROM phone_data WHERE phone_number = %s', (phone_number,))
-                
-                if cursor.rowcount > 0:
-                    conn.commit()
-                    deleted_count = cursor.rowcount
-                    logger.info(f"전화번호 {phone_number} 정보 {deleted_count}개가 삭제되었습니다.")
-                    return True
-                else:
-                    logger.warning(f"삭제할 데이터를 찾을 수 없습니다: {phone_number}")
-                    return False
+        with get_session() as session:
+            if content:
+                # 특정 내용만 삭제
+                cursor = session.execute('delete_phone_content', (phone_number, content))
+            else:
+                # 해당 번호의 모든 내용 삭제
+                cursor = session.execute('delete_phone', (phone_number,))
+            deleted_count = cursor.rowcount
+        
+        if deleted_count > 0:
+            invalidate_phone_cache(phone_number)
+            logger.info(f"전화번호 {phone_number} 정보 {deleted_count}개가 삭제되었습니다.")
+            return True
+        else:
+            logger.warning(f"삭제할 데이터를 찾을 수 없습니다: {phone_number}")
+            return False
     except Exception as e:
         logger.error(f"데이터 삭제 중 오류: {e}")
         return False
 
+def insert_query_logs(rows: List[tuple]):
+    """조회 기록 여러 건을 한 번에 저장 (오류는 호출자에게 전달)"""
+    with get_session() as session:
+        session.insert_rows('query_logs', rows)
+
+# 조회 기록 쓰기 버퍼 (조회 응답 시간에 DB 쓰기가 포함되지 않도록 배치 저장)
+query_log_writer = create_writer(insert_query_logs)
+
 def log_query(user_id: int, username: str, query_phone: str, results_count: int):
-    """조회 기록 저장"""
-    try:
-        with get_connection() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute('''
-                    INSERT INTO query_logs (user_id, username, query_phone, results_count)
-                    VALUES (%s, %s, %s, %s)
-                ''', (user_id, username, query_phone, results_count))
-                conn.commit()
-    except Exception as e:
-        logger.error(f"조회 로그 저장 중 오류: {e}")
+    """조회 기록 저장 (버퍼에 넣고 바로 반환, 백그라운드에서 일괄 저장)"""
+    query_log_writer.add((user_id, username, query_phone, results_count))
+
+def get_query_log_stats() -> Dict:
+    """조회 기록 버퍼 통계"""
+    return query_log_writer.stats()
 
 def get_stats() -> Dict:
-    """데이터베이스 통계 반환"""
+    """데이터베이스 통계 반환 (트리거가 유지하는 카운터 조회, 데이터 크기와 무관)"""
     try:
-        with get_connection() as conn:
-            with conn.cursor() as cursor:
-                
-                # 총 등록된 데이터 수
-                cursor.execute('SELECT COUNT(*) as total FROM phone_data')
-                total_records = cursor.fetchone()['total']
-                
-                # 유니크한 전화번호 수
-                cursor.execute('SELECT COUNT(DISTINCT phone_number) as unique_count FROM phone_data')
-                unique_phones = cursor.fetchone()['unique_count']
-                
-                # 총 조회 수
-                cursor.execute('SELECT COUNT(*) as total FROM query_logs')
-                total_queries = cursor.fetchone()['total']
-                
-                # 성공한 조회 수
-                cursor.execute('SELECT COUNT(*) as found FROM query_logs WHERE results_count > 0')
-                successful_queries = cursor.fetchone()['found']
-                
-                return {
-                    'total_records': total_records,
-                    'unique_phones': unique_phones,
-                    'total_queries': total_queries,
-                    'successful_queries': successful_queries,
-                    'success_rate': round((successful_queries / total_queries * 100) if total_queries > 0 else 0, 2)
-                }
+        with get_session() as session:
+            rows = session.execute('read_stats_counters').fetchall()
+        return build_stats({row['name']: row['value'] for row in rows})
     except Exception as e:
         logger.error(f"통계 조회 중 오류: {e}")
         return {}
 
-def get_phone_summary() -> List[Dict]:
-    """전화번호별 요약 정보 (중복 수 포함)"""
+def reconcile_stats() -> Dict[str, int]:
+    """카운터를 실제 집계값으로 보정하고 카운터별 차이 반환
+    
+    PostgreSQL은 보정하는 동안 카운터 행을 잠그므로 그 사이 쓰기는 보정이 끝날 때까지 대기합니다.
+    SQLite는 읽기 트랜잭션 한 시점에서 카운터와 실제 값을 비교하고, 쓰기 잠금은 차이를 더하는 동안만 잡습니다.
+    """
+    drift = {}
+    with get_session() as session:
+        session.execute('lock_stats_counters')
+        current = {row['name']: row['value'] for row in session.execute('read_stats_counters').fetchall()}
+        for name, (query, column) in STATS_COUNTERS.items():
+            drift[name] = session.execute(query).fetchone()[column] - current.get(name, 0)
+        if session.dialect == SQLITE:
+            session.conn.commit()
+        for name, difference in drift.items():
+            session.execute('adjust_stats_counter', (difference, name))
+    
+    if any(drift.values()):
+        logger.warning(f"통계 카운터 보정: {drift}")
+    else:
+        logger.info("통계 카운터 보정: 차이 없음")
+    return drift
+
+stats_reconciler = PeriodicJob('stats-reconcile', STATS_RECONCILE_INTERVAL, reconcile_stats)
+
+# /list 한 페이지에 표시하는 번호 수
+SUMMARY_PAGE_SIZE = 20
+
+def summary_page_query(limit: int, after: str = None, before: str = None):
+    """페이지 조회에 사용할 (쿼리 이름, 파라미터) 반환 (동기/비동기 공용)
+    
+    다음 페이지 존재 여부를 알기 위해 limit보다 한 행 더 읽습니다.
+    """
+    if before is not None:
+        return 'phone_summary_before', (before, limit + 1)
+    return 'phone_summary_after', (after or '', limit + 1)
+
+def build_summary_page(rows: List[Dict], limit: int, after: str = None, before: str = None) -> Dict:
+    """조회 결과를 페이지 응답으로 구성 (items는 항상 전화번호 오름차순)"""
+    items = [dict(row) for row in rows[:limit]]
+    has_more = len(rows) > limit
+    if before is not None:
+        items.reverse()
+        return {'items': items, 'has_prev': has_more, 'has_next': True}
+    return {'items': items, 'has_prev': bool(after), 'has_next': has_more}
+
+def get_phone_summary_page(limit: int = SUMMARY_PAGE_SIZE, after: str = None, before: str = None) -> Dict:
+    """전화번호별 요약 한 페이지 (전화번호 순, keyset 페이지네이션)
+    
+    after: 이 번호 다음부터 (다음 페이지), before: 이 번호 이전까지 (이전 페이지)
+    """
     try:
-        with get_connection() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute('''
-                    SELECT phone_number, COUNT(*) as count, 
-                           MIN(created_at) as first_added,
-                           MAX(created_at) as last_added
-                    FROM phone_data 
-                    GROUP BY phone_number 
-                    ORDER BY count DESC, last_added DESC
-                ''')
-                
-                results = cursor.fetchall()
-                return [dict(result) for result in results]
+        name, params = summary_page_query(limit, after, before)
+        with get_session() as session:
+            rows = session.execute(name, params).fetchall()
+        return build_summary_page(rows, limit, after, before)
     except Exception as e:
         logger.error(f"요약 정보 조회 중 오류: {e}")
-        return []
+        return {'items': [], 'has_prev': False, 'has_next': False}
+
+def get_phone_entry_count(phone_number: str) -> int:
+    """번호에 등록된 정보 수 (phone_summary 기본키 조회)"""
+    try:
+        with get_session() as session:
+            row = session.execute('phone_entry_count', (clean_phone_number(phone_number),)).fetchone()
+        return row['entry_count'] if row else 0
+    except Exception as e:
+        logger.error(f"등록 수 조회 중 오류: {e}")
+        return 0
+
+def rebuild_phone_summary() -> int:
+    """phone_summary를 phone_data에서 다시 집계 (복구용, 재구성 중 쓰기는 대기)"""
+    with get_session() as session:
+        session.execute('lock_phone_summary')
+        session.execute('clear_phone_summary')
+        count = session.execute('fill_phone_summary').rowcount
+    logger.info(f"phone_summary 재구성 완료: {count}개 번호")
+    return count
+
+def backfill_content_hashes(progress: Callable[[int, int], None] = None) -> Dict:
+    """content_hash가 없는 기존 행에 해시를 채움 (중복 제거 모드를 켜기 전/후 한 번 실행)
+    
+    id 순으로 SCAN_BATCH_SIZE행씩 한 트랜잭션으로 처리하므로 중단 후 다시 실행해도 됩니다.
+    이미 같은 (번호, 해시)가 있는 기존 중복 행은 비워 두고 duplicates로 셉니다.
+    """
+    after_id = 0
+    hashed = 0
+    duplicates = 0
+    while True:
+        with get_session() as session:
+            rows = session.execute('scan_unhashed_phone_data', (after_id, SCAN_BATCH_SIZE)).fetchall()
+            if not rows:
+                break
+            params = []
+            for row in rows:
+                digest = content_hash(row['phone_number'], row['content'])
+                params.append((digest, row['id'], row['phone_number'], digest))
+            updated = session.executemany('set_content_hash', params)
+        hashed += updated
+        duplicates += len(rows) - updated
+        after_id = rows[-1]['id']
+        if progress:
+            progress(hashed, duplicates)
+    
+    logger.info(f"content_hash 채우기 완료: {hashed}개, 기존 중복 {duplicates}개")
+    return {'hashed': hashed, 'duplicates': duplicates}
+
+def backfill_quality_flags(rescan: bool = False, progress: Callable[[int, int], None] = None) -> Dict:
+    """미분류(quality_flags IS NULL) 행의 품질 플래그 계산 (rescan=True 이면 규칙 변경 후 전체 재계산)
+    
+    id 순으로 SCAN_BATCH_SIZE행씩 한 트랜잭션으로 처리하고, 값이 바뀐 행만 갱신합니다.
+    """
+    query = 'scan_all_phone_data' if rescan else 'scan_unclassified_phone_data'
+    after_id = 0
+    scanned = 0
+    updated = 0
+    while True:
+        with get_session() as session:
+            rows = session.execute(query, (after_id, SCAN_BATCH_SIZE)).fetchall()
+            if not rows:
+                break
+            params = []
+            for row in rows:
+                flags = quality_flags(row['phone_number'], row['content'])
+                if flags != row['quality_flags']:
+                    params.append((flags, row['id']))
+            if params:
+                session.executemany('set_quality_flags', params)
+        scanned += len(rows)
+        updated += len(params)
+        after_id = rows[-1]['id']
+        if progress:
+            progress(scanned, updated)
+    
+    logger.info(f"품질 분류 완료: {scanned}개 확인, {updated}개 갱신")
+    return {'scanned': scanned, 'updated': updated}
+
+def get_quality_counts() -> Dict:
+    """품질 플래그 값별 행 수 (None = 미분류)"""
+    with get_session() as session:
+        return {row['quality_flags']: row['total'] for row in session.execute('count_quality_flags').fetchall()}
 
 def bulk_insert_data(data_list: List[Dict]) -> int:
     """대량 데이터 삽입"""
     try:
-        with get_connection() as conn:
-            with conn.cursor() as cursor:
-                
-                # 배치 삽입을 위한 데이터 준비
-                insert_data = [
-                    (item['phone_number'], item['content'], item.get('created_at'))
-                    for item in data_list
-                ]
-                
-                cursor.executemany('''
-                    INSERT INTO phone_data (phone_number, content, created_at)
-                    VALUES (%s, %s, %s)
-                ''', insert_data)
-                
-                conn.commit()
-                inserted_count = cursor.rowcount
-                logger.info(f"{inserted_count}개 레코드가 일괄 삽입되었습니다.")
-                return inserted_count
-                
+        with get_session() as session:
+            
+            # 배치 삽입을 위한 데이터 준비
+            insert_data = [
+                (item['phone_number'], item['content'], item.get('created_at'))
+                for item in data_list
+            ]
+            
+            register_phone_numbers(*{item['phone_number'] for item in data_list})
+            start = time.perf_counter()
+            inserted_count = session.bulk_insert(insert_data)
+            elapsed = time.perf_counter() - start
+        
+        invalidate_phone_cache(*{item['phone_number'] for item in data_list})
+        logger.info(f"{inserted_count}개 레코드가 일괄 삽입되었습니다. "
+                    f"({inserted_count / elapsed if elapsed > 0 else 0:,.0f}행/초)")
+        return inserted_count
+    
     except Exception as e:
         logger.error(f"대량 삽입 중 오류: {e}")
-        return 0
\ No newline at end of file
+        return 0
+
+def start_background_jobs():
+    """Bloom 필터 구성/갱신, 통계 보정, 테이블 교체 감지 작업 시작 (봇 시작 시 호출)"""
+    if phone_filter is not None:
+        phone_filter.start(iter_phone_numbers, read_scan_horizon)
+    stats_reconciler.start()
+    try:
+        # 시작 시점의 테이블을 기준으로 기록 (실패하면 첫 주기에 기록)
+        check_table_swap()
+    except Exception as e:
+        logger.warning(f"phone_data 식별자 확인 실패: {e}")
+    table_swap_watcher.start()
+
+def stop_background_jobs():
+    """백그라운드 작업 중지 및 남은 조회 기록 저장 (봇 종료 시 커넥션 풀 종료 전에 호출)"""
+    if phone_filter is not None:
+        phone_filter.stop()
+    stats_reconciler.stop()
+    table_swap_watcher.stop()
+    query_log_writer.stop()
+    pg_breaker.stop()
@@ -0,0 +1,29 @@
+"""
+내용 해시 기반 중복 제거
+(전화번호, 정규화된 내용)의 64비트 해시를 content_hash 컬럼에 저장하고
+(phone_number, content_hash) 유니크 인덱스로 같은 정보의 재등록을 건너뜁니다.
+"""
+
+import os
+import hashlib
+import unicodedata
+from typing import Optional, Tuple
+
+# 중복 제거 사용 여부 (끄면 content_hash를 비워 두므로 기존처럼 중복 허용)
+DEDUP_ENABLED = os.getenv('DEDUP_ENABLED', 'false').lower() == 'true'
+
+def normalize_content(content: str) -> str:
+    """비교용 내용 정규화 (유니코드 NFC, 앞뒤/연속 공백 정리)"""
+    return ' '.join(unicodedata.normalize('NFC', content).split())
+
+def content_hash(phone_number: str, content: str) -> int:
+    """(전화번호, 정규화된 내용)의 64비트 해시 (BIGINT 컬럼에 맞게 부호 있는 정수)"""
+    key = f"{phone_number}\x1f{normalize_content(content)}".encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'big', signed=True)
+
+def row_hash(phone_number: str, content: str) -> Optional[int]:
+    """저장할 content_hash 값 (중복 제거를 끄면 None)"""
+    return content_hash(phone_number, content) if DEDUP_ENABLED else None
+
+def with_hash(phone_number: str, content: str) -> Tuple[str, str, Optional[int]]:
+    return phone_number, content, row_hash(phone_number, content)
@@ -0,0 +1,174 @@
+"""
+내보내기 파이프라인
+원본 DB(SQLite 파일 또는 PostgreSQL)에서 커서로 조금씩 읽어 바로 파일에 쓰므로
+테이블 크기와 관계없이 메모리 사용량이 일정합니다.
+형식은 CSV/NDJSON, 압축은 gzip/xz를 지원하며 가져오기 스크립트가 그대로 읽을 수 있습니다.
+"""
+
+import io
+import os
+import csv
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+from .formats import (
+    CSV, NDJSON, FORMATS, COMPRESSIONS, STDIO, open_input, open_output, detect_format,
+    format_from_name, compression_from_name,
+)
+from .queries import QUERIES, POSTGRES, SQLITE
+
+# 한 번에 가져오는 행 수 (PostgreSQL은 서버측 커서의 itersize)
+EXPORT_FETCH_SIZE = int(os.getenv('EXPORT_FETCH_SIZE', 10000))
+# 진행 상황 출력 간격(행)
+EXPORT_PROGRESS_ROWS = int(os.getenv('EXPORT_PROGRESS_ROWS', 100000))
+# 결과 요약에 보여줄 샘플 수
+SAMPLE_SIZE = 5
+
+EXPORT_HEADER = ['phone_number', 'content', 'created_at']
+
+def resolve_source(source: str = None) -> Tuple[str, str]:
+    """원본 지정값을 (엔진, 경로/URL)로 변환
+
+    'postgres'는 DATABASE_URL, postgresql:// URL은 그대로, 그 외는 SQLite 파일 경로입니다.
+    """
+    source = source or os.getenv('DATABASE_PATH', './teledb.sqlite')
+    if source == 'postgres':
+        source = os.getenv('DATABASE_URL', '')
+        if not source:
+            raise ValueError("DATABASE_URL 환경변수가 설정되지 않았습니다.")
+    if source.startswith(('postgresql://', 'postgres://')):
+        return POSTGRES, source
+    if not os.path.exists(source):
+        raise FileNotFoundError(f"SQLite 데이터베이스 파일을 찾을 수 없습니다: {source}")
+    return SQLITE, source
+
+def describe_source(dialect: str, location: str) -> str:
+    """로그용 원본 이름 (URL의 비밀번호는 숨김)"""
+    if dialect == POSTGRES:
+        return 'PostgreSQL ' + location.split('@')[-1]
+    return f'SQLite {location}'
+
+class ExportOptions:
+    """내보내기 스크립트 명령행 옵션
+    
+    [출력경로|-] [--format=csv|ndjson] [--compress=gzip|xz] [--source=...]
+    형식/압축을 지정하지 않으면 출력 파일 확장자(.ndjson, .csv.gz, .ndjson.xz 등)로 정합니다.
+    """
+    
+    def __init__(self, argv: List[str], default_path: str):
+        options = dict(arg[2:].split('=', 1) for arg in argv if arg.startswith('--') and '=' in arg)
+        paths = [arg for arg in argv if not arg.startswith('--')]
+        self.path = paths[0] if paths else default_path
+        self.source = options.get('source')
+        self.format = options.get('format') or format_from_name(self.path) or CSV
+        self.compression = options.get('compress') or compression_from_name(self.path)
+        
+        if self.format not in FORMATS:
+            raise ValueError(f"지원하지 않는 형식: {self.format} (사용 가능: {', '.join(FORMATS)})")
+        if self.compression is not None and self.compression not in COMPRESSIONS:
+            raise ValueError(f"지원하지 않는 압축: {self.compression} (사용 가능: {', '.join(COMPRESSIONS)})")
+    
+    @property
+    def to_stdout(self) -> bool:
+        return self.path == STDIO
+    
+    def describe(self) -> str:
+        target = '표준 출력' if self.to_stdout else self.path
+        return f"{target} ({self.format}{', ' + self.compression if self.compression else ''})"
+
+@contextmanager
+def _open_cursor(dialect: str, location: str, query_name: str):
+    if dialect == POSTGRES:
+        import psycopg
+        
+        # 이름 있는 커서 = 서버측 커서 (결과를 서버에 두고 itersize만큼씩 전송)
+        with psycopg.connect(location) as conn:
+            with conn.cursor(name='teledb_export') as cursor:
+                cursor.itersize = EXPORT_FETCH_SIZE
+                cursor.execute(QUERIES[POSTGRES][query_name])
+                yield cursor
+    else:
+        # 읽기 전용으로 열어 봇의 쓰기와 충돌하지 않음 (WAL 모드에서는 쓰기를 막지도 않음)
+        conn = sqlite3.connect(f'file:{location}?mode=ro', uri=True)
+        try:
+            cursor = conn.execute(QUERIES[SQLITE][query_name])
+            yield cursor
+        finally:
+            conn.close()
+
+def fetch_value(dialect: str, location: str, query_name: str):
+    """등록된 쿼리 결과 첫 행의 첫 값 (건수 확인용)"""
+    with _open_cursor(dialect, location, query_name) as cursor:
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+def stream_rows(dialect: str, location: str, query_name: str) -> Iterator[tuple]:
+    """등록된 내보내기 쿼리 결과를 EXPORT_FETCH_SIZE행씩 읽어 한 행씩 반환"""
+    with _open_cursor(dialect, location, query_name) as cursor:
+        while True:
+            rows = cursor.fetchmany(EXPORT_FETCH_SIZE)
+            if not rows:
+                return
+            yield from rows
+
+class ExportStats:
+    """내보내기 진행 상황 (행/초 계산, 샘플 보관)"""
+    
+    def __init__(self):
+        self.rows = 0
+        self.samples: List[tuple] = []
+        self.started = time.perf_counter()
+    
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+    
+    @property
+    def rate(self) -> float:
+        return self.rows / self.elapsed if self.elapsed > 0 else 0
+
+def write_rows(rows: Iterator[tuple], path: str, fmt: str = CSV, compression: Optional[str] = None,
+               progress=None) -> ExportStats:
+    """행을 받는 대로 파일('-'는 표준 출력)에 쓰기 (progress(stats)는 EXPORT_PROGRESS_ROWS마다 호출)
+    
+    CSV는 헤더 한 줄 뒤 행, NDJSON은 행마다 {"phone_number", "content", "created_at"} 객체 한 줄입니다.
+    """
+    stats = ExportStats()
+    with open_output(path, compression) as binary:
+        text = io.TextIOWrapper(binary, encoding='utf-8', newline='')
+        if fmt == NDJSON:
+            def write(row):
+                text.write(json.dumps(dict(zip(EXPORT_HEADER, row)), ensure_ascii=False, default=str) + '\n')
+        else:
+            writer = csv.writer(text)
+            writer.writerow(EXPORT_HEADER)
+            write = writer.writerow
+        
+        for row in rows:
+            write(row)
+            stats.rows += 1
+            if len(stats.samples) < SAMPLE_SIZE:
+                stats.samples.append(tuple(row))
+            if progress and stats.rows % EXPORT_PROGRESS_ROWS == 0:
+                progress(stats)
+        
+        # 바이너리 파일은 open_output이 닫으므로 텍스트 래퍼만 분리
+        text.flush()
+        text.detach()
+    return stats
+
+def read_export_rows(path: str) -> Iterator[Tuple[str, str, Optional[str]]]:
+    """내보낸 파일(CSV/NDJSON, 압축 포함)을 스트리밍으로 읽어 (전화번호, 내용, 등록일) 반환"""
+    with open_input(path) as binary:
+        text = io.TextIOWrapper(binary, encoding='utf-8-sig', newline='')
+        if detect_format(path) == NDJSON:
+            for line in text:
+                if line.strip():
+                    row = json.loads(line)
+                    yield row['phone_number'], row['content'], row.get('created_at') or None
+        else:
+            for row in csv.DictReader(text):
+                yield row['phone_number'], row['content'], row.get('created_at') or None
@@ -0,0 +1,89 @@
+"""
+내보내기/가져오기 파일 형식
+CSV 또는 NDJSON(줄 단위 JSON), 압축 없음/gzip/xz를 확장자와 파일 앞부분으로 판별합니다.
+출력 경로 '-'는 표준 출력입니다 (파이프로 다른 호스트에 바로 전송).
+"""
+
+import os
+import sys
+import gzip
+import lzma
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional
+
+CSV = 'csv'
+NDJSON = 'ndjson'
+FORMATS = (CSV, NDJSON)
+
+GZIP = 'gzip'
+XZ = 'xz'
+COMPRESSIONS = (GZIP, XZ)
+
+STDIO = '-'
+
+# 압축 수준 (높을수록 작지만 느림, gzip 1-9 / xz 0-9)
+EXPORT_GZIP_LEVEL = int(os.getenv('EXPORT_GZIP_LEVEL', 6))
+EXPORT_XZ_PRESET = int(os.getenv('EXPORT_XZ_PRESET', 3))
+
+_EXTENSIONS = {'.gz': GZIP, '.gzip': GZIP, '.xz': XZ}
+_FORMAT_EXTENSIONS = {'.csv': CSV, '.ndjson': NDJSON, '.jsonl': NDJSON}
+_MAGIC = {b'\x1f\x8b': GZIP, b'\xfd7zXZ\x00': XZ}
+
+def compression_from_name(path: str) -> Optional[str]:
+    """확장자로 압축 형식 판별 (.gz/.xz, 없으면 None)"""
+    return _EXTENSIONS.get(os.path.splitext(path)[1].lower())
+
+def format_from_name(path: str) -> Optional[str]:
+    """압축 확장자를 뗀 확장자로 파일 형식 판별 (.csv/.ndjson/.jsonl, 모르면 None)"""
+    base, ext = os.path.splitext(path.lower())
+    if ext in _EXTENSIONS:
+        ext = os.path.splitext(base)[1]
+    return _FORMAT_EXTENSIONS.get(ext)
+
+def detect_compression(path: str) -> Optional[str]:
+    """파일 앞부분(매직 바이트)으로 압축 형식 판별 (확장자가 없어도 인식)"""
+    with open(path, 'rb') as file:
+        head = file.read(6)
+    for magic, compression in _MAGIC.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+def open_input(path: str) -> BinaryIO:
+    """압축을 자동으로 풀어 읽는 바이너리 파일 객체 반환 (디스크에 풀지 않음)"""
+    compression = detect_compression(path)
+    if compression == GZIP:
+        return gzip.open(path, 'rb')
+    if compression == XZ:
+        return lzma.open(path, 'rb')
+    return open(path, 'rb')
+
+def detect_format(path: str) -> str:
+    """입력 파일 형식 (확장자 우선, 없으면 첫 글자가 '{'이면 NDJSON)"""
+    fmt = format_from_name(path)
+    if fmt:
+        return fmt
+    with open_input(path) as file:
+        head = file.read(64).lstrip(b'\xef\xbb\xbf \t\r\n')
+    return NDJSON if head.startswith(b'{') else CSV
+
+@contextmanager
+def open_output(path: str, compression: Optional[str] = None) -> Iterator[BinaryIO]:
+    """압축하며 쓰는 바이너리 파일 객체 ('-'는 표준 출력, 복제한 fd에 쓰므로 stdout은 닫히지 않음)"""
+    if path == STDIO:
+        sys.stdout.flush()
+        target = os.fdopen(os.dup(sys.stdout.fileno()), 'wb')
+    else:
+        target = open(path, 'wb')
+    
+    try:
+        if compression == GZIP:
+            with gzip.GzipFile(fileobj=target, mode='wb', compresslevel=EXPORT_GZIP_LEVEL) as file:
+                yield file
+        elif compression == XZ:
+            with lzma.LZMAFile(target, 'wb', preset=EXPORT_XZ_PRESET) as file:
+                yield file
+        else:
+            yield target
+    finally:
+        target.close()
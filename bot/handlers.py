@@ -8,13 +8,29 @@ import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ForceReply
 from telegram.ext import ContextTypes, CommandHandler, MessageHandler, filters, CallbackQueryHandler
 
-from .database_postgres import search_phone, add_phone_data, update_phone_data, delete_phone_data, log_query, get_stats, get_phone_summary
-from .utils import is_admin, validate_phone_number, format_phone_number, clean_phone_number
+from .database_async import search_phone, add_phone_data, update_phone_data, delete_phone_data, log_query, get_stats, get_phone_summary_page, get_phone_entry_count, get_async_pool_stats
+from .utils import is_admin, validate_phone_number, format_phone_number, clean_phone_number, format_age
 from .security import check_user_access, SecurityManager
+from .cache import search_cache
+from .queries import POSTGRES
+from .database_postgres import (
+    PRIMARY_DIALECT, DatabaseUnavailable, DatabaseBusy, get_phone_filter_stats, get_query_log_stats, get_breaker_stats, get_stale_stats,
+)
 
 # 관리자 모드 상태 저장
 admin_mode_users = set()
 
+# DB 조회 실패 + 보관된 결과도 없을 때 안내
+DB_UNAVAILABLE_TEXT = "⚠️ 데이터베이스에 일시적으로 연결할 수 없습니다. 잠시 후 다시 시도해주세요."
+# 커넥션 풀이 가득 차 쓰기를 처리하지 못했을 때 안내 (저장되지 않았으므로 다시 시도해야 함)
+DB_BUSY_TEXT = "⏳ 요청이 많아 저장하지 못했습니다. 잠시 후 다시 시도해주세요."
+
+def stale_notice(results) -> str:
+    """DB 오류로 보관된 이전 결과를 보여줄 때 붙이는 안내 (정상 결과면 빈 문자열)"""
+    if not results or results[0].get('stale_seconds') is None:
+        return ""
+    return f"⚠️ *DB 연결 오류로 {format_age(results[0]['stale_seconds'])} 전 조회 결과를 표시합니다.*\n\n"
+
 # 허용된 슈퍼어드민 username (보안 강화)
 SUPER_ADMIN_USERNAME = "dis7414"  # 오직 이 username만 superadmin 사용 가능
 
@@ -477,11 +493,15 @@ async def search_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     # 데이터베이스에서 모든 매칭 정보 조회
-    results = search_phone(phone_number)
+    try:
+        results = await search_phone(phone_number)
+    except DatabaseUnavailable:
+        await update.message.reply_text(DB_UNAVAILABLE_TEXT)
+        return
     
     # 조회 기록 저장 (보안 + 통계)
     SecurityManager.record_query(user.id)
-    log_query(user.id, user.username or user.first_name, phone_number, len(results))
+    await log_query(user.id, user.username or user.first_name, phone_number, len(results))
     
     if results:
         # 전화번호 포맷팅
@@ -489,6 +509,7 @@ async def search_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         
         response = f"✅ **조회 결과: `{formatted_phone}`**\n\n"
         response += f"📊 **총 {len(results)}개의 정보를 찾았습니다.**\n\n"
+        response += stale_notice(results)
         
         for i, result in enumerate(results, 1):
             response += f"**{i}. {result['content']}**\n"
@@ -520,7 +541,7 @@ async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
     
-    stats = get_stats()
+    stats = await get_stats()
     
     stats_text = f"""
 📊 **TeleDB 통계**
@@ -533,7 +554,76 @@ async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 💡 평균 {stats['total_records'] / max(stats['unique_phones'], 1):.1f}개의 정보가 번호당 등록됨
 """
+
+    await update.message.reply_text(stats_text, parse_mode='Markdown')
+
+async def dbstats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """DB 커넥션 풀/캐시 통계 명령어 (관리자 전용)"""
+    user = update.effective_user
     
+    # 슈퍼어드민이거나 관리자 권한이 있는지 확인
+    if not (is_admin(user.id) or user.username in admin_users or user.id in admin_users):
+        await update.message.reply_text("❌ 관리자만 사용할 수 있는 명령어입니다.")
+        return
+    
+    pool_stats = get_async_pool_stats()
+    
+    if pool_stats:
+        stats_text = f"""🔌 **커넥션 풀**
+• 크기: {pool_stats['pool_size']} (min {pool_stats['pool_min']} / max {pool_stats['pool_max']})
+• 유휴 연결: {pool_stats['pool_available']}
+• 대기 중 요청: {pool_stats['requests_waiting']}
+• 총 대여: {pool_stats['requests_num']:,}회 (대기 발생 {pool_stats['requests_queued']:,}회)
+• 평균 대기: {pool_stats['avg_wait_ms']}ms
+• 대여 실패: {pool_stats['requests_errors']}회, 연결 끊김: {pool_stats['connections_lost']}회
+"""
+    else:
+        stats_text = "🔌 **커넥션 풀**\n• PostgreSQL 풀 미사용 (SQLite 폴백)\n"
+    
+    if PRIMARY_DIALECT == POSTGRES:
+        breaker_stats = get_breaker_stats()
+        open_text = f" ({breaker_stats['open_seconds']}초째)" if breaker_stats['open_seconds'] else ""
+        stats_text += f"""
+🚧 **회로 차단기**
+• 상태: {breaker_stats['state_label']}{open_text}
+• 연속 실패: {breaker_stats['failures']}회, 열림: {breaker_stats['opened_count']}회
+• 즉시 폴백: {breaker_stats['rejected']:,}회, 복구 확인: {breaker_stats['probes']:,}회
+"""
+
+    cache_stats = search_cache.stats()
+    stats_text += f"""
+⚡ **조회 캐시**
+• 항목: {cache_stats['size']:,} / {cache_stats['max_size']:,} (TTL {cache_stats['ttl']:.0f}초)
+• 적중: {cache_stats['hits']:,}회, 실패: {cache_stats['misses']:,}회 (적중률 {cache_stats['hit_rate']}%)
+• 제거: {cache_stats['evictions']:,}회, 만료: {cache_stats['expirations']:,}회, 무효화: {cache_stats['invalidations']:,}회
+"""
+    stale_stats = get_stale_stats()
+    stats_text += f"""• DB 오류 시 이전 결과 응답: {stale_stats['degraded']:,}회, 결과 없어 실패: {stale_stats['unavailable']:,}회 (보관 {stale_stats['size']:,}개)
+"""
+
+    bloom_stats = get_phone_filter_stats()
+    if not bloom_stats['enabled']:
+        stats_text += "\n🌸 **Bloom 필터**\n• 비활성화 (BLOOM_ENABLED=false)\n"
+    elif not bloom_stats['ready']:
+        stats_text += "\n🌸 **Bloom 필터**\n• 구성 중 (완료 전까지 모든 조회는 DB 사용)\n"
+    else:
+        stats_text += f"""
+🌸 **Bloom 필터**
+• 번호: 약 {bloom_stats['estimated_items']:,} / 용량 {bloom_stats['capacity']:,}
+• 메모리: {bloom_stats['memory_bytes'] / 1024:,.0f}KB (해시 {bloom_stats['hash_count']}개)
+• 오탐률: {bloom_stats['estimated_error_rate'] * 100:.3f}% (목표 {bloom_stats['target_error_rate'] * 100:.2f}%)
+• DB 생략 응답: {bloom_stats['definite_misses']:,}회
+• 마지막 구성: {bloom_stats['last_build_seconds']}초 소요
+"""
+
+    log_stats = get_query_log_stats()
+    stats_text += f"""
+📝 **조회 로그 버퍼**
+• 대기: {log_stats['pending']:,} / {log_stats['max_buffered']:,}
+• 저장: {log_stats['written']:,}건 ({log_stats['batches']:,}회, 평균 {log_stats['avg_batch']}건)
+• 저장 실패: {log_stats['failures']:,}회, 폐기: {log_stats['dropped']:,}건
+"""
+
     await update.message.reply_text(stats_text, parse_mode='Markdown')
 
 async def add_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -563,7 +653,11 @@ async def add_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     # 데이터베이스에 추가 (중복 허용)
-    success = add_phone_data(phone_number, content)
+    try:
+        success = await add_phone_data(phone_number, content)
+    except DatabaseBusy:
+        await update.message.reply_text(DB_BUSY_TEXT)
+        return
     
     if success:
         formatted_phone = format_phone_number(phone_number)
@@ -591,22 +685,55 @@ async def delete_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("❌ 올바른 전화번호 형식이 아닙니다.")
         return
     
-    # 삭제 전 확인
-    results = search_phone(phone_number)
-    if not results:
+    # 삭제 전 확인 (등록 수만 조회)
+    entry_count = await get_phone_entry_count(phone_number)
+    if not entry_count:
         formatted_phone = format_phone_number(phone_number)
         await update.message.reply_text(f"❌ 전화번호 `{formatted_phone}`를 찾을 수 없습니다.", parse_mode='Markdown')
         return
     
     # 데이터베이스에서 모든 정보 삭제
-    success = delete_phone_data(phone_number)
+    try:
+        success = await delete_phone_data(phone_number)
+    except DatabaseBusy:
+        await update.message.reply_text(DB_BUSY_TEXT)
+        return
     
     if success:
         formatted_phone = format_phone_number(phone_number)
-        await update.message.reply_text(f"✅ 전화번호 `{formatted_phone}`의 모든 정보({len(results)}개)가 성공적으로 삭제되었습니다.", parse_mode='Markdown')
+        await update.message.reply_text(f"✅ 전화번호 `{formatted_phone}`의 모든 정보({entry_count}개)가 성공적으로 삭제되었습니다.", parse_mode='Markdown')
     else:
         await update.message.reply_text("❌ 데이터 삭제 중 오류가 발생했습니다.")
 
+async def _render_phone_list(after: str = None, before: str = None):
+    """/list 한 페이지 메시지와 이동 버튼 생성 (표시할 번호만 조회)"""
+    page = await get_phone_summary_page(after=after, before=before)
+    items = page['items']
+    if not items:
+        return None, None
+    
+    response = "📋 **등록된 전화번호 목록**\n\n"
+    for item in items:
+        formatted_phone = format_phone_number(item['phone_number'])
+        response += f"**`{formatted_phone}`**\n"
+        response += f"   📊 {item['count']}개 정보\n"
+        response += f"   📅 최근: {str(item['last_added'])[:19]}\n\n"
+    
+    # 전체 번호 수는 통계 카운터에서 조회 (전체 집계 없음)
+    stats = await get_stats()
+    if stats:
+        response += f"📊 **총 {stats['unique_phones']:,}개의 전화번호**"
+    
+    # 콜백 데이터에 경계 번호를 담아 keyset 페이지 이동
+    buttons = []
+    if page['has_prev']:
+        buttons.append(InlineKeyboardButton("◀️ 이전", callback_data=f"list:prev:{items[0]['phone_number']}"))
+    if page['has_next']:
+        buttons.append(InlineKeyboardButton("다음 ▶️", callback_data=f"list:next:{items[-1]['phone_number']}"))
+    keyboard = InlineKeyboardMarkup([buttons]) if buttons else None
+    
+    return response, keyboard
+
 async def list_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """전화번호 목록 명령어 (관리자 전용)"""
     user = update.effective_user
@@ -616,27 +743,35 @@ async def list_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("❌ 관리자만 사용할 수 있는 명령어입니다.")
         return
     
-    summary = get_phone_summary()
+    response, keyboard = await _render_phone_list()
     
-    if not summary:
+    if response is None:
         await update.message.reply_text("📭 등록된 전화번호가 없습니다.")
         return
     
-    response = "📋 **등록된 전화번호 목록**\n\n"
+    await update.message.reply_text(response, parse_mode='Markdown', reply_markup=keyboard)
+
+async def list_page_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/list 이전/다음 페이지 버튼 처리 (관리자 전용)"""
+    query = update.callback_query
+    user = query.from_user
     
-    # 처음 20개만 표시
-    for i, item in enumerate(summary[:20], 1):
-        formatted_phone = format_phone_number(item['phone_number'])
-        response += f"**{i}. `{formatted_phone}`**\n"
-        response += f"   📊 {item['count']}개 정보\n"
-        response += f"   📅 최근: {item['last_added'][:19]}\n\n"
+    if not (is_admin(user.id) or user.username in admin_users or user.id in admin_users):
+        await query.answer("❌ 관리자만 사용할 수 있습니다.", show_alert=True)
+        return
     
-    if len(summary) > 20:
-        response += f"... 외 {len(summary) - 20}개 번호\n\n"
+    _, direction, cursor = query.data.split(':', 2)
+    if direction == 'prev':
+        response, keyboard = await _render_phone_list(before=cursor)
+    else:
+        response, keyboard = await _render_phone_list(after=cursor)
     
-    response += f"📊 **총 {len(summary)}개의 전화번호**"
+    await query.answer()
+    if response is None:
+        await query.edit_message_text("📭 더 표시할 전화번호가 없습니다.")
+        return
     
-    await update.message.reply_text(response, parse_mode='Markdown')
+    await query.edit_message_text(response, parse_mode='Markdown', reply_markup=keyboard)
 
 async def bulk_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """대량 데이터 추가 명령어 (관리자 전용) - 중복 허용"""
@@ -683,7 +818,7 @@ async def bulk_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 continue
             
             # 데이터베이스에 추가 (중복 허용)
-            result = add_phone_data(phone_number, content)
+            result = await add_phone_data(phone_number, content)
             
             if result:
                 formatted_phone = format_phone_number(phone_number)
@@ -770,12 +905,16 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 
                 if content_part == "d" or content_part == "del" or content_part == "삭제":
                     # 삭제 명령어 (더 간단한 "d" 추가)
-                    results = search_phone(phone_number)
-                    if results:
-                        success = delete_phone_data(phone_number)
+                    entry_count = await get_phone_entry_count(phone_number)
+                    if entry_count:
+                        try:
+                            success = await delete_phone_data(phone_number)
+                        except DatabaseBusy:
+                            await update.message.reply_text(DB_BUSY_TEXT)
+                            return
                         if success:
                             formatted_phone = format_phone_number(phone_number)
-                            sent_msg = await update.message.reply_text(f"✅ 삭제 성공!\n🗑️ `{formatted_phone}` 삭제완료 ({len(results)}개) - 5초후삭제", parse_mode='Markdown')
+                            sent_msg = await update.message.reply_text(f"✅ 삭제 성공!\n🗑️ `{formatted_phone}` 삭제완료 ({entry_count}개) - 5초후삭제", parse_mode='Markdown')
                             import asyncio
                             asyncio.create_task(delete_message_after_delay(sent_msg, 5))
                         else:
@@ -786,7 +925,11 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     return
                 else:
                     # 추가 명령어
-                    success = add_phone_data(phone_number, content_part)
+                    try:
+                        success = await add_phone_data(phone_number, content_part)
+                    except DatabaseBusy:
+                        await update.message.reply_text(DB_BUSY_TEXT)
+                        return
                     if success:
                         formatted_phone = format_phone_number(phone_number)
                         sent_msg = await update.message.reply_text(f"✅ 추가 성공!\n📱 `{formatted_phone}` 추가완료 - 5초후삭제\n📝 {content_part[:20]}{'...' if len(content_part) > 20 else ''}", parse_mode='Markdown')
@@ -811,12 +954,17 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
         
         # 전화번호 조회
-        results = search_phone(cleaned_phone)
+        try:
+            results = await search_phone(cleaned_phone)
+        except DatabaseUnavailable:
+            await update.message.reply_text(DB_UNAVAILABLE_TEXT)
+            return
         
         if results:
             formatted_phone = format_phone_number(cleaned_phone)
             response = f"✅ **조회 결과: `{formatted_phone}`**\n\n"
             response += f"📊 **총 {len(results)}개의 정보:**\n\n"
+            response += stale_notice(results)
             
             for i, result in enumerate(results, 1):
                 response += f"**{i}. {result['content']}**\n"
@@ -913,7 +1061,7 @@ async def init_sample_data_command(update: Update, context: ContextTypes.DEFAULT
         
         added_count = 0
         for phone, content in sample_numbers:
-            success = add_phone_data(phone, content)
+            success = await add_phone_data(phone, content)
             if success:
                 added_count += 1
         
@@ -967,11 +1115,11 @@ async def manual_add_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
         await update.message.reply_text(f"🔄 데이터 추가 중: {cleaned_phone}")
         
         # 데이터베이스에 추가
-        success = add_phone_data(cleaned_phone, content)
+        success = await add_phone_data(cleaned_phone, content)
         
         if success:
             # 추가 확인
-            verify_results = search_phone(cleaned_phone)
+            verify_results = await search_phone(cleaned_phone)
             formatted_phone = format_phone_number(cleaned_phone)
             
             await update.message.reply_text(
@@ -1003,6 +1151,8 @@ def setup_handlers(application):
     application.add_handler(CommandHandler("delete", delete_command))
     application.add_handler(CommandHandler("list", list_command))
     application.add_handler(CommandHandler("bulk", bulk_command))
+    application.add_handler(CommandHandler("dbstats", dbstats_command))
+    application.add_handler(CallbackQueryHandler(list_page_callback, pattern=r'^list:'))
     
     # 보안 관련 핸들러
     application.add_handler(CommandHandler("auth", auth_command))
@@ -0,0 +1,428 @@
+"""
+CSV 가져오기 파이프라인
+파일을 한 레코드씩 읽어 배치 단위로 정규화/검증한 뒤, 배치마다 한 트랜잭션으로 저장
+export_data.py가 만든 NDJSON과 gzip/xz 압축 파일도 디스크에 풀지 않고 바로 읽습니다.
+"""
+
+import os
+import csv
+import json
+import time
+import hashlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Tuple
+
+from .dedup import with_hash
+from .quality import quality_flags
+from .formats import NDJSON, open_input, detect_format, detect_compression
+from .queries import QUERIES, SQLITE
+from .utils import clean_phone_number, validate_phone_number
+
+# 한 트랜잭션으로 저장할 행 수
+IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', 5000))
+# 병렬 파싱 시 작업 프로세스 하나가 맡는 파일 구간 크기(바이트)
+IMPORT_CHUNK_BYTES = int(os.getenv('IMPORT_CHUNK_BYTES', 8 * 1024 * 1024))
+# 파일 식별용으로 해시하는 앞/뒤 구간 크기(바이트)
+IDENTITY_SAMPLE_BYTES = 1024 * 1024
+# 진행 상황 출력 간격(초)
+IMPORT_PROGRESS_INTERVAL = float(os.getenv('IMPORT_PROGRESS_INTERVAL', 5))
+
+# 가능한 헤더명들 (소문자로 변환해서 비교)
+FIELD_PATTERNS = {
+    'phone_number': ['phone', 'phone_number', 'phonenumber', 'mobile', 'tel',
+                    '전화번호', '휴대폰', '연락처', '핸드폰', '휴대전화'],
+    'name': ['name', 'full_name', 'fullname', 'user_name', 'username',
+            '이름', '성명', '고객명', '사용자명'],
+    'company': ['company', 'corp', 'corporation', 'organization', 'org',
+               '회사', '회사명', '직장', '기업', '업체'],
+    'address': ['address', 'addr', 'location', 'place',
+               '주소', '거주지', '위치', '소재지'],
+    'email': ['email', 'e_mail', 'mail', 'email_address',
+             '이메일', '메일', '전자우편'],
+    'notes': ['notes', 'note', 'memo', 'comment', 'description', 'desc',
+             '메모', '비고', '설명', '참고', '노트']
+}
+
+# content에 붙이는 필드 이름 (순서대로)
+FIELD_LABELS = {
+    'name': '이름',
+    'company': '회사',
+    'address': '주소',
+    'email': '이메일',
+    'notes': '메모',
+}
+
+def detect_field_mapping(headers):
+    """헤더에서 필드 매핑 자동 감지"""
+    mapping = {}
+    
+    # 각 헤더에 대해 매칭 시도
+    for header in headers:
+        header_lower = header.lower().strip()
+        
+        for field, patterns in FIELD_PATTERNS.items():
+            if header_lower in [p.lower() for p in patterns]:
+                mapping[field] = header
+                break
+    
+    return mapping
+
+def sniff_delimiter(path: str, encoding: str) -> str:
+    """파일 앞부분으로 구분자 감지"""
+    with open_input(path) as file:
+        sample = file.read(4096).decode(encoding, errors='ignore')
+    return csv.Sniffer().sniff(sample).delimiter
+
+# 내보낸 파일(export_data.py)의 헤더, 이 형식이면 content/created_at을 그대로 가져옴
+EXPORT_FIELDS = ('phone_number', 'content')
+
+class CsvLayout:
+    """가져올 파일 형식 정보 (CSV/NDJSON, 압축, 구분자, 헤더, 필드 매핑, 데이터 시작 오프셋)
+    
+    NDJSON은 헤더 줄이 없으므로 첫 객체의 키를 헤더로 사용합니다.
+    압축 파일의 오프셋은 압축을 푼 데이터 기준입니다.
+    """
+    
+    def __init__(self, path: str, encoding: str):
+        self.path = path
+        self.encoding = encoding
+        self.format = detect_format(path)
+        self.compressed = detect_compression(path) is not None
+        
+        if self.format == NDJSON:
+            self.delimiter = None
+            self.data_start = 0
+            with open_input(path) as file:
+                first = next((raw for _, raw in iter_records(file, multiline=False) if raw.strip()), b'{}')
+            self.headers = list(json.loads(first.decode(encoding)))
+        else:
+            self.delimiter = sniff_delimiter(path, encoding)
+            with open_input(path) as file:
+                self.data_start, header_raw = next(iter_records(file), (0, b''))
+            header_raw = header_raw[3:] if header_raw.startswith(b'\xef\xbb\xbf') else header_raw
+            self.headers = [header.strip() for header in parse_record(header_raw, encoding, self.delimiter)]
+        
+        self.mapping = detect_field_mapping(self.headers)
+        self.is_export = all(field in self.headers for field in EXPORT_FIELDS)
+    
+    def parse_row(self, raw: bytes) -> Dict[str, str]:
+        """레코드 한 개를 {헤더: 값}으로 변환"""
+        if self.format == NDJSON:
+            return {key: '' if value is None else str(value)
+                    for key, value in json.loads(raw.decode(self.encoding)).items()}
+        return dict(zip(self.headers, parse_record(raw, self.encoding, self.delimiter)))
+    
+    def read_records(self, file, start: int = 0, end: int = None) -> Iterator[Tuple[int, bytes]]:
+        # NDJSON은 문자열 안의 줄바꿈이 이스케이프되므로 한 줄이 한 레코드
+        return iter_records(file, start, end, multiline=self.format != NDJSON)
+
+def iter_records(file, start: int = 0, end: int = None, multiline: bool = True) -> Iterator[Tuple[int, bytes]]:
+    """바이너리 파일에서 CSV 레코드 단위로 (레코드 끝 오프셋, 원본 바이트) 반환
+
+    따옴표 안의 줄바꿈은 따옴표 개수가 짝수가 될 때까지 다음 줄과 이어 붙입니다.
+    end가 주어지면 그 오프셋 이전에 시작한 레코드까지만 읽습니다.
+    """
+    file.seek(start)
+    offset = start
+    while end is None or offset < end:
+        line = file.readline()
+        if not line:
+            return
+        record = line
+        while multiline and record.count(b'"') % 2:
+            line = file.readline()
+            if not line:
+                break
+            record += line
+        offset += len(record)
+        yield offset, record
+
+def parse_record(raw: bytes, encoding: str, delimiter: str) -> List[str]:
+    """레코드 한 개를 필드 목록으로 변환"""
+    text = raw.decode(encoding)
+    return next(csv.reader([text], delimiter=delimiter), [])
+
+def build_content(row: Dict[str, str], headers: List[str], mapping: Dict[str, str]) -> str:
+    """모든 필드를 하나의 content로 합치기"""
+    content_parts = []
+    
+    # 순서대로 필드 처리
+    for field_name, label in FIELD_LABELS.items():
+        if mapping.get(field_name):
+            value = row.get(mapping[field_name], '').strip()
+            if value:
+                content_parts.append(f"{label}: {value}")
+    
+    # 매핑되지 않은 필드들도 추가
+    mapped = set(mapping.values())
+    for header in headers:
+        if header not in mapped:
+            value = row.get(header, '').strip()
+            if value:
+                content_parts.append(f"{header}: {value}")
+    
+    return " | ".join(content_parts) if content_parts else "정보 없음"
+
+class ImportStats:
+    """가져오기 진행 상황 (행/초 계산용)"""
+    
+    def __init__(self):
+        self.rows = 0
+        self.inserted = 0
+        self.skipped = 0
+        self.duplicates = 0  # 중복 제거 모드에서 이미 있는 내용이라 건너뛴 행
+        self.errors = 0
+        self.batches = 0
+        self.examples = []  # 건너뛴 행 예시 (최대 10개)
+        self.started = time.perf_counter()
+        self._last_report = self.started
+    
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+    
+    @property
+    def rate(self) -> float:
+        return self.rows / self.elapsed if self.elapsed > 0 else 0
+    
+    def note(self, message: str):
+        if len(self.examples) < 10:
+            self.examples.append(message)
+    
+    def due(self) -> bool:
+        """진행 상황을 출력할 시점인지 확인"""
+        now = time.perf_counter()
+        if now - self._last_report >= IMPORT_PROGRESS_INTERVAL:
+            self._last_report = now
+            return True
+        return False
+
+def normalize_batch(raw_records: List[Tuple[int, bytes]], layout: CsvLayout,
+                    stats: ImportStats) -> List[Tuple[str, str, int, int, str]]:
+    """(행 번호, 원본 레코드) 묶음을 (전화번호, 내용, 내용 해시, 품질 플래그, 등록일) 목록으로 정규화/검증
+    
+    내보낸 파일 형식이면 content와 created_at을 그대로 사용합니다 (백업 복원).
+    """
+    records = []
+    headers = layout.headers
+    phone_field = 'phone_number' if layout.is_export else layout.mapping['phone_number']
+    
+    for row_num, raw in raw_records:
+        # 빈 줄은 행으로 세지 않음 (csv.DictReader와 동일)
+        if not raw.strip():
+            continue
+        stats.rows += 1
+        try:
+            row = layout.parse_row(raw)
+        except (ValueError, csv.Error) as e:
+            # UnicodeDecodeError, JSONDecodeError 모두 ValueError
+            stats.errors += 1
+            stats.note(f"줄 {row_num}: 읽기 오류 - {e}")
+            continue
+        
+        phone_raw = row.get(phone_field, '').strip()
+        if not phone_raw:
+            stats.skipped += 1
+            continue
+        
+        phone_number = clean_phone_number(phone_raw)
+        
+        # 전화번호 유효성 검사
+        if not validate_phone_number(phone_number):
+            stats.skipped += 1
+            stats.note(f"줄 {row_num}: 잘못된 전화번호 형식 '{phone_raw}'")
+            continue
+        
+        if layout.is_export:
+            content, created_at = row.get('content', '').strip(), row.get('created_at') or None
+        else:
+            content, created_at = build_content(row, headers, layout.mapping), None
+        records.append((*with_hash(phone_number, content), quality_flags(phone_number, content), created_at))
+    
+    return records
+
+def file_identity(path: str) -> str:
+    """파일 크기와 앞/뒤 구간 해시로 만든 식별자 (파일을 옮기거나 이름을 바꿔도 같은 파일로 인식)"""
+    size = os.path.getsize(path)
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        digest.update(file.read(IDENTITY_SAMPLE_BYTES))
+        if size > IDENTITY_SAMPLE_BYTES:
+            file.seek(max(size - IDENTITY_SAMPLE_BYTES, IDENTITY_SAMPLE_BYTES))
+            digest.update(file.read())
+    return f"{size}:{digest.hexdigest()[:40]}"
+
+class ImportCheckpoint:
+    """파일별 가져오기 재개 지점 (배치 저장과 같은 트랜잭션에서 기록)
+    
+    offset 이전의 레코드(행 번호 last_row까지)는 이미 커밋되어 있습니다.
+    """
+    
+    def __init__(self, layout: CsvLayout):
+        self.path = layout.path
+        self.file_key = file_identity(layout.path)
+        self.data_start = layout.data_start
+        self.reset()
+    
+    def reset(self):
+        self.offset = self.data_start
+        self.last_row = 0
+        self.batch_id = 0
+        self.completed = False
+    
+    def load(self, conn) -> bool:
+        """저장된 재개 지점 읽기 (있으면 True)"""
+        row = conn.execute(QUERIES[SQLITE]['read_import_checkpoint'], (self.file_key,)).fetchone()
+        if row is None:
+            return False
+        self.offset, self.last_row, self.batch_id, completed = row
+        self.completed = bool(completed)
+        return True
+    
+    def save(self, conn, offset: int, last_row: int, completed: bool = False):
+        """현재 트랜잭션 안에서 재개 지점 기록 (커밋 후 advance 호출)"""
+        conn.execute(QUERIES[SQLITE]['save_import_checkpoint'],
+                     (self.file_key, self.path, offset, last_row, self.batch_id + 1, int(completed)))
+    
+    def advance(self, offset: int, last_row: int, completed: bool = False):
+        self.offset = offset
+        self.last_row = last_row
+        self.batch_id += 1
+        self.completed = completed
+    
+    def finish(self, conn):
+        """파일 끝까지 저장 완료 표시 (같은 파일을 다시 가져오면 건너뜀)"""
+        with conn:
+            self.save(conn, self.offset, self.last_row, completed=True)
+        self.advance(self.offset, self.last_row, completed=True)
+    
+    def clear(self, conn):
+        """재개 지점 삭제 (처음부터 다시 가져오기)"""
+        with conn:
+            conn.execute(QUERIES[SQLITE]['clear_import_checkpoint'], (self.file_key,))
+        self.reset()
+
+def insert_batch(conn, records: List[Tuple[str, str, int, int, str]], checkpoint: ImportCheckpoint = None,
+                 offset: int = None, last_row: int = None) -> int:
+    """배치 하나를 한 트랜잭션, 같은 문장(prepared statement 재사용)으로 저장 후 저장된 행 수 반환
+    
+    checkpoint가 주어지면 재개 지점도 같은 트랜잭션에서 기록하므로
+    중단되더라도 저장된 행과 재개 지점이 어긋나지 않습니다.
+    """
+    inserted = 0
+    with conn:
+        if records:
+            inserted = conn.executemany(QUERIES[SQLITE]['insert_phone_with_time'], records).rowcount
+        if checkpoint is not None:
+            checkpoint.save(conn, offset, last_row)
+    if checkpoint is not None:
+        checkpoint.advance(offset, last_row)
+    return inserted
+
+def read_batches(layout: CsvLayout, file, start: int, end: int, first_row: int,
+                 batch_size: int) -> Iterator[Tuple[int, List[Tuple[int, bytes]]]]:
+    """레코드를 batch_size개씩 묶어 (마지막 레코드 끝 오프셋, [(행 번호, 원본 레코드)]) 반환"""
+    batch = []
+    offset = start
+    for row_num, (offset, raw) in enumerate(layout.read_records(file, start, end), first_row):
+        batch.append((row_num, raw))
+        if len(batch) >= batch_size:
+            yield offset, batch
+            batch = []
+    if batch:
+        yield offset, batch
+
+def import_file(conn, layout: CsvLayout, batch_size: int = IMPORT_BATCH_SIZE, progress=None,
+                checkpoint: ImportCheckpoint = None) -> ImportStats:
+    """CSV 파일을 스트리밍으로 읽어 배치 단위로 저장 (DB 오류 시 해당 배치만 롤백 후 중단)
+    
+    checkpoint가 주어지면 그 재개 지점부터 읽고, 배치마다 재개 지점을 갱신합니다.
+    progress(stats)는 IMPORT_PROGRESS_INTERVAL초마다 호출됩니다.
+    """
+    stats = ImportStats()
+    start, first_row = (checkpoint.offset, checkpoint.last_row + 1) if checkpoint else (layout.data_start, 1)
+    
+    with open_input(layout.path) as file:
+        for offset, raw_batch in read_batches(layout, file, start, None, first_row, batch_size):
+            records = normalize_batch(raw_batch, layout, stats)
+            _write_batch(conn, records, stats, progress, checkpoint, offset, raw_batch[-1][0])
+    
+    if checkpoint is not None:
+        checkpoint.finish(conn)
+    return stats
+
+def plan_chunks(layout: CsvLayout, start: int, first_row: int,
+                chunk_bytes: int = IMPORT_CHUNK_BYTES) -> Iterator[Tuple[int, int, int]]:
+    """파일을 레코드 경계에서 chunk_bytes 정도로 나눈 (시작, 끝, 첫 행 번호) 반환
+    
+    따옴표 안 줄바꿈에서 잘리지 않도록 레코드 경계만 훑습니다 (파싱/디코딩 없음).
+    """
+    with open(layout.path, 'rb') as file:
+        offset = start
+        count = 0
+        for offset, _ in layout.read_records(file, start):
+            count += 1
+            if offset - start >= chunk_bytes:
+                yield start, offset, first_row
+                first_row += count
+                start = offset
+                count = 0
+        if count:
+            yield start, offset, first_row
+
+def parse_chunk(layout: CsvLayout, start: int, end: int, first_row: int, batch_size: int):
+    """작업 프로세스: 파일 구간 하나를 읽어 배치별 (끝 오프셋, 마지막 행 번호, 레코드)와 통계 반환"""
+    stats = ImportStats()
+    batches = []
+    with open(layout.path, 'rb') as file:
+        for offset, raw_batch in read_batches(layout, file, start, end, first_row, batch_size):
+            batches.append((offset, raw_batch[-1][0], normalize_batch(raw_batch, layout, stats)))
+    return batches, stats.rows, stats.skipped, stats.errors, stats.examples
+
+def import_file_parallel(conn, layout: CsvLayout, workers: int, batch_size: int = IMPORT_BATCH_SIZE,
+                         progress=None, checkpoint: ImportCheckpoint = None) -> ImportStats:
+    """파싱/정규화는 프로세스 풀에서 병렬로, 저장은 현재 프로세스가 파일 순서대로 수행
+    
+    메모리 사용량이 일정하도록 처리 중인 구간은 작업 프로세스 수의 2배까지만 유지합니다.
+    압축 파일은 구간 단위로 건너뛰어 읽을 수 없으므로 순차 가져오기로 처리합니다.
+    """
+    if layout.compressed:
+        return import_file(conn, layout, batch_size, progress, checkpoint)
+    
+    stats = ImportStats()
+    start, first_row = (checkpoint.offset, checkpoint.last_row + 1) if checkpoint else (layout.data_start, 1)
+    pending = deque()
+    
+    def write_next():
+        batches, rows, skipped, errors, examples = pending.popleft().result()
+        stats.rows += rows
+        stats.skipped += skipped
+        stats.errors += errors
+        for example in examples:
+            stats.note(example)
+        for offset, last_row, records in batches:
+            _write_batch(conn, records, stats, progress, checkpoint, offset, last_row)
+    
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        for chunk in plan_chunks(layout, start, first_row):
+            pending.append(pool.submit(parse_chunk, layout, *chunk, batch_size))
+            if len(pending) >= workers * 2:
+                write_next()
+        while pending:
+            write_next()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+    
+    if checkpoint is not None:
+        checkpoint.finish(conn)
+    return stats
+
+def _write_batch(conn, records, stats, progress, checkpoint, offset, last_row):
+    inserted = insert_batch(conn, records, checkpoint, offset, last_row)
+    stats.inserted += inserted
+    stats.duplicates += len(records) - inserted
+    stats.batches += 1
+    if progress and stats.due():
+        progress(stats)
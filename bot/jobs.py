@@ -0,0 +1,45 @@
+"""
+백그라운드 주기 작업
+봇 실행 중 일정 간격으로 실행할 DB 유지보수 작업 (통계 보정 등)
+"""
+
+import logging
+import threading
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+class PeriodicJob:
+    """데몬 스레드에서 interval초마다 func를 실행 (interval <= 0 이면 실행 안 함)"""
+    
+    def __init__(self, name: str, interval: float, func: Callable[[], object]):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.runs = 0
+        self.errors = 0
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name=f'teledb-{self.name}', daemon=True)
+        self._thread.start()
+        logger.info(f"주기 작업 시작: {self.name} ({self.interval:.0f}초 간격)")
+    
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+    
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.func()
+                self.runs += 1
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"주기 작업 오류 ({self.name}): {e}")
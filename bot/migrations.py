@@ -0,0 +1,154 @@
+"""
+버전별 스키마 마이그레이션 (PostgreSQL/SQLite 공용)
+적용한 버전을 schema_version 테이블에 기록하고, 시작 시 버전을 한 번만 읽어 최신이면 바로 넘어갑니다.
+
+스키마 변경은 MIGRATIONS 끝에 다음 번호로 추가하세요 (이미 배포된 항목은 고치지 않음).
+online=True 항목은 PostgreSQL에서 트랜잭션 밖(autocommit)에서 실행하므로
+CREATE INDEX CONCURRENTLY처럼 서비스 중 테이블을 잠그지 않는 구문을 쓸 수 있습니다.
+중간에 실패하면 그 버전은 기록되지 않으므로 다음 시작 시 다시 시도합니다.
+"""
+
+import logging
+import sqlite3
+from typing import Dict, List, Tuple
+
+from .queries import (
+    QUERIES, SCHEMA, ONLINE_INDEXES, SUMMARY_DELETE_DELTA, POSTGRES, SQLITE, SQLITE_ADDED_COLUMNS,
+)
+from .sqlite_manager import add_missing_columns
+
+logger = logging.getLogger(__name__)
+
+# 여러 프로세스(봇, 유지보수 스크립트)가 동시에 시작해도 한 곳만 적용하도록 잡는 advisory lock
+SCHEMA_LOCK_ID = 7415001
+
+SCHEMA_VERSION_TABLE = '''
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        name VARCHAR(100) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+class Migration:
+    """스키마 버전 하나 (엔진별 구문 목록)"""
+    
+    def __init__(self, version: int, name: str, statements: Dict[str, List[str]], online: bool = False,
+                 sqlite_columns: Dict[str, List[Tuple[str, str]]] = None):
+        self.version = version
+        self.name = name
+        self.statements = statements
+        self.online = online
+        # SQLite는 ADD COLUMN IF NOT EXISTS가 없어 구문 실행 후 확인하고 추가
+        self.sqlite_columns = sqlite_columns or {}
+
+MIGRATIONS: List[Migration] = [
+    # 버전 관리 이전 init_database가 매번 실행하던 전체 스키마 (모두 IF NOT EXISTS라 기존 DB에도 안전)
+    Migration(1, 'baseline', SCHEMA, sqlite_columns=SQLITE_ADDED_COLUMNS),
+    Migration(2, 'online indexes', ONLINE_INDEXES, online=True),
+    # 복제한 행의 원본 SQLite id (대상에서 직접 추가한 행은 NULL이라 복제가 덮어쓰지 않음)
+    Migration(3, 'replication source id', {
+        POSTGRES: [
+            'ALTER TABLE phone_data ADD COLUMN IF NOT EXISTS source_id BIGINT',
+            'CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS idx_phone_source_id ON phone_data (source_id)',
+        ],
+    }, online=True),
+    # 동시에 추가된 행의 건수를 잃지 않도록 삭제 시 요약을 다시 세지 않고 차감 (SQLite는 쓰기가 직렬이라 변경 없음)
+    Migration(4, 'summary delete deltas', SUMMARY_DELETE_DELTA),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+def pending_migrations(version: int) -> List[Migration]:
+    return [migration for migration in MIGRATIONS if migration.version > version]
+
+def read_schema_version(conn, dialect: str) -> int:
+    """적용된 마지막 버전 (schema_version 테이블이 없으면 0), 시작 시 이것만 읽음"""
+    sql = QUERIES[dialect]['read_schema_version']
+    if dialect == POSTGRES:
+        import psycopg
+        from psycopg.rows import tuple_row
+        
+        try:
+            # SAVEPOINT 안에서 읽어 테이블이 없어도 호출자 트랜잭션은 그대로 사용 가능
+            with conn.transaction():
+                with conn.cursor(row_factory=tuple_row) as cursor:
+                    row = cursor.execute(sql).fetchone()
+        except psycopg.errors.UndefinedTable:
+            return 0
+    else:
+        try:
+            row = conn.execute(sql).fetchone()
+        except sqlite3.OperationalError:
+            return 0
+    return row[0] or 0
+
+def migrate_sqlite(conn) -> List[int]:
+    """SQLite를 최신 버전으로 (전체를 한 쓰기 트랜잭션으로 적용하고 적용한 버전 목록 반환)"""
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        conn.execute(SCHEMA_VERSION_TABLE)
+        # 잠금을 잡은 뒤 다시 읽어 다른 프로세스가 먼저 적용한 버전은 건너뜀
+        applied = []
+        for migration in pending_migrations(read_schema_version(conn, SQLITE)):
+            for statement in migration.statements.get(SQLITE, []):
+                conn.execute(statement)
+            add_missing_columns(conn, migration.sqlite_columns)
+            conn.execute(QUERIES[SQLITE]['record_schema_version'], (migration.version, migration.name))
+            applied.append(migration.version)
+            logger.info(f"SQLite 스키마 버전 {migration.version} 적용: {migration.name}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return applied
+
+def migrate_postgres(database_url: str) -> List[int]:
+    """PostgreSQL을 최신 버전으로 (버전마다 한 트랜잭션, online 항목은 autocommit) 적용한 버전 목록 반환"""
+    import psycopg
+    
+    applied = []
+    with psycopg.connect(database_url, autocommit=True) as conn:
+        conn.execute('SELECT pg_advisory_lock(%s)', (SCHEMA_LOCK_ID,))
+        try:
+            conn.execute(SCHEMA_VERSION_TABLE)
+            for migration in pending_migrations(read_schema_version(conn, POSTGRES)):
+                if migration.online:
+                    for statement in migration.statements.get(POSTGRES, []):
+                        # IF NOT EXISTS는 INVALID 인덱스도 있는 것으로 보므로 구문마다 먼저 정리하고 다시 생성
+                        _drop_invalid_indexes(conn)
+                        conn.execute(statement)
+                    _check_indexes_valid(conn)
+                    conn.execute(QUERIES[POSTGRES]['record_schema_version'], (migration.version, migration.name))
+                else:
+                    with conn.transaction():
+                        for statement in migration.statements.get(POSTGRES, []):
+                            conn.execute(statement)
+                        conn.execute(QUERIES[POSTGRES]['record_schema_version'], (migration.version, migration.name))
+                applied.append(migration.version)
+                logger.info(f"PostgreSQL 스키마 버전 {migration.version} 적용: {migration.name}")
+        finally:
+            conn.execute('SELECT pg_advisory_unlock(%s)', (SCHEMA_LOCK_ID,))
+    return applied
+
+def _invalid_indexes(conn) -> List[str]:
+    """중단/실패한 CONCURRENTLY 작업이 남긴 INVALID 인덱스 (pg_index.indisvalid)"""
+    return [row[0] for row in conn.execute('''
+        SELECT c.relname FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE NOT i.indisvalid AND c.relnamespace = current_schema()::regnamespace
+    ''').fetchall()]
+
+def _check_indexes_valid(conn):
+    """INVALID 인덱스가 남아 있으면 버전을 기록하지 않고 중단 (다음 시작 시 다시 생성)"""
+    invalid = _invalid_indexes(conn)
+    if invalid:
+        raise RuntimeError(f"INVALID 인덱스가 남아 있습니다: {', '.join(invalid)}")
+
+def _drop_invalid_indexes(conn):
+    """INVALID 인덱스는 IF NOT EXISTS에 걸려 다시 만들어지지 않으므로 먼저 삭제"""
+    from psycopg import sql
+    
+    for index_name in _invalid_indexes(conn):
+        logger.warning(f"INVALID 인덱스 재생성: {index_name}")
+        conn.execute(sql.SQL('DROP INDEX CONCURRENTLY IF EXISTS {}').format(sql.Identifier(index_name)))
@@ -0,0 +1,283 @@
+"""
+PostgreSQL 일괄 적재 (upload_to_postgres.py)
+여러 연결이 새 작업 테이블에 동시에 COPY하므로 적재하는 동안 phone_data는 잠기지 않습니다.
+교체(replace)는 작업 테이블에 인덱스/요약을 만든 뒤 한 트랜잭션에서 테이블을 바꿔 끼우고,
+추가(append)는 INSERT ... SELECT 한 번으로 옮겨 전부 반영되거나 전혀 반영되지 않습니다.
+교체는 적재하는 동안 봇이 기존 테이블에 쓴 내용(추가/수정/삭제)을 버리므로 봇의 쓰기가 없을 때 실행하세요.
+실행 중인 봇은 테이블이 바뀐 것을 감지해 조회 캐시를 비우고 Bloom 필터를 다시 구성합니다
+(TABLE_SWAP_CHECK_INTERVAL 참고).
+"""
+
+import os
+import re
+import queue
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import psycopg
+from psycopg import sql
+
+from .database_postgres import DATABASE_URL, COPY_PROGRESS_ROWS, copy_phone_rows
+from .dedup import DEDUP_ENABLED
+from .queries import QUERIES, POSTGRES
+
+logger = logging.getLogger(__name__)
+
+# 동시에 COPY하는 연결 수 (파싱/해시 계산은 이 프로세스, 저장은 서버에서 병렬)
+LOAD_WORKERS = int(os.getenv('LOAD_WORKERS', 4))
+# 작업자에게 한 번에 넘기는 행 수
+LOAD_BATCH_ROWS = int(os.getenv('LOAD_BATCH_ROWS', 10000))
+# 교체 시 테이블 잠금 대기 한도와 재시도 횟수 (긴 조회 뒤에서 기다리며 다른 조회까지 막지 않도록)
+LOAD_SWAP_LOCK_TIMEOUT = os.getenv('LOAD_SWAP_LOCK_TIMEOUT', '3s')
+LOAD_SWAP_RETRIES = int(os.getenv('LOAD_SWAP_RETRIES', 5))
+
+REPLACE = 'replace'
+APPEND = 'append'
+MODES = (REPLACE, APPEND)
+
+NEW_TABLE = 'phone_data_new'
+NEW_SUMMARY = 'phone_summary_new'
+LOAD_TABLE = 'phone_data_load'
+
+def parallel_copy(rows: Iterable[tuple], table: str, workers: int = LOAD_WORKERS,
+                  progress: Callable[[int, float], None] = None) -> Tuple[int, int]:
+    """(전화번호, 내용, 등록일) 행을 LOAD_BATCH_ROWS씩 나눠 workers개 연결이 table에 동시에 COPY
+    
+    작업자마다 따로 커밋하므로 실패 시 버려도 되는 작업 테이블에만 사용합니다.
+    빈 전화번호 행은 건너뛰고 (적재 행 수, 건너뛴 행 수)를 반환합니다.
+    """
+    batches = queue.Queue(maxsize=workers * 2)
+    errors: List[Exception] = []
+    
+    def worker():
+        finished = False
+        
+        def worker_rows():
+            nonlocal finished
+            while True:
+                batch = batches.get()
+                if batch is None:
+                    finished = True
+                    return
+                yield from batch
+        
+        try:
+            with psycopg.connect(DATABASE_URL) as conn:
+                copy_phone_rows(conn, worker_rows(), table=table)
+        except Exception as e:
+            errors.append(e)
+            # 읽는 쪽이 막히지 않도록 종료 신호까지 남은 배치를 비움
+            while not finished:
+                finished = batches.get() is None
+    
+    threads = [threading.Thread(target=worker, name=f'pg-load-{i}', daemon=True) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    
+    count = skipped = 0
+    next_report = COPY_PROGRESS_ROWS
+    start = time.perf_counter()
+    try:
+        batch = []
+        for row in rows:
+            if errors:
+                break
+            if not row[0]:
+                skipped += 1
+                continue
+            batch.append(row)
+            if len(batch) >= LOAD_BATCH_ROWS:
+                batches.put(batch)
+                count += len(batch)
+                batch = []
+                if progress and count >= next_report:
+                    progress(count, time.perf_counter() - start)
+                    next_report += COPY_PROGRESS_ROWS
+        if batch and not errors:
+            batches.put(batch)
+            count += len(batch)
+    finally:
+        for _ in threads:
+            batches.put(None)
+        for thread in threads:
+            thread.join()
+    
+    if errors:
+        raise errors[0]
+    if progress:
+        progress(count, time.perf_counter() - start)
+    return count, skipped
+
+def _drop_work_tables(conn):
+    """이전 실행이 남긴 작업 테이블 정리"""
+    conn.execute(sql.SQL('DROP TABLE IF EXISTS {}').format(
+        sql.SQL(', ').join(map(sql.Identifier, (NEW_TABLE, NEW_SUMMARY, LOAD_TABLE)))))
+
+def _primary_key(conn, table: str) -> str:
+    row = conn.execute(
+        "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p'", (table,)
+    ).fetchone()
+    return row[0] if row else f'{table}_pkey'
+
+def _remove_duplicates(conn) -> int:
+    """작업 테이블에서 같은 (전화번호, content_hash)의 두 번째 이후 행 삭제 (유니크 인덱스 생성 전)"""
+    return conn.execute(sql.SQL('''
+        DELETE FROM {table} d
+        USING (
+            SELECT id, ROW_NUMBER() OVER (PARTITION BY phone_number, content_hash ORDER BY id) AS n
+            FROM {table}
+            WHERE content_hash IS NOT NULL
+        ) ranked
+        WHERE d.id = ranked.id AND ranked.n > 1
+    ''').format(table=sql.Identifier(NEW_TABLE))).rowcount
+
+def _build_indexes(conn) -> List[Tuple[str, str]]:
+    """phone_data와 같은 기본키/인덱스를 작업 테이블에 만들고 (임시 이름, 원래 이름) 목록 반환
+    
+    데이터를 다 넣은 뒤 한 번에 만드는 편이 적재 중 인덱스를 갱신하는 것보다 빠릅니다.
+    """
+    primary_key = _primary_key(conn, 'phone_data')
+    renames = [(f'{primary_key}_new', primary_key)]
+    conn.execute(sql.SQL('ALTER TABLE {} ADD CONSTRAINT {} PRIMARY KEY (id)').format(
+        sql.Identifier(NEW_TABLE), sql.Identifier(renames[0][0])))
+    
+    indexes = conn.execute('''
+        SELECT c.relname, pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = 'phone_data'::regclass AND NOT i.indisprimary AND i.indisvalid
+    ''').fetchall()
+    for name, definition in indexes:
+        temp_name = f'{name}_new'
+        statement = re.sub(r'^CREATE (UNIQUE )?INDEX \S+ ON (ONLY )?(\S+\.)?phone_data USING',
+                           rf'CREATE \1INDEX {temp_name} ON \3{NEW_TABLE} USING', definition)
+        logger.info(f"인덱스 생성: {temp_name}")
+        conn.execute(statement)
+        renames.append((temp_name, name))
+    return renames
+
+def _build_summary(conn) -> List[Tuple[str, str]]:
+    """작업 테이블로 번호별 요약 테이블을 미리 만들어 교체 후 재구성이 필요 없게 함"""
+    conn.execute(sql.SQL('CREATE TABLE {} (LIKE phone_summary INCLUDING DEFAULTS INCLUDING CONSTRAINTS)').format(
+        sql.Identifier(NEW_SUMMARY)))
+    conn.execute(sql.SQL('''
+        INSERT INTO {summary} (phone_number, entry_count, first_added, last_added)
+        SELECT phone_number, COUNT(*), MIN(created_at), MAX(created_at)
+        FROM {table}
+        GROUP BY phone_number
+    ''').format(summary=sql.Identifier(NEW_SUMMARY), table=sql.Identifier(NEW_TABLE)))
+    
+    primary_key = _primary_key(conn, 'phone_summary')
+    conn.execute(sql.SQL('ALTER TABLE {} ADD CONSTRAINT {} PRIMARY KEY (phone_number)').format(
+        sql.Identifier(NEW_SUMMARY), sql.Identifier(f'{primary_key}_new')))
+    return [(f'{primary_key}_new', primary_key)]
+
+def _table_triggers(conn) -> List[str]:
+    """phone_data/phone_summary에 걸린 트리거 정의 (CREATE TRIGGER 구문)"""
+    return [row[0] for row in conn.execute('''
+        SELECT pg_get_triggerdef(oid) FROM pg_trigger
+        WHERE tgrelid IN ('phone_data'::regclass, 'phone_summary'::regclass) AND NOT tgisinternal
+        ORDER BY tgrelid, tgname
+    ''').fetchall()]
+
+def _swap(conn, renames: List[Tuple[str, str]], counters: Dict[str, int]):
+    """한 트랜잭션에서 기존 테이블을 버리고 작업 테이블을 phone_data/phone_summary로 교체
+    
+    잠금은 이름 변경 동안만 잡으며, 긴 조회 때문에 lock_timeout을 넘기면 잠시 후 다시 시도합니다.
+    트리거는 기존 테이블과 함께 삭제되므로 기존 정의를 읽어 두었다가 새 테이블에 그대로 만듭니다
+    (어느 마이그레이션이 만든 트리거든 빠지지 않음).
+    """
+    # id 시퀀스를 새 테이블 소유로 옮겨 기존 테이블을 지워도 남도록 함 (새 id는 기존 id보다 큼)
+    sequence = conn.execute("SELECT pg_get_serial_sequence('phone_data', 'id')").fetchone()[0]
+    
+    for attempt in range(1, LOAD_SWAP_RETRIES + 1):
+        try:
+            with conn.transaction():
+                conn.execute(sql.SQL('SET LOCAL lock_timeout = {}').format(sql.Literal(LOAD_SWAP_LOCK_TIMEOUT)))
+                conn.execute('LOCK TABLE phone_data, phone_summary IN ACCESS EXCLUSIVE MODE')
+                triggers = _table_triggers(conn)
+                if sequence:
+                    conn.execute(sql.SQL('ALTER SEQUENCE {} OWNED BY {}.id').format(
+                        sql.SQL(sequence), sql.Identifier(NEW_TABLE)))
+                conn.execute('DROP TABLE phone_data, phone_summary')
+                conn.execute(sql.SQL('ALTER TABLE {} RENAME TO phone_data').format(sql.Identifier(NEW_TABLE)))
+                conn.execute(sql.SQL('ALTER TABLE {} RENAME TO phone_summary').format(sql.Identifier(NEW_SUMMARY)))
+                for temp_name, name in renames:
+                    conn.execute(sql.SQL('ALTER INDEX {} RENAME TO {}').format(
+                        sql.Identifier(temp_name), sql.Identifier(name)))
+                for definition in triggers:
+                    conn.execute(definition)
+                for name, value in counters.items():
+                    conn.execute(QUERIES[POSTGRES]['set_stats_counter'], (value, name))
+            return
+        except psycopg.errors.LockNotAvailable:
+            if attempt == LOAD_SWAP_RETRIES:
+                raise
+            logger.warning(f"테이블 잠금 대기 시간 초과, 다시 시도 ({attempt}/{LOAD_SWAP_RETRIES})")
+            time.sleep(attempt)
+
+def replace_phone_data(rows: Iterable[tuple], workers: int = LOAD_WORKERS,
+                       progress: Callable[[int, float], None] = None) -> Dict:
+    """작업 테이블에 병렬 적재한 뒤 phone_data/phone_summary를 통째로 교체
+    
+    적재/인덱스 생성 동안 조회와 쓰기는 기존 테이블을 그대로 사용하며,
+    그 사이 기존 테이블에 쓴 내용(추가/수정/삭제)은 교체 시 함께 버려집니다.
+    """
+    with psycopg.connect(DATABASE_URL, autocommit=True) as conn:
+        _drop_work_tables(conn)
+        conn.execute(sql.SQL('CREATE TABLE {} (LIKE phone_data INCLUDING DEFAULTS INCLUDING CONSTRAINTS)').format(
+            sql.Identifier(NEW_TABLE)))
+        try:
+            loaded, skipped = parallel_copy(rows, NEW_TABLE, workers, progress)
+            duplicates = _remove_duplicates(conn) if DEDUP_ENABLED else 0
+            
+            logger.info("작업 테이블 인덱스/요약 생성 중...")
+            renames = _build_indexes(conn) + _build_summary(conn)
+            conn.execute(sql.SQL('ANALYZE {}, {}').format(sql.Identifier(NEW_TABLE), sql.Identifier(NEW_SUMMARY)))
+            
+            counters = {
+                'total_records': loaded - duplicates,
+                'unique_phones': conn.execute(sql.SQL('SELECT COUNT(*) FROM {}').format(
+                    sql.Identifier(NEW_SUMMARY))).fetchone()[0],
+            }
+            _swap(conn, renames, counters)
+            logger.info("phone_data 교체 완료 (실행 중인 봇은 다음 확인 주기에 캐시를 비우고 Bloom 필터를 다시 구성)")
+        except Exception:
+            _drop_work_tables(conn)
+            raise
+    
+    return {'loaded': loaded, 'skipped': skipped, 'duplicates': duplicates, 'inserted': loaded - duplicates}
+
+def append_phone_data(rows: Iterable[tuple], workers: int = LOAD_WORKERS,
+                      progress: Callable[[int, float], None] = None) -> Dict:
+    """UNLOGGED 작업 테이블에 병렬 적재한 뒤 한 문장으로 phone_data에 추가
+    
+    트리거가 문장 단위로 한 번만 실행되고, 중복 제거 모드에서는 이미 있는 내용을 건너뜁니다.
+    """
+    with psycopg.connect(DATABASE_URL, autocommit=True) as conn:
+        _drop_work_tables(conn)
+        conn.execute(sql.SQL('''
+            CREATE UNLOGGED TABLE {} (
+                phone_number VARCHAR(15),
+                content TEXT,
+                created_at TIMESTAMP,
+                content_hash BIGINT,
+                quality_flags SMALLINT
+            )
+        ''').format(sql.Identifier(LOAD_TABLE)))
+        try:
+            loaded, skipped = parallel_copy(rows, LOAD_TABLE, workers, progress)
+            
+            logger.info("phone_data에 추가 중...")
+            conflict = sql.SQL('ON CONFLICT DO NOTHING' if DEDUP_ENABLED else '')
+            inserted = conn.execute(sql.SQL('''
+                INSERT INTO phone_data (phone_number, content, created_at, content_hash, quality_flags)
+                SELECT phone_number, content, created_at, content_hash, quality_flags FROM {}
+                {}
+            ''').format(sql.Identifier(LOAD_TABLE), conflict)).rowcount
+        finally:
+            _drop_work_tables(conn)
+    
+    return {'loaded': loaded, 'skipped': skipped, 'duplicates': loaded - inserted, 'inserted': inserted}
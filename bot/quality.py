@@ -0,0 +1,49 @@
+"""
+데이터 품질 분류
+저장 시 한 번 계산한 문제 유형을 phone_data.quality_flags 비트로 보관합니다 (0 = 정상, NULL = 미분류).
+정리 내보내기/정리 작업은 내용 LIKE 검색 대신 이 컬럼의 인덱스로 거릅니다.
+규칙을 바꾼 뒤에는 python3 maintenance.py backfill_quality --all 로 다시 계산하세요.
+"""
+
+import os
+import re
+from typing import List
+
+def _words(value: str) -> List[str]:
+    return [word.strip().casefold() for word in value.split(',') if word.strip()]
+
+# 분류 규칙 (쉼표로 구분, 대소문자 무시)
+QUALITY_BLOCKED_WORDS = _words(os.getenv('QUALITY_BLOCKED_WORDS', '바보'))
+QUALITY_TEST_WORDS = _words(os.getenv('QUALITY_TEST_WORDS', 'test,테스트'))
+# 정리 내보내기 대상 번호 형식 (기본: 010 휴대폰 11자리)
+QUALITY_PHONE_PATTERN = re.compile(os.getenv('QUALITY_PHONE_PATTERN', r'^010\d{8}$'))
+
+FLAG_BLOCKED_WORD = 1
+FLAG_TEST_DATA = 2
+FLAG_NONSTANDARD_PHONE = 4
+
+FLAG_LABELS = {
+    FLAG_BLOCKED_WORD: '금칙어',
+    FLAG_TEST_DATA: '테스트 데이터',
+    FLAG_NONSTANDARD_PHONE: '비표준 번호',
+}
+
+def quality_flags(phone_number: str, content: str) -> int:
+    """규칙에 걸린 문제 유형 비트 합 (0 이면 정상)"""
+    flags = 0
+    text = content.casefold()
+    if any(word in text for word in QUALITY_BLOCKED_WORDS):
+        flags |= FLAG_BLOCKED_WORD
+    if any(word in text for word in QUALITY_TEST_WORDS):
+        flags |= FLAG_TEST_DATA
+    if not QUALITY_PHONE_PATTERN.match(phone_number):
+        flags |= FLAG_NONSTANDARD_PHONE
+    return flags
+
+def describe_flags(flags: int) -> str:
+    """표시용 문제 유형 이름"""
+    if flags is None:
+        return '미분류'
+    if flags == 0:
+        return '정상'
+    return ', '.join(label for bit, label in FLAG_LABELS.items() if flags & bit)
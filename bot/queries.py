@@ -0,0 +1,723 @@
+"""
+백엔드별 SQL 쿼리 모음
+쿼리는 PostgreSQL 형식(%s)으로 한 번만 작성하고,
+SQLite용은 모듈 로드 시 한 번 변환(?)해 둡니다.
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+POSTGRES = 'postgres'
+SQLITE = 'sqlite'
+DIALECTS = (POSTGRES, SQLITE)
+
+# 공통 쿼리 (PostgreSQL 플레이스홀더 기준)
+_QUERIES = {
+    # idx_phone_created 순서 그대로 읽음 (정렬 없음, content만 테이블에서)
+    'search_phone': '''
+        SELECT id, phone_number, content, created_at FROM phone_data
+        WHERE phone_number = %s
+        ORDER BY created_at DESC
+    ''',
+    # content_hash가 NULL이면 충돌하지 않으므로 중복 제거를 끈 상태에서는 항상 저장
+    # 충돌 대상을 지정하지 않아 idx_phone_content_hash가 아직 없어도 (마이그레이션 중단 등) 저장은 동작
+    'insert_phone': '''
+        INSERT INTO phone_data (phone_number, content, content_hash, quality_flags)
+        VALUES (%s, %s, %s, %s)
+        ON CONFLICT DO NOTHING
+    ''',
+    'insert_phone_with_time': '''
+        INSERT INTO phone_data (phone_number, content, content_hash, quality_flags, created_at)
+        VALUES (%s, %s, %s, %s, COALESCE(%s, CURRENT_TIMESTAMP))
+        ON CONFLICT DO NOTHING
+    ''',
+    'update_phone': '''
+        UPDATE phone_data
+        SET content = %s, content_hash = %s, quality_flags = %s
+        WHERE phone_number = %s AND content = %s
+    ''',
+    'delete_phone': 'DELETE FROM phone_data WHERE phone_number = %s',
+    'delete_phone_content': 'DELETE FROM phone_data WHERE phone_number = %s AND content = %s',
+    'count_records': 'SELECT COUNT(*) as total FROM phone_data',
+    'count_unique_phones': 'SELECT COUNT(DISTINCT phone_number) as unique_count FROM phone_data',
+    'count_queries': 'SELECT COUNT(*) as total FROM query_logs',
+    'count_successful_queries': 'SELECT COUNT(*) as found FROM query_logs WHERE results_count > 0',
+    # phone_summary 기본키 순 keyset 페이지 (표시할 행만 읽음)
+    'phone_summary_after': '''
+        SELECT phone_number, entry_count as count, first_added, last_added
+        FROM phone_summary
+        WHERE phone_number > %s
+        ORDER BY phone_number
+        LIMIT %s
+    ''',
+    'phone_summary_before': '''
+        SELECT phone_number, entry_count as count, first_added, last_added
+        FROM phone_summary
+        WHERE phone_number < %s
+        ORDER BY phone_number DESC
+        LIMIT %s
+    ''',
+    # 전체 요약 (등록 수 많은 순, 집계 없이 phone_summary만 읽음)
+    'phone_summary_by_count': '''
+        SELECT phone_number, entry_count as count, first_added, last_added
+        FROM phone_summary
+        ORDER BY entry_count DESC, last_added DESC
+    ''',
+    'phone_entry_count': 'SELECT entry_count FROM phone_summary WHERE phone_number = %s',
+    # phone_summary 재구성 (트리거 누락/수동 수정 복구용)
+    'phone_summary_pending': '''
+        SELECT CASE WHEN EXISTS (SELECT 1 FROM phone_data)
+                     AND NOT EXISTS (SELECT 1 FROM phone_summary)
+               THEN 1 ELSE 0 END as pending
+    ''',
+    'lock_phone_summary': 'LOCK TABLE phone_summary IN EXCLUSIVE MODE',
+    'clear_phone_summary': 'DELETE FROM phone_summary',
+    'fill_phone_summary': '''
+        INSERT INTO phone_summary (phone_number, entry_count, first_added, last_added)
+        SELECT phone_number, COUNT(*), MIN(created_at), MAX(created_at)
+        FROM phone_data
+        GROUP BY phone_number
+    ''',
+    # 통계 카운터 (트리거가 유지, 주기적으로 실제 집계값과 보정)
+    'read_stats_counters': 'SELECT name, value FROM stats_counters',
+    'count_unreconciled_stats': 'SELECT COUNT(*) as pending FROM stats_counters WHERE reconciled_at IS NULL',
+    # 보정 중 트리거의 카운터 갱신을 잠시 막아 집계와 갱신 사이의 누락 방지
+    'lock_stats_counters': 'SELECT name FROM stats_counters ORDER BY name FOR UPDATE',
+    'set_stats_counter': '''
+        UPDATE stats_counters
+        SET value = %s, reconciled_at = CURRENT_TIMESTAMP
+        WHERE name = %s
+    ''',
+    # 집계 시점의 카운터와 실제 값의 차이만 더함 (집계 후 트리거가 반영한 변경은 유지)
+    'adjust_stats_counter': '''
+        UPDATE stats_counters
+        SET value = value + %s, reconciled_at = CURRENT_TIMESTAMP
+        WHERE name = %s
+    ''',
+    # CSV 가져오기 재개 지점 (배치 저장과 같은 트랜잭션에서 갱신)
+    'read_import_checkpoint': '''
+        SELECT byte_offset, last_row, batch_id, completed
+        FROM import_checkpoints
+        WHERE file_key = %s
+    ''',
+    'save_import_checkpoint': '''
+        INSERT INTO import_checkpoints (file_key, path, byte_offset, last_row, batch_id, completed, updated_at)
+        VALUES (%s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+        ON CONFLICT (file_key) DO UPDATE SET
+            path = EXCLUDED.path,
+            byte_offset = EXCLUDED.byte_offset,
+            last_row = EXCLUDED.last_row,
+            batch_id = EXCLUDED.batch_id,
+            completed = EXCLUDED.completed,
+            updated_at = EXCLUDED.updated_at
+    ''',
+    'clear_import_checkpoint': 'DELETE FROM import_checkpoints WHERE file_key = %s',
+    # 해시가 없는 기존 행에 content_hash 채우기 (이미 같은 해시가 있는 중복 행은 비워 둠)
+    'scan_unhashed_phone_data': '''
+        SELECT id, phone_number, content FROM phone_data
+        WHERE id > %s AND content_hash IS NULL
+        ORDER BY id
+        LIMIT %s
+    ''',
+    'set_content_hash': '''
+        UPDATE phone_data SET content_hash = %s
+        WHERE id = %s AND NOT EXISTS (
+            SELECT 1 FROM phone_data WHERE phone_number = %s AND content_hash = %s
+        )
+    ''',
+    # 품질 분류 채우기/다시 계산 (id 순 배치)
+    'scan_unclassified_phone_data': '''
+        SELECT id, phone_number, content, quality_flags FROM phone_data
+        WHERE id > %s AND quality_flags IS NULL
+        ORDER BY id
+        LIMIT %s
+    ''',
+    'scan_all_phone_data': '''
+        SELECT id, phone_number, content, quality_flags FROM phone_data
+        WHERE id > %s
+        ORDER BY id
+        LIMIT %s
+    ''',
+    'set_quality_flags': 'UPDATE phone_data SET quality_flags = %s WHERE id = %s',
+    # 품질 유형별 건수 (idx_phone_quality만 읽음, NULL = 미분류)
+    'count_quality_flags': '''
+        SELECT quality_flags, COUNT(*) as total FROM phone_data
+        GROUP BY quality_flags
+        ORDER BY quality_flags
+    ''',
+    'count_unclassified': 'SELECT COUNT(*) as pending FROM phone_data WHERE quality_flags IS NULL',
+    # 내보내기 (커서로 조금씩 읽음, 정렬은 DB가 처리하므로 메모리 사용량은 그대로)
+    'export_phone_data': '''
+        SELECT phone_number, content, created_at
+        FROM phone_data
+        ORDER BY created_at
+    ''',
+    # 정상(quality_flags = 0) 행 중 번호별 가장 오래된 정보만
+    # idx_phone_quality 범위 스캔이 번호 순이라 그룹화에 정렬이 필요 없음
+    # (SQLite는 MIN()과 같은 행의 content를 반환)
+    'export_clean_phone_data': '''
+        SELECT phone_number, content, MIN(created_at) as created_at
+        FROM phone_data
+        WHERE quality_flags = 0
+        GROUP BY phone_number
+        ORDER BY created_at
+    ''',
+    # SQLite → PostgreSQL 증분 복제 (원본: id 워터마크 이후 새 행 + replication_log의 수정/삭제)
+    'scan_new_phone_data': '''
+        SELECT id, phone_number, content, created_at, content_hash, quality_flags FROM phone_data
+        WHERE id > %s
+        ORDER BY id
+        LIMIT %s
+    ''',
+    'replication_log_end': '''
+        SELECT MAX(seq) as last_seq FROM (
+            SELECT seq FROM replication_log WHERE seq > %s ORDER BY seq LIMIT %s
+        ) batch
+    ''',
+    # 로그 구간에 기록된 행 중 아직 남아 있는 행은 현재 값으로 다시 보내고
+    'read_changed_phone_data': '''
+        SELECT id, phone_number, content, created_at, content_hash, quality_flags FROM phone_data
+        WHERE id IN (SELECT row_id FROM replication_log WHERE seq > %s AND seq <= %s)
+    ''',
+    # 없어진 행은 묘비(tombstone)로 대상에서 삭제
+    'read_deleted_phone_ids': '''
+        SELECT DISTINCT row_id FROM replication_log l
+        WHERE seq > %s AND seq <= %s
+          AND NOT EXISTS (SELECT 1 FROM phone_data p WHERE p.id = l.row_id)
+    ''',
+    'prune_replication_log': 'DELETE FROM replication_log WHERE seq <= %s',
+    # 대상: 원본별 마지막으로 반영한 위치 (반영과 같은 트랜잭션에서 갱신)
+    'read_replication_state': 'SELECT last_id, last_seq FROM replication_state WHERE source = %s',
+    'save_replication_state': '''
+        INSERT INTO replication_state (source, last_id, last_seq, updated_at)
+        VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
+        ON CONFLICT (source) DO UPDATE SET
+            last_id = EXCLUDED.last_id,
+            last_seq = EXCLUDED.last_seq,
+            updated_at = EXCLUDED.updated_at
+    ''',
+    'clear_replication_state': 'DELETE FROM replication_state WHERE source = %s',
+    # 스키마 버전 (bot/migrations.py, 시작 시 이 한 번만 읽음)
+    'read_schema_version': 'SELECT MAX(version) as version FROM schema_version',
+    'record_schema_version': '''
+        INSERT INTO schema_version (version, name) VALUES (%s, %s)
+        ON CONFLICT (version) DO NOTHING
+    ''',
+    # 전체 번호를 id 순으로 나눠 읽기 (Bloom 필터 구성용, 기본키 범위 스캔)
+    'scan_phone_numbers': '''
+        SELECT id, phone_number FROM phone_data
+        WHERE id > %s
+        ORDER BY id
+        LIMIT %s
+    ''',
+}
+
+# 엔진별로 문법이 다른 쿼리
+_OVERRIDES: Dict[str, Dict[str, str]] = {
+    POSTGRES: {
+        # PostgreSQL은 GROUP BY 밖의 컬럼을 쓸 수 없으므로 DISTINCT ON으로 번호별 첫 행 선택
+        'export_clean_phone_data': '''
+            SELECT phone_number, content, created_at FROM (
+                SELECT DISTINCT ON (phone_number) phone_number, content, created_at
+                FROM phone_data
+                WHERE quality_flags = 0
+                ORDER BY phone_number, created_at
+            ) first_rows
+            ORDER BY created_at
+        ''',
+        # 아직 진행 중인 가장 오래된 트랜잭션과 다음 트랜잭션 번호 (Bloom 필터 따라잡기 범위)
+        'scan_horizon': '''
+            SELECT txid_snapshot_xmin(txid_current_snapshot()) AS oldest_running,
+                   txid_snapshot_xmax(txid_current_snapshot()) AS next_xid
+        ''',
+        # phone_data 테이블 식별자 (일괄 교체 후 바뀜, 캐시/Bloom 필터 초기화 판단용)
+        'phone_data_oid': "SELECT 'phone_data'::regclass::oid AS table_oid",
+    },
+    SQLITE: {
+        # SQLite는 행 잠금이 없으므로 쓰기 잠금 대신 읽기 트랜잭션으로 한 시점을 집계
+        # (쓰기 잠금을 집계 내내 잡으면 SQLITE_BUSY_TIMEOUT보다 오래 기다린 쓰기가 실패)
+        'lock_stats_counters': 'BEGIN',
+        'lock_phone_summary': 'BEGIN IMMEDIATE',
+    },
+}
+
+# 테이블/인덱스 생성 DDL
+SCHEMA: Dict[str, List[str]] = {
+    POSTGRES: [
+        '''
+        CREATE TABLE IF NOT EXISTS phone_data (
+            id SERIAL PRIMARY KEY,
+            phone_number VARCHAR(15) NOT NULL,
+            content TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            content_hash BIGINT,
+            quality_flags SMALLINT
+        )
+        ''',
+        # 기존 테이블에 컬럼 추가 (ALTER TABLE은 테이블 잠금이 필요하므로 없을 때만)
+        '''
+        DO $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = 'phone_data' AND column_name = 'content_hash'
+            ) THEN
+                ALTER TABLE phone_data ADD COLUMN content_hash BIGINT;
+            END IF;
+            IF NOT EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = 'phone_data' AND column_name = 'quality_flags'
+            ) THEN
+                ALTER TABLE phone_data ADD COLUMN quality_flags SMALLINT;
+            END IF;
+        END
+        $$
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS query_logs (
+            id SERIAL PRIMARY KEY,
+            user_id BIGINT,
+            username VARCHAR(100),
+            query_phone VARCHAR(15),
+            results_count INTEGER DEFAULT 0,
+            query_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS stats_counters (
+            name VARCHAR(50) PRIMARY KEY,
+            value BIGINT NOT NULL DEFAULT 0,
+            reconciled_at TIMESTAMP
+        )
+        ''',
+        '''
+        INSERT INTO stats_counters (name)
+        VALUES ('total_records'), ('unique_phones'), ('total_queries'), ('successful_queries')
+        ON CONFLICT DO NOTHING
+        ''',
+        # 문장 단위 트리거 (대량 INSERT/DELETE도 카운터 갱신은 한 번)
+        # 카운터 행은 항상 이름 순으로 갱신 (보정 작업과 교착 방지)
+        '''
+        CREATE OR REPLACE FUNCTION stats_phone_data_insert() RETURNS trigger AS $$
+        DECLARE
+            added_rows BIGINT;
+            added_phones BIGINT;
+        BEGIN
+            SELECT COUNT(*) INTO added_rows FROM new_rows;
+            IF added_rows = 0 THEN
+                RETURN NULL;
+            END IF;
+            SELECT COUNT(*) INTO added_phones FROM (
+                SELECT phone_number, array_agg(id) AS ids FROM new_rows GROUP BY phone_number
+            ) n
+            WHERE NOT EXISTS (
+                SELECT 1 FROM phone_data p
+                WHERE p.phone_number = n.phone_number AND p.id <> ALL (n.ids)
+            );
+            UPDATE stats_counters SET value = value + added_rows WHERE name = 'total_records';
+            UPDATE stats_counters SET value = value + added_phones WHERE name = 'unique_phones';
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        ''',
+        '''
+        CREATE OR REPLACE FUNCTION stats_phone_data_delete() RETURNS trigger AS $$
+        DECLARE
+            removed_rows BIGINT;
+            removed_phones BIGINT;
+        BEGIN
+            SELECT COUNT(*) INTO removed_rows FROM old_rows;
+            IF removed_rows = 0 THEN
+                RETURN NULL;
+            END IF;
+            SELECT COUNT(DISTINCT o.phone_number) INTO removed_phones FROM old_rows o
+            WHERE NOT EXISTS (SELECT 1 FROM phone_data p WHERE p.phone_number = o.phone_number);
+            UPDATE stats_counters SET value = value - removed_rows WHERE name = 'total_records';
+            UPDATE stats_counters SET value = value - removed_phones WHERE name = 'unique_phones';
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        ''',
+        '''
+        CREATE OR REPLACE FUNCTION stats_query_logs_insert() RETURNS trigger AS $$
+        DECLARE
+            added_queries BIGINT;
+            added_found BIGINT;
+        BEGIN
+            SELECT COUNT(*), COUNT(*) FILTER (WHERE results_count > 0)
+            INTO added_queries, added_found FROM new_rows;
+            IF added_queries = 0 THEN
+                RETURN NULL;
+            END IF;
+            UPDATE stats_counters SET value = value + added_found WHERE name = 'successful_queries';
+            UPDATE stats_counters SET value = value + added_queries WHERE name = 'total_queries';
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        ''',
+        # 트리거 재생성은 테이블 잠금이 필요하므로 없을 때만 생성
+        '''
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'stats_phone_data_insert') THEN
+                CREATE TRIGGER stats_phone_data_insert AFTER INSERT ON phone_data
+                REFERENCING NEW TABLE AS new_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION stats_phone_data_insert();
+            END IF;
+            IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'stats_phone_data_delete') THEN
+                CREATE TRIGGER stats_phone_data_delete AFTER DELETE ON phone_data
+                REFERENCING OLD TABLE AS old_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION stats_phone_data_delete();
+            END IF;
+            IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'stats_query_logs_insert') THEN
+                CREATE TRIGGER stats_query_logs_insert AFTER INSERT ON query_logs
+                REFERENCING NEW TABLE AS new_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION stats_query_logs_insert();
+            END IF;
+        END
+        $$
+        ''',
+        # 번호별 요약 (건수/최초/최근 등록일), 트리거로 쓰기와 같은 트랜잭션에서 갱신
+        '''
+        CREATE TABLE IF NOT EXISTS phone_summary (
+            phone_number VARCHAR(15) PRIMARY KEY,
+            entry_count INTEGER NOT NULL,
+            first_added TIMESTAMP,
+            last_added TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE OR REPLACE FUNCTION summary_phone_data_insert() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO phone_summary (phone_number, entry_count, first_added, last_added)
+            SELECT phone_number, COUNT(*), MIN(created_at), MAX(created_at)
+            FROM new_rows
+            GROUP BY phone_number
+            ORDER BY phone_number
+            ON CONFLICT (phone_number) DO UPDATE SET
+                entry_count = phone_summary.entry_count + EXCLUDED.entry_count,
+                first_added = LEAST(phone_summary.first_added, EXCLUDED.first_added),
+                last_added = GREATEST(phone_summary.last_added, EXCLUDED.last_added);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        ''',
+        # 삭제된 번호는 남은 행으로 다시 계산 (idx_phone_created로 번호별 조회)
+        '''
+        CREATE OR REPLACE FUNCTION summary_phone_data_delete() RETURNS trigger AS $$
+        BEGIN
+            DELETE FROM phone_summary s
+            USING (SELECT DISTINCT phone_number FROM old_rows) o
+            WHERE s.phone_number = o.phone_number
+              AND NOT EXISTS (SELECT 1 FROM phone_data p WHERE p.phone_number = o.phone_number);
+            UPDATE phone_summary s
+            SET entry_count = agg.entry_count, first_added = agg.first_added, last_added = agg.last_added
+            FROM (
+                SELECT p.phone_number, COUNT(*) AS entry_count,
+                       MIN(p.created_at) AS first_added, MAX(p.created_at) AS last_added
+                FROM phone_data p
+                WHERE p.phone_number IN (SELECT phone_number FROM old_rows)
+                GROUP BY p.phone_number
+            ) agg
+            WHERE s.phone_number = agg.phone_number;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        ''',
+        '''
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'summary_phone_data_insert') THEN
+                CREATE TRIGGER summary_phone_data_insert AFTER INSERT ON phone_data
+                REFERENCING NEW TABLE AS new_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION summary_phone_data_insert();
+            END IF;
+            IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'summary_phone_data_delete') THEN
+                CREATE TRIGGER summary_phone_data_delete AFTER DELETE ON phone_data
+                REFERENCING OLD TABLE AS old_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION summary_phone_data_delete();
+            END IF;
+        END
+        $$
+        ''',
+        # CSV 가져오기 파일별 마지막 커밋 위치 (file_key: 파일 크기 + 앞/뒤 해시)
+        '''
+        CREATE TABLE IF NOT EXISTS import_checkpoints (
+            file_key VARCHAR(100) PRIMARY KEY,
+            path TEXT NOT NULL,
+            byte_offset BIGINT NOT NULL,
+            last_row BIGINT NOT NULL,
+            batch_id INTEGER NOT NULL,
+            completed INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        # SQLite 원본별 복제 위치 (sync_to_postgres.py)
+        '''
+        CREATE TABLE IF NOT EXISTS replication_state (
+            source TEXT PRIMARY KEY,
+            last_id BIGINT NOT NULL,
+            last_seq BIGINT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+    ],
+    SQLITE: [
+        # SERIAL 대신 AUTOINCREMENT
+        '''
+        CREATE TABLE IF NOT EXISTS phone_data (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            phone_number VARCHAR(15) NOT NULL,
+            content TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            content_hash BIGINT,
+            quality_flags SMALLINT
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS query_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id BIGINT,
+            username VARCHAR(100),
+            query_phone VARCHAR(15),
+            results_count INTEGER DEFAULT 0,
+            query_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS stats_counters (
+            name VARCHAR(50) PRIMARY KEY,
+            value BIGINT NOT NULL DEFAULT 0,
+            reconciled_at TIMESTAMP
+        )
+        ''',
+        '''
+        INSERT INTO stats_counters (name)
+        VALUES ('total_records'), ('unique_phones'), ('total_queries'), ('successful_queries')
+        ON CONFLICT DO NOTHING
+        ''',
+        # SQLite는 행 단위 트리거만 지원 (쓰기는 항상 직렬화되므로 정확히 유지됨)
+        '''
+        CREATE TRIGGER IF NOT EXISTS stats_phone_data_insert AFTER INSERT ON phone_data
+        BEGIN
+            UPDATE stats_counters SET value = value + 1 WHERE name = 'total_records';
+            UPDATE stats_counters SET value = value + 1 WHERE name = 'unique_phones'
+                AND NOT EXISTS (
+                    SELECT 1 FROM phone_data WHERE phone_number = NEW.phone_number AND id <> NEW.id
+                );
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS stats_phone_data_delete AFTER DELETE ON phone_data
+        BEGIN
+            UPDATE stats_counters SET value = value - 1 WHERE name = 'total_records';
+            UPDATE stats_counters SET value = value - 1 WHERE name = 'unique_phones'
+                AND NOT EXISTS (SELECT 1 FROM phone_data WHERE phone_number = OLD.phone_number);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS stats_query_logs_insert AFTER INSERT ON query_logs
+        BEGIN
+            UPDATE stats_counters SET value = value + 1 WHERE name = 'successful_queries'
+                AND NEW.results_count > 0;
+            UPDATE stats_counters SET value = value + 1 WHERE name = 'total_queries';
+        END
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS phone_summary (
+            phone_number VARCHAR(15) PRIMARY KEY,
+            entry_count INTEGER NOT NULL,
+            first_added TIMESTAMP,
+            last_added TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS summary_phone_data_insert AFTER INSERT ON phone_data
+        BEGIN
+            INSERT INTO phone_summary (phone_number, entry_count, first_added, last_added)
+            VALUES (NEW.phone_number, 1, NEW.created_at, NEW.created_at)
+            ON CONFLICT (phone_number) DO UPDATE SET
+                entry_count = entry_count + 1,
+                first_added = MIN(first_added, excluded.first_added),
+                last_added = MAX(last_added, excluded.last_added);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS summary_phone_data_delete AFTER DELETE ON phone_data
+        BEGIN
+            DELETE FROM phone_summary WHERE phone_number = OLD.phone_number
+                AND NOT EXISTS (SELECT 1 FROM phone_data WHERE phone_number = OLD.phone_number);
+            UPDATE phone_summary SET
+                entry_count = entry_count - 1,
+                first_added = (SELECT MIN(created_at) FROM phone_data WHERE phone_number = OLD.phone_number),
+                last_added = (SELECT MAX(created_at) FROM phone_data WHERE phone_number = OLD.phone_number)
+            WHERE phone_number = OLD.phone_number;
+        END
+        ''',
+        # CSV 가져오기 파일별 마지막 커밋 위치 (file_key: 파일 크기 + 앞/뒤 해시)
+        '''
+        CREATE TABLE IF NOT EXISTS import_checkpoints (
+            file_key VARCHAR(100) PRIMARY KEY,
+            path TEXT NOT NULL,
+            byte_offset BIGINT NOT NULL,
+            last_row BIGINT NOT NULL,
+            batch_id INTEGER NOT NULL,
+            completed INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+    ],
+}
+
+# SQLite → PostgreSQL 증분 복제용 변경 로그 (sync_to_postgres.py를 실행한 원본에만 생성)
+# 새 행은 id 워터마크로 찾으므로 수정/삭제만 기록하고, 복제가 반영한 구간은 sync_to_postgres.py가 지움
+# 복제하지 않는 DB에 두면 로그가 계속 쌓이므로 SCHEMA에 넣지 않습니다.
+REPLICATION_LOG_SCHEMA: List[str] = [
+    '''
+    CREATE TABLE IF NOT EXISTS replication_log (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        row_id INTEGER NOT NULL,
+        logged_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS replication_phone_data_update AFTER UPDATE ON phone_data
+    BEGIN
+        INSERT INTO replication_log (row_id) VALUES (NEW.id);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS replication_phone_data_delete AFTER DELETE ON phone_data
+    BEGIN
+        INSERT INTO replication_log (row_id) VALUES (OLD.id);
+    END
+    ''',
+]
+
+# 서비스 중에도 적용하는 인덱스 (PostgreSQL은 트랜잭션 밖에서 CONCURRENTLY로 실행)
+# 조회 순서 그대로 (phone_number, created_at DESC) 정렬된 인덱스로 기존 idx_phone(phone_number)을 대체합니다.
+# content는 길이 제한이 없어 인덱스에 넣지 않습니다 (B-tree 항목 약 2.7KB 제한에 걸려 긴 행을 저장할 수 없게 됨).
+# 기존 인덱스 삭제는 새 인덱스가 모두 만들어진 뒤 마지막에 실행합니다.
+ONLINE_INDEXES: Dict[str, List[str]] = {
+    POSTGRES: [
+        '''
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_phone_created
+        ON phone_data (phone_number, created_at DESC) INCLUDE (id)
+        ''',
+        # 중복 제거용 (content_hash가 NULL인 행끼리는 충돌하지 않음)
+        '''
+        CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS idx_phone_content_hash
+        ON phone_data (phone_number, content_hash)
+        ''',
+        # 품질 분류별 조회 (정리 내보내기는 quality_flags = 0 구간을 번호 순으로 읽음)
+        '''
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_phone_quality
+        ON phone_data (quality_flags, phone_number, created_at)
+        ''',
+        'DROP INDEX CONCURRENTLY IF EXISTS idx_phone',
+    ],
+    SQLITE: [
+        # SQLite 인덱스에는 rowid(id)가 항상 포함됨
+        '''
+        CREATE INDEX IF NOT EXISTS idx_phone_created
+        ON phone_data (phone_number, created_at DESC)
+        ''',
+        '''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_phone_content_hash
+        ON phone_data (phone_number, content_hash)
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_phone_quality
+        ON phone_data (quality_flags, phone_number, created_at)
+        ''',
+        'DROP INDEX IF EXISTS idx_phone',
+    ],
+}
+
+# phone_summary 삭제 트리거를 건수 차감 방식으로 교체 (PostgreSQL)
+# 남은 행으로 다시 세면 같은 번호에 동시에 추가된 행이 스냅샷에 안 보여 그 건수를 덮어쓰므로,
+# 추가 트리거처럼 요약 행을 잠그고 지운 건수만큼 빼며 0이 되면 삭제합니다.
+# 최초/최근 등록일은 지운 행이 그 값이었을 때만 남은 행에서 다시 찾습니다.
+SUMMARY_DELETE_DELTA: Dict[str, List[str]] = {
+    POSTGRES: [
+        '''
+        CREATE OR REPLACE FUNCTION summary_phone_data_delete() RETURNS trigger AS $$
+        BEGIN
+            UPDATE phone_summary s
+            SET entry_count = s.entry_count - o.deleted,
+                first_added = CASE WHEN o.first_deleted <= s.first_added THEN (
+                    SELECT MIN(p.created_at) FROM phone_data p WHERE p.phone_number = s.phone_number
+                ) ELSE s.first_added END,
+                last_added = CASE WHEN o.last_deleted >= s.last_added THEN (
+                    SELECT MAX(p.created_at) FROM phone_data p WHERE p.phone_number = s.phone_number
+                ) ELSE s.last_added END
+            FROM (
+                SELECT phone_number, COUNT(*) AS deleted,
+                       MIN(created_at) AS first_deleted, MAX(created_at) AS last_deleted
+                FROM old_rows
+                GROUP BY phone_number
+                ORDER BY phone_number
+            ) o
+            WHERE s.phone_number = o.phone_number;
+            DELETE FROM phone_summary s
+            USING (SELECT DISTINCT phone_number FROM old_rows) o
+            WHERE s.phone_number = o.phone_number AND s.entry_count <= 0;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        ''',
+    ],
+}
+
+# 기존 SQLite 테이블에 나중에 추가된 컬럼 (ADD COLUMN IF NOT EXISTS가 없어 확인 후 추가)
+SQLITE_ADDED_COLUMNS: Dict[str, List[Tuple[str, str]]] = {
+    'phone_data': [('content_hash', 'BIGINT'), ('quality_flags', 'SMALLINT')],
+}
+
+# 통계 카운터 이름과 채우기/보정 시 사용하는 집계 쿼리 (쿼리 이름, 결과 컬럼)
+STATS_COUNTERS: Dict[str, Tuple[str, str]] = {
+    'total_records': ('count_records', 'total'),
+    'unique_phones': ('count_unique_phones', 'unique_count'),
+    'total_queries': ('count_queries', 'total'),
+    'successful_queries': ('count_successful_queries', 'found'),
+}
+
+def build_stats(counters: Dict[str, int]) -> Dict:
+    """카운터 값으로 통계 응답 구성 (동기/비동기 공용)"""
+    total_queries = counters.get('total_queries', 0)
+    successful_queries = counters.get('successful_queries', 0)
+    return {
+        'total_records': counters.get('total_records', 0),
+        'unique_phones': counters.get('unique_phones', 0),
+        'total_queries': total_queries,
+        'successful_queries': successful_queries,
+        'success_rate': round((successful_queries / total_queries * 100) if total_queries > 0 else 0, 2)
+    }
+
+# 여러 행을 한 번에 넣는 테이블의 컬럼 순서 (multi_insert 참고)
+INSERT_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    'query_logs': ('user_id', 'username', 'query_phone', 'results_count'),
+}
+
+def _compile(sql: str, dialect: str) -> str:
+    """플레이스홀더를 엔진 형식으로 변환"""
+    sql = ' '.join(sql.split())
+    if dialect == SQLITE:
+        return sql.replace('%s', '?')
+    return sql
+
+def _build(dialect: str) -> Dict[str, str]:
+    queries = dict(_QUERIES)
+    queries.update(_OVERRIDES[dialect])
+    return {name: _compile(sql, dialect) for name, sql in queries.items()}
+
+# 엔진별로 미리 변환된 쿼리 (런타임에는 조회만 함)
+QUERIES: Dict[str, Dict[str, str]] = {dialect: _build(dialect) for dialect in DIALECTS}
+
+@lru_cache(maxsize=256)
+def multi_insert(table: str, row_count: int, dialect: str) -> str:
+    """INSERT ... VALUES (...), (...) 문장 생성 (행 수별로 한 번만 만듦)"""
+    columns = INSERT_COLUMNS[table]
+    row = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES " + ', '.join([row] * row_count)
+    return _compile(sql, dialect)
@@ -0,0 +1,135 @@
+"""
+조회 기록(query_logs) 쓰기 버퍼
+조회 응답과 분리해 모아 두었다가 여러 행 INSERT 한 번으로 저장
+"""
+
+import os
+import time
+import atexit
+import logging
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 쓰기 버퍼 설정
+QUERY_LOG_BATCH_SIZE = int(os.getenv('QUERY_LOG_BATCH_SIZE', 200))  # 한 번에 저장할 최대 행 수
+QUERY_LOG_FLUSH_INTERVAL = float(os.getenv('QUERY_LOG_FLUSH_INTERVAL', 2))  # 최대 저장 지연(초)
+QUERY_LOG_BUFFER_MAX = int(os.getenv('QUERY_LOG_BUFFER_MAX', 50000))  # DB 장애 시 보관할 최대 행 수
+QUERY_LOG_RETRY_MAX = float(os.getenv('QUERY_LOG_RETRY_MAX', 60))  # 저장 실패 시 최대 재시도 간격(초)
+
+class QueryLogWriter:
+    """백그라운드 스레드에서 배치 저장하는 조회 기록 버퍼"""
+    
+    def __init__(self, write: Callable[[List[Tuple]], None], batch_size: int,
+                 flush_interval: float, max_buffered: int):
+        self._write = write
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self._buffer = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.failures = 0
+    
+    def add(self, row: Tuple):
+        """기록 한 건 추가 (DB 접근 없음)"""
+        with self._lock:
+            if len(self._buffer) >= self.max_buffered:
+                # 버퍼가 가득 차면 가장 오래된 기록부터 버림
+                self._buffer.popleft()
+                self.dropped += 1
+            self._buffer.append(row)
+            pending = len(self._buffer)
+        
+        self._ensure_started()
+        if pending >= self.batch_size:
+            self._wakeup.set()
+    
+    def _ensure_started(self):
+        if self._thread is not None or self._stopping.is_set():
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='teledb-query-log', daemon=True)
+                self._thread.start()
+    
+    def _take_batch(self) -> List[Tuple]:
+        with self._lock:
+            count = min(self.batch_size, len(self._buffer))
+            return [self._buffer.popleft() for _ in range(count)]
+    
+    def _requeue(self, batch: List[Tuple]):
+        """저장 실패한 배치를 앞쪽에 되돌림 (보관 한도를 넘는 만큼은 오래된 것부터 버림)"""
+        with self._lock:
+            self._buffer.extendleft(reversed(batch))
+            while len(self._buffer) > self.max_buffered:
+                self._buffer.popleft()
+                self.dropped += 1
+    
+    def flush(self) -> bool:
+        """버퍼를 비울 때까지 배치 저장 (실패 시 False)"""
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return True
+            try:
+                self._write(batch)
+            except Exception as e:
+                self._requeue(batch)
+                self.failures += 1
+                logger.error(f"조회 로그 일괄 저장 오류 ({len(batch)}건 보류): {e}")
+                return False
+            self.written += len(batch)
+            self.batches += 1
+    
+    def _run(self):
+        retry_delay = self.flush_interval
+        while not self._stopping.is_set():
+            self._wakeup.wait(retry_delay)
+            self._wakeup.clear()
+            if self.flush():
+                retry_delay = self.flush_interval
+            else:
+                # DB 장애 중에는 재시도 간격을 점점 늘림
+                retry_delay = min(retry_delay * 2, QUERY_LOG_RETRY_MAX)
+    
+    def stop(self, timeout: float = 10):
+        """남은 기록을 저장하고 종료 (봇 종료 시 호출)"""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        
+        deadline = time.monotonic() + timeout
+        while self._buffer and time.monotonic() < deadline:
+            if not self.flush():
+                break
+        if self._buffer:
+            logger.warning(f"저장하지 못한 조회 로그 {len(self._buffer)}건 폐기")
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            pending = len(self._buffer)
+        return {
+            'pending': pending,
+            'max_buffered': self.max_buffered,
+            'written': self.written,
+            'batches': self.batches,
+            'avg_batch': round(self.written / self.batches, 1) if self.batches else 0,
+            'dropped': self.dropped,
+            'failures': self.failures,
+        }
+
+def create_writer(write: Callable[[List[Tuple]], None]) -> QueryLogWriter:
+    """설정값으로 버퍼 생성 (프로세스 종료 시 남은 기록 저장)"""
+    writer = QueryLogWriter(write, QUERY_LOG_BATCH_SIZE, QUERY_LOG_FLUSH_INTERVAL, QUERY_LOG_BUFFER_MAX)
+    atexit.register(writer.stop)
+    return writer
@@ -0,0 +1,180 @@
+"""
+SQLite → PostgreSQL 증분 복제 (sync_to_postgres.py)
+id 워터마크 이후의 새 행과, 트리거가 replication_log에 남긴 수정/삭제 행만 배치로 보내므로
+비용이 테이블 크기가 아니라 변경량에 비례합니다.
+원본 id는 대상의 source_id로 보관하므로 대상에서 직접 추가한 행과 id가 겹치지 않고,
+반영 위치(replication_state)는 반영 결과와 같은 트랜잭션으로 저장하므로
+중단 후 다시 실행해도 빠지거나 두 번 반영되는 행이 없습니다.
+"""
+
+import os
+import sqlite3
+import logging
+import time
+from typing import Callable, List, Tuple
+
+import psycopg
+
+from .database_postgres import DATABASE_URL
+from .quality import quality_flags
+from .migrations import migrate_sqlite, migrate_postgres
+from .queries import QUERIES, POSTGRES, SQLITE, REPLICATION_LOG_SCHEMA
+
+logger = logging.getLogger(__name__)
+
+# 한 번에 보내는 새 행 수 / 변경 로그 항목 수 (한 트랜잭션)
+SYNC_BATCH_SIZE = int(os.getenv('SYNC_BATCH_SIZE', 5000))
+# 계속 실행(--follow) 시 변경 확인 간격(초)
+SYNC_INTERVAL = float(os.getenv('SYNC_INTERVAL', 10))
+
+class SyncStats:
+    """복제 진행 상황"""
+    
+    def __init__(self, last_id: int, last_seq: int):
+        self.last_id = last_id
+        self.last_seq = last_seq
+        self.upserted = 0
+        self.deleted = 0
+        self.batches = 0
+        self.started = time.perf_counter()
+    
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+class Replicator:
+    """SQLite 파일 하나를 DATABASE_URL의 phone_data로 복제"""
+    
+    def __init__(self, source_path: str, database_url: str = DATABASE_URL):
+        # 원본 경로가 복제 위치의 키 (다른 파일은 처음부터 따로 복제)
+        self.source_key = os.path.abspath(source_path)
+        self.database_url = database_url
+        self.source = sqlite3.connect(source_path, timeout=30, isolation_level=None)
+        self.target = psycopg.connect(database_url, autocommit=True)
+    
+    def close(self):
+        self.source.close()
+        self.target.close()
+    
+    def prepare(self):
+        """양쪽 스키마를 최신 버전으로 맞추고 원본에 변경 로그 트리거 생성 (복제하는 원본에만)"""
+        migrate_sqlite(self.source)
+        self.source.execute('BEGIN IMMEDIATE')
+        try:
+            for statement in REPLICATION_LOG_SCHEMA:
+                self.source.execute(statement)
+            self.source.execute('COMMIT')
+        except Exception:
+            self.source.execute('ROLLBACK')
+            raise
+        migrate_postgres(self.database_url)
+    
+    def load_state(self) -> Tuple[int, int]:
+        """(마지막으로 보낸 id, 마지막으로 반영한 로그 seq), 처음이면 None"""
+        return self.target.execute(QUERIES[POSTGRES]['read_replication_state'], (self.source_key,)).fetchone()
+    
+    def target_is_empty(self) -> bool:
+        return self.target.execute('SELECT NOT EXISTS (SELECT 1 FROM phone_data)').fetchone()[0]
+    
+    def reset(self):
+        """대상 phone_data/phone_summary를 비우고 처음부터 다시 복제하도록 위치 삭제"""
+        with self.target.transaction():
+            self.target.execute('TRUNCATE phone_data, phone_summary')
+            # TRUNCATE는 트리거를 실행하지 않으므로 카운터도 직접 맞춤
+            for name in ('total_records', 'unique_phones'):
+                self.target.execute(QUERIES[POSTGRES]['set_stats_counter'], (0, name))
+            self.target.execute(QUERIES[POSTGRES]['clear_replication_state'], (self.source_key,))
+        logger.info("복제 대상 phone_data를 비웠습니다. 다음 동기화는 처음부터 복제합니다.")
+    
+    def read_changes(self, last_id: int, last_seq: int) -> Tuple[List[tuple], List[int], int, int]:
+        """원본의 한 시점(읽기 트랜잭션)에서 다음 배치 읽기
+        
+        (보낼 행, 삭제할 id, 새 last_id, 새 last_seq) 반환
+        """
+        queries = QUERIES[SQLITE]
+        self.source.execute('BEGIN')
+        try:
+            log_end = self.source.execute(queries['replication_log_end'], (last_seq, SYNC_BATCH_SIZE)).fetchone()[0]
+            rows = {}
+            deleted = []
+            if log_end is not None:
+                for row in self.source.execute(queries['read_changed_phone_data'], (last_seq, log_end)):
+                    rows[row[0]] = row
+                deleted = [row[0] for row in self.source.execute(queries['read_deleted_phone_ids'], (last_seq, log_end))]
+            
+            new_rows = self.source.execute(queries['scan_new_phone_data'], (last_id, SYNC_BATCH_SIZE)).fetchall()
+            for row in new_rows:
+                rows[row[0]] = row
+        finally:
+            self.source.execute('COMMIT')
+        
+        new_last_id = new_rows[-1][0] if new_rows else last_id
+        new_last_seq = log_end if log_end is not None else last_seq
+        return list(rows.values()), deleted, new_last_id, new_last_seq
+    
+    def apply(self, rows: List[tuple], deleted: List[int], last_id: int, last_seq: int):
+        """한 트랜잭션에서 삭제 → 추가/갱신 → 위치 저장"""
+        with self.target.transaction():
+            if deleted:
+                self.target.execute('DELETE FROM phone_data WHERE source_id = ANY(%s)', (deleted,))
+            
+            if rows:
+                self.target.execute('''
+                    CREATE TEMP TABLE replication_staging (
+                        source_id BIGINT,
+                        phone_number VARCHAR(15),
+                        content TEXT,
+                        created_at TIMESTAMP,
+                        content_hash BIGINT,
+                        quality_flags SMALLINT
+                    ) ON COMMIT DROP
+                ''')
+                with self.target.cursor() as cursor:
+                    with cursor.copy('COPY replication_staging FROM STDIN') as copy:
+                        for row_id, phone_number, content, created_at, hash_value, flags in rows:
+                            if flags is None:
+                                flags = quality_flags(phone_number, content)
+                            copy.write_row((row_id, phone_number, content, created_at, hash_value, flags))
+                # 원본 id는 source_id로만 보관하고 대상 id는 대상 시퀀스에서 받으므로
+                # 대상에서 직접 추가한 행(source_id NULL)과 겹치거나 덮어쓰지 않음
+                # 다른 행과 내용이 같은 행은 중복 제거 인덱스에 걸리므로 건너뜀
+                # 한 문장이므로 통계/요약 트리거도 배치당 한 번만 실행
+                self.target.execute('''
+                    INSERT INTO phone_data (source_id, phone_number, content, created_at, content_hash, quality_flags)
+                    SELECT s.source_id, s.phone_number, s.content, s.created_at, s.content_hash, s.quality_flags
+                    FROM replication_staging s
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM phone_data p
+                        WHERE p.phone_number = s.phone_number AND p.content_hash = s.content_hash
+                          AND p.source_id IS DISTINCT FROM s.source_id
+                    )
+                    ON CONFLICT (source_id) DO UPDATE SET
+                        phone_number = EXCLUDED.phone_number,
+                        content = EXCLUDED.content,
+                        created_at = EXCLUDED.created_at,
+                        content_hash = EXCLUDED.content_hash,
+                        quality_flags = EXCLUDED.quality_flags
+                ''')
+            
+            self.target.execute(QUERIES[POSTGRES]['save_replication_state'], (self.source_key, last_id, last_seq))
+    
+    def sync(self, progress: Callable[[SyncStats], None] = None) -> SyncStats:
+        """변경이 없을 때까지 배치 단위로 복제 (반영한 변경 로그는 원본에서 삭제)"""
+        last_id, last_seq = self.load_state() or (0, 0)
+        stats = SyncStats(last_id, last_seq)
+        
+        while True:
+            rows, deleted, new_last_id, new_last_seq = self.read_changes(stats.last_id, stats.last_seq)
+            if new_last_id == stats.last_id and new_last_seq == stats.last_seq:
+                return stats
+            
+            self.apply(rows, deleted, new_last_id, new_last_seq)
+            if new_last_seq > stats.last_seq:
+                self.source.execute(QUERIES[SQLITE]['prune_replication_log'], (new_last_seq,))
+            
+            stats.upserted += len(rows)
+            stats.deleted += len(deleted)
+            stats.batches += 1
+            stats.last_id, stats.last_seq = new_last_id, new_last_seq
+            if progress:
+                progress(stats)
@@ -0,0 +1,82 @@
+"""
+SQLite 연결 관리
+스레드별로 한 번만 연결하고 재사용 (WAL + PRAGMA 튜닝)
+"""
+
+import os
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 데이터베이스 파일 경로
+DATABASE_PATH = os.getenv('DATABASE_PATH', './teledb.sqlite')
+
+# PRAGMA 설정 (환경변수로 조정)
+SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+SQLITE_CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', -65536))  # 음수는 KiB 단위 (64MB)
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 268435456))  # 256MB
+SQLITE_TEMP_STORE = os.getenv('SQLITE_TEMP_STORE', 'MEMORY')
+SQLITE_BUSY_TIMEOUT = float(os.getenv('SQLITE_BUSY_TIMEOUT', 5))  # 잠금 대기(초)
+SQLITE_STATEMENT_CACHE = int(os.getenv('SQLITE_STATEMENT_CACHE', 256))  # 준비된 문장 캐시 크기
+
+_local = threading.local()
+
+def _open_connection(path: str) -> sqlite3.Connection:
+    """새 SQLite 연결을 열고 PRAGMA 적용"""
+    conn = sqlite3.connect(
+        path,
+        timeout=SQLITE_BUSY_TIMEOUT,
+        cached_statements=SQLITE_STATEMENT_CACHE,
+    )
+    conn.row_factory = sqlite3.Row  # 딕셔너리 형태로 결과 반환
+    
+    journal_mode = conn.execute(f'PRAGMA journal_mode={SQLITE_JOURNAL_MODE}').fetchone()[0]
+    conn.execute(f'PRAGMA synchronous={SQLITE_SYNCHRONOUS}')
+    conn.execute(f'PRAGMA cache_size={SQLITE_CACHE_SIZE}')
+    conn.execute(f'PRAGMA mmap_size={SQLITE_MMAP_SIZE}')
+    conn.execute(f'PRAGMA temp_store={SQLITE_TEMP_STORE}')
+    
+    logger.debug(f"SQLite 연결 생성: {path} (journal_mode={journal_mode}, 스레드 {threading.get_ident()})")
+    return conn
+
+def get_sqlite_connection(path: str = None) -> sqlite3.Connection:
+    """현재 스레드의 SQLite 연결 반환 (없으면 생성)
+    
+    연결은 스레드마다 한 번만 열리므로 close()하지 말고
+    `with conn:` 으로 트랜잭션만 관리하세요.
+    """
+    path = path or DATABASE_PATH
+    
+    connections: Dict[str, sqlite3.Connection] = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    
+    conn = connections.get(path)
+    if conn is None:
+        conn = _open_connection(path)
+        connections[path] = conn
+    return conn
+
+def add_missing_columns(conn: sqlite3.Connection, columns: Dict[str, List[Tuple[str, str]]]):
+    """테이블에 없는 컬럼만 추가 (SQLite는 ADD COLUMN IF NOT EXISTS를 지원하지 않음)"""
+    for table, table_columns in columns.items():
+        existing = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+        for name, definition in table_columns:
+            if name not in existing:
+                conn.execute(f'ALTER TABLE {table} ADD COLUMN {name} {definition}')
+                logger.info(f"SQLite 컬럼 추가: {table}.{name}")
+
+def close_connections():
+    """현재 스레드의 SQLite 연결 종료 (스레드/프로세스 종료 시 호출)"""
+    connections = getattr(_local, 'connections', None)
+    if not connections:
+        return
+    
+    for conn in connections.values():
+        conn.close()
+    connections.clear()
+    logger.debug("SQLite 연결 정리 완료")
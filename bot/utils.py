@@ -53,6 +53,16 @@ def clean_phone_number(phone_number: str) -> str:
     """전화번호에서 하이픈, 공백 등 제거"""
     return re.sub(r'[^0-9]', '', phone_number)
 
+def format_age(seconds: float) -> str:
+    """경과 시간을 표시용으로 (예: 45초, 12분, 3시간 5분)"""
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}초"
+    if seconds < 3600:
+        return f"{seconds // 60}분"
+    hours, minutes = divmod(seconds // 60, 60)
+    return f"{hours}시간 {minutes}분" if minutes else f"{hours}시간"
+
 def parse_add_data(text: str) -> Dict:
     """단순화된 추가 명령어 데이터 파싱"""
     parts = text.split(' ', 1)  # 첫 번째 공백으로만 분리
@@ -1,71 +1,74 @@
 #!/usr/bin/env python3
 """
 중복 제거하고 원본 데이터만 추출하는 스크립트
+SQLite/PostgreSQL 모두 지원하며, 커서로 조금씩 읽어 바로 씁니다 (CSV/NDJSON, gzip/xz, 표준 출력).
+품질 분류가 정상(quality_flags = 0)인 행만 내보내므로 미분류 행은 제외됩니다.
+스키마를 올릴 때(봇/스크립트 시작) 기존 행이 자동으로 분류되며, 미분류 행이 남아 있다는 경고가 나오면
+먼저 python3 maintenance.py backfill_quality 를 실행하세요.
 """
 
-import sqlite3
-import csv
 import os
+import sys
+import functools
+from dotenv import load_dotenv
 
-def clean_export():
-    """중복 제거하고 원본 데이터만 CSV로 내보내기"""
+# 현재 디렉토리를 모듈 경로에 추가
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from bot.exporter import ExportOptions, resolve_source, describe_source, fetch_value, stream_rows, write_rows
+
+def clean_export(options: ExportOptions):
+    """중복 제거하고 원본 데이터만 내보내기 (품질 분류가 정상인 행 중 번호별 가장 오래된 레코드)"""
+    
+    # 표준 출력으로 내보낼 때는 안내 메시지를 stderr로
+    log = functools.partial(print, file=sys.stderr if options.to_stdout else sys.stdout)
     
-    # 데이터베이스 연결
-    db_path = './teledb.sqlite'
-    if not os.path.exists(db_path):
-        print("❌ SQLite 데이터베이스 파일을 찾을 수 없습니다.")
+    load_dotenv()
+    try:
+        dialect, location = resolve_source(options.source)
+    except (ValueError, FileNotFoundError) as e:
+        log(f"❌ {e}")
         return
     
+    def print_progress(stats):
+        log(f"   📊 진행률: {stats.rows:,}개 ({stats.rate:,.0f}행/초)")
+    
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+        # 품질 플래그가 없는 행은 정상으로 확인되지 않았으므로 내보내지 않음
+        unclassified = fetch_value(dialect, location, 'count_unclassified')
+        if unclassified:
+            log(f"⚠️ 품질 분류가 안 된 행 {unclassified:,}개는 제외됩니다. "
+                f"먼저 실행: python3 maintenance.py backfill_quality")
         
-        # 중복 제거하고 가장 오래된 레코드만 선택
-        cursor.execute("""
-            SELECT phone_number, content, MIN(created_at) as created_at
-            FROM phone_data 
-            WHERE content NOT LIKE '%바보%' 
-            AND content NOT LIKE '%test%'
-            AND content NOT LIKE '%테스트%'
-            AND length(phone_number) = 11
-            AND phone_number LIKE '010%'
-            GROUP BY phone_number
-            ORDER BY created_at
-        """)
+        log(f"📤 {describe_source(dialect, location)} → {options.describe()}")
+        stats = write_rows(stream_rows(dialect, location, 'export_clean_phone_data'), options.path,
+                           options.format, options.compression, progress=print_progress)
         
-        rows = cursor.fetchall()
-        
-        if not rows:
-            print("📭 정리된 데이터가 없습니다.")
+        if not stats.rows:
+            log("📭 정리된 데이터가 없습니다.")
             return
         
-        # CSV로 내보내기
-        csv_filename = 'teledb_clean_export.csv'
-        with open(csv_filename, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.writer(csvfile)
-            
-            # 헤더 쓰기
-            writer.writerow(['phone_number', 'content', 'created_at'])
-            
-            # 데이터 쓰기
-            for row in rows:
-                writer.writerow(row)
-        
-        print(f"✅ 중복 제거 완료: {len(rows)}개 고유 레코드를 {csv_filename}으로 내보냈습니다.")
+        log(f"✅ 중복 제거 완료: {stats.rows:,}개 고유 레코드를 {options.describe()}으로 내보냈습니다. "
+            f"({stats.elapsed:.1f}초)")
         
         # 샘플 데이터 표시
-        print("\n📊 정리된 샘플 데이터:")
-        for i, row in enumerate(rows[:5]):
-            phone, content, created = row
-            print(f"   {i+1}. {phone} - {content[:60]}...")
-            
-        if len(rows) > 5:
-            print(f"   ... 외 {len(rows)-5}개")
-        
-        conn.close()
+        log("\n📊 정리된 샘플 데이터:")
+        for i, (phone, content, created) in enumerate(stats.samples):
+            log(f"   {i+1}. {phone} - {content[:60]}...")
         
+        if stats.rows > len(stats.samples):
+            log(f"   ... 외 {stats.rows - len(stats.samples)}개")
+    
     except Exception as e:
-        print(f"❌ 오류 발생: {e}")
+        log(f"❌ 오류 발생: {e}")
 
 if __name__ == "__main__":
-    clean_export()
\ No newline at end of file
+    # 사용법: python3 clean_export.py [출력경로|-] [--format=csv|ndjson] [--compress=gzip|xz]
+    #                                 [--source=teledb.sqlite|postgres|postgresql://...]
+    # 품질 분류가 정상인 행만 내보냄 (미분류 행이 있으면 먼저: python3 maintenance.py backfill_quality)
+    try:
+        export_options = ExportOptions(sys.argv[1:], 'teledb_clean_export.csv')
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    clean_export(export_options)
@@ -1,65 +1,67 @@
 #!/usr/bin/env python3
 """
-SQLite 데이터를 CSV로 내보내는 스크립트
+SQLite/PostgreSQL 데이터를 CSV/NDJSON으로 내보내는 스크립트
+커서로 조금씩 읽어 바로 쓰므로 DB 크기와 관계없이 메모리 사용량이 일정합니다.
+gzip/xz 압축과 표준 출력(-)을 지원하므로 백업/다른 호스트로의 전송에 그대로 쓸 수 있습니다.
 """
 
-import sqlite3
-import csv
 import os
+import sys
+import functools
+from dotenv import load_dotenv
 
-def export_phone_data():
-    """전화번호 데이터를 CSV로 내보내기"""
+# 현재 디렉토리를 모듈 경로에 추가
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from bot.exporter import ExportOptions, resolve_source, describe_source, stream_rows, write_rows
+
+def export_phone_data(options: ExportOptions):
+    """전화번호 데이터를 파일로 내보내기"""
+    
+    # 표준 출력으로 내보낼 때는 안내 메시지를 stderr로
+    log = functools.partial(print, file=sys.stderr if options.to_stdout else sys.stdout)
     
-    # 데이터베이스 연결
-    db_path = './teledb.sqlite'
-    if not os.path.exists(db_path):
-        print("❌ SQLite 데이터베이스 파일을 찾을 수 없습니다.")
+    load_dotenv()
+    try:
+        dialect, location = resolve_source(options.source)
+    except (ValueError, FileNotFoundError) as e:
+        log(f"❌ {e}")
         return
     
+    def print_progress(stats):
+        log(f"   📊 진행률: {stats.rows:,}개 ({stats.rate:,.0f}행/초)")
+    
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # 데이터 조회
-        cursor.execute("""
-            SELECT phone_number, content, created_at 
-            FROM phone_data 
-            ORDER BY created_at
-        """)
+        log(f"📤 {describe_source(dialect, location)} → {options.describe()}")
+        stats = write_rows(stream_rows(dialect, location, 'export_phone_data'), options.path,
+                           options.format, options.compression, progress=print_progress)
         
-        rows = cursor.fetchall()
-        
-        if not rows:
-            print("📭 데이터베이스에 데이터가 없습니다.")
+        if not stats.rows:
+            log("📭 데이터베이스에 데이터가 없습니다.")
             return
         
-        # CSV로 내보내기
-        csv_filename = 'teledb_export.csv'
-        with open(csv_filename, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.writer(csvfile)
-            
-            # 헤더 쓰기
-            writer.writerow(['phone_number', 'content', 'created_at'])
-            
-            # 데이터 쓰기
-            for row in rows:
-                writer.writerow(row)
-        
-        print(f"✅ {len(rows)}개 레코드를 {csv_filename}으로 내보냈습니다.")
+        log(f"✅ {stats.rows:,}개 레코드를 {options.describe()}으로 내보냈습니다. "
+            f"({stats.elapsed:.1f}초, {stats.rate:,.0f}행/초)")
         
         # 샘플 데이터 표시
-        print("\n📊 샘플 데이터:")
-        for i, row in enumerate(rows[:5]):
-            phone, content, created = row
-            print(f"   {i+1}. {phone} - {content[:50]}...")
-            
-        if len(rows) > 5:
-            print(f"   ... 외 {len(rows)-5}개")
-        
-        conn.close()
+        log("\n📊 샘플 데이터:")
+        for i, (phone, content, created) in enumerate(stats.samples):
+            log(f"   {i+1}. {phone} - {content[:50]}...")
         
+        if stats.rows > len(stats.samples):
+            log(f"   ... 외 {stats.rows - len(stats.samples)}개")
+    
     except Exception as e:
-        print(f"❌ 오류 발생: {e}")
+        log(f"❌ 오류 발생: {e}")
 
 if __name__ == "__main__":
-    export_phone_data()
\ No newline at end of file
+    # 사용법: python3 export_data.py [출력경로|-] [--format=csv|ndjson] [--compress=gzip|xz]
+    #                                [--source=teledb.sqlite|postgres|postgresql://...]
+    # 예시:   python3 export_data.py backup.ndjson.xz
+    #         python3 export_data.py - --compress=gzip | ssh other-host 'cat > teledb.csv.gz'
+    try:
+        export_options = ExportOptions(sys.argv[1:], 'teledb_export.csv')
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    export_phone_data(export_options)
@@ -12,11 +12,16 @@ from dotenv import load_dotenv
 # 현재 디렉토리를 모듈 경로에 추가
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from bot.database import init_database, add_phone_data
-from bot.utils import clean_phone_number, validate_phone_number
+from bot.database import init_database, get_connection
+from bot.dedup import DEDUP_ENABLED
+from bot.formats import NDJSON
+from bot.importer import CsvLayout, ImportCheckpoint, import_file, import_file_parallel, IMPORT_BATCH_SIZE
 
-def import_csv_to_database(csv_file_path, encoding='utf-8'):
-    """CSV 파일을 단순화된 데이터베이스로 가져오기"""
+def print_progress(stats):
+    print(f"   📊 진행률: {stats.rows:,}행 처리, {stats.inserted:,}개 저장 ({stats.rate:,.0f}행/초)")
+
+def import_csv_to_database(csv_file_path, encoding='utf-8', workers=1, restart=False):
+    """CSV 파일을 단순화된 데이터베이스로 가져오기 (스트리밍, 배치 트랜잭션, 중단 시 이어서 가져오기)"""
     
     if not os.path.exists(csv_file_path):
         print(f"❌ CSV 파일을 찾을 수 없습니다: {csv_file_path}")
@@ -28,139 +33,69 @@ def import_csv_to_database(csv_file_path, encoding='utf-8'):
     
     print(f"📁 CSV 파일 가져오기: {csv_file_path}")
     
-    success_count = 0
-    error_count = 0
-    skip_count = 0
-    
     try:
-        with open(csv_file_path, 'r', encoding=encoding, newline='') as csvfile:
-            # CSV 파일의 첫 번째 줄을 읽어서 구분자 감지
-            sample = csvfile.read(1024)
-            csvfile.seek(0)
-            
-            # 구분자 자동 감지
-            sniffer = csv.Sniffer()
-            delimiter = sniffer.sniff(sample).delimiter
-            print(f"📋 감지된 구분자: '{delimiter}'")
-            
-            reader = csv.DictReader(csvfile, delimiter=delimiter)
-            
-            # 헤더 정보 출력
-            headers = reader.fieldnames
-            print(f"📊 헤더 정보: {headers}")
-            
-            # 헤더 매핑 (한글/영어 모두 지원)
-            field_mapping = detect_field_mapping(headers)
-            print(f"🔗 필드 매핑: {field_mapping}")
-            
-            if not field_mapping.get('phone_number'):
-                print("❌ 전화번호 필드를 찾을 수 없습니다.")
-                print("   지원하는 헤더명: phone, phone_number, 전화번호, 휴대폰, 연락처")
+        layout = CsvLayout(csv_file_path, encoding)
+        if layout.format == NDJSON or layout.compressed:
+            print(f"📦 파일 형식: {layout.format}{' (압축)' if layout.compressed else ''}")
+        if layout.is_export:
+            print("💾 내보낸 파일 형식: content/created_at을 그대로 가져옵니다.")
+        if layout.delimiter:
+            print(f"📋 감지된 구분자: '{layout.delimiter}'")
+        print(f"📊 헤더 정보: {layout.headers}")
+        print(f"🔗 필드 매핑: {layout.mapping}")
+        
+        if not layout.mapping.get('phone_number'):
+            print("❌ 전화번호 필드를 찾을 수 없습니다.")
+            print("   지원하는 헤더명: phone, phone_number, 전화번호, 휴대폰, 연락처")
+            return
+        
+        # 같은 파일을 이전에 가져오다 중단했다면 마지막으로 커밋된 배치 다음부터
+        conn = get_connection()
+        checkpoint = ImportCheckpoint(layout)
+        if checkpoint.load(conn):
+            if restart:
+                checkpoint.clear(conn)
+                print("🔁 이전 가져오기 기록을 지우고 처음부터 가져옵니다"
+                      + ("" if DEDUP_ENABLED else " (이미 저장된 행은 중복됩니다)"))
+            elif checkpoint.completed:
+                print(f"✅ 이미 끝까지 가져온 파일입니다 ({checkpoint.last_row:,}행).")
+                print("   다시 가져오려면 --restart 옵션을 사용하세요.")
                 return
-            
-            # 데이터 가져오기
-            for row_num, row in enumerate(reader, 1):
-                try:
-                    # 전화번호 추출 및 정리
-                    phone_raw = row.get(field_mapping['phone_number'], '').strip()
-                    if not phone_raw:
-                        skip_count += 1
-                        continue
-                    
-                    phone_number = clean_phone_number(phone_raw)
-                    
-                    # 전화번호 유효성 검사
-                    if not validate_phone_number(phone_number):
-                        print(f"   ⚠️ 줄 {row_num}: 잘못된 전화번호 형식 '{phone_raw}' 건너뛰기")
-                        skip_count += 1
-                        continue
-                    
-                    # 모든 필드를 하나의 content로 합치기
-                    content_parts = []
-                    
-                    # 순서대로 필드 처리
-                    for field_name in ['name', 'company', 'address', 'email', 'notes']:
-                        if field_mapping.get(field_name):
-                            value = row.get(field_mapping[field_name], '').strip()
-                            if value:
-                                field_korean = {
-                                    'name': '이름',
-                                    'company': '회사', 
-                                    'address': '주소',
-                                    'email': '이메일',
-                                    'notes': '메모'
-                                }[field_name]
-                                content_parts.append(f"{field_korean}: {value}")
-                    
-                    # 만약 매핑되지 않은 필드들이 있다면 추가
-                    for header in headers:
-                        if header not in field_mapping.values():
-                            value = row.get(header, '').strip()
-                            if value and header != field_mapping.get('phone_number'):
-                                content_parts.append(f"{header}: {value}")
-                    
-                    content = " | ".join(content_parts) if content_parts else "정보 없음"
-                    
-                    # 데이터베이스에 추가 (중복 허용)
-                    result = add_phone_data(phone_number, content)
-                    
-                    if result:
-                        success_count += 1
-                        if success_count % 100 == 0:
-                            print(f"   📊 진행률: {success_count}개 완료...")
-                    else:
-                        print(f"   ❌ 줄 {row_num}: {phone_number} 추가 실패")
-                        error_count += 1
-                        
-                except Exception as e:
-                    print(f"   ❌ 줄 {row_num}: 오류 발생 - {e}")
-                    error_count += 1
-                    
+            else:
+                print(f"⏩ 중단된 지점부터 이어서 가져옵니다: {checkpoint.last_row:,}행 이후 "
+                      f"(배치 {checkpoint.batch_id}, {checkpoint.offset:,}바이트)")
+        
+        if workers > 1 and layout.compressed:
+            print("ℹ️ 압축 파일은 구간별로 나눠 읽을 수 없어 단일 프로세스로 가져옵니다.")
+            workers = 1
+        
+        if workers > 1:
+            # 파싱/정규화는 여러 프로세스, 저장은 이 프로세스에서 파일 순서대로
+            print(f"🚀 {workers}개 프로세스로 파싱, {IMPORT_BATCH_SIZE:,}행 단위 배치로 가져오는 중...")
+            stats = import_file_parallel(conn, layout, workers, progress=print_progress, checkpoint=checkpoint)
+        else:
+            print(f"🚀 {IMPORT_BATCH_SIZE:,}행 단위 배치로 가져오는 중...")
+            stats = import_file(conn, layout, progress=print_progress, checkpoint=checkpoint)
     except UnicodeDecodeError:
         print(f"❌ 인코딩 오류. 다른 인코딩을 시도해보세요:")
         print(f"   python3 import_csv.py {csv_file_path} cp949")
         return
     except Exception as e:
-        print(f"❌ CSV 파일 읽기 오류: {e}")
+        print(f"❌ CSV 가져오기 오류 (마지막 배치는 저장되지 않음): {e}")
+        print("   같은 명령을 다시 실행하면 마지막으로 저장된 배치 다음부터 이어서 가져옵니다.")
         return
     
-    # 결과 요약
-    print(f"\n📈 가져오기 완료!")
-    print(f"   ✅ 성공: {success_count}개")
-    print(f"   ⚠️ 건너뛴 항목: {skip_count}개")
-    print(f"   ❌ 오류: {error_count}개")
-    print(f"   📊 총 처리: {success_count + skip_count + error_count}개")
-
-def detect_field_mapping(headers):
-    """헤더에서 필드 매핑 자동 감지"""
-    mapping = {}
-    
-    # 가능한 헤더명들 (소문자로 변환해서 비교)
-    field_patterns = {
-        'phone_number': ['phone', 'phone_number', 'phonenumber', 'mobile', 'tel', 
-                        '전화번호', '휴대폰', '연락처', '핸드폰', '휴대전화'],
-        'name': ['name', 'full_name', 'fullname', 'user_name', 'username',
-                '이름', '성명', '고객명', '사용자명'],
-        'company': ['company', 'corp', 'corporation', 'organization', 'org',
-                   '회사', '회사명', '직장', '기업', '업체'],
-        'address': ['address', 'addr', 'location', 'place',
-                   '주소', '거주지', '위치', '소재지'],
-        'email': ['email', 'e_mail', 'mail', 'email_address',
-                 '이메일', '메일', '전자우편'],
-        'notes': ['notes', 'note', 'memo', 'comment', 'description', 'desc',
-                 '메모', '비고', '설명', '참고', '노트']
-    }
-    
-    # 각 헤더에 대해 매칭 시도
-    for header in headers:
-        header_lower = header.lower().strip()
-        
-        for field, patterns in field_patterns.items():
-            if header_lower in [p.lower() for p in patterns]:
-                mapping[field] = header
-                break
+    for example in stats.examples:
+        print(f"   ⚠️ {example}")
     
-    return mapping
+    # 결과 요약
+    print(f"\n📈 가져오기 완료! ({stats.elapsed:.1f}초, {stats.rate:,.0f}행/초)")
+    print(f"   ✅ 성공: {stats.inserted}개")
+    print(f"   ⚠️ 건너뛴 항목: {stats.skipped}개")
+    if stats.duplicates:
+        print(f"   🔁 중복 건너뜀: {stats.duplicates}개")
+    print(f"   ❌ 오류: {stats.errors}개")
+    print(f"   📊 총 처리: {stats.rows}개")
 
 def create_sample_csv():
     """단순화된 샘플 CSV 파일 생성"""
@@ -189,12 +124,17 @@ def show_help():
 📁 단순화된 CSV 가져오기 도구 (중복 허용)
 
 사용법:
-  python3 import_csv.py <CSV파일경로> [인코딩]
+  python3 import_csv.py <CSV파일경로> [인코딩] [--workers=N] [--restart]
 
 예시:
   python3 import_csv.py contacts.csv
   python3 import_csv.py contacts.csv utf-8
   python3 import_csv.py contacts.csv cp949
+  python3 import_csv.py contacts.csv cp949 --workers=4   # 큰 파일은 여러 코어로 파싱
+  python3 import_csv.py contacts.csv --restart           # 이전 기록을 무시하고 처음부터
+  python3 import_csv.py teledb_export.ndjson.xz          # export_data.py 백업 (NDJSON, gzip/xz) 복원
+
+중단된 가져오기는 같은 명령을 다시 실행하면 마지막으로 저장된 배치 다음부터 이어집니다.
 
 새로운 특징:
   🔄 중복 허용: 같은 전화번호에 여러 정보 추가 가능
@@ -229,6 +169,9 @@ if __name__ == '__main__':
         print(f"\n샘플 CSV를 가져오려면:")
         print(f"python3 import_csv.py {sample_path}")
     else:
-        csv_file = sys.argv[1]
-        encoding = sys.argv[2] if len(sys.argv) > 2 else 'utf-8'
-        import_csv_to_database(csv_file, encoding)
\ No newline at end of file
+        args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+        options = dict(arg[2:].split('=', 1) for arg in sys.argv[1:] if arg.startswith('--') and '=' in arg)
+        csv_file = args[0]
+        encoding = args[1] if len(args) > 1 else 'utf-8'
+        workers = int(options.get('workers', 1))
+        import_csv_to_database(csv_file, encoding, workers, restart='--restart' in sys.argv)
\ No newline at end of file
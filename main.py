@@ -10,7 +10,8 @@ from dotenv import load_dotenv
 from telegram.ext import Application
 
 from bot.handlers import setup_handlers
-from bot.database_postgres import init_database
+from bot.database_postgres import init_database, close_pool, start_background_jobs, stop_background_jobs
+from bot.database_async import close_async_pool
 
 # 환경변수 로드
 load_dotenv()
@@ -50,6 +51,9 @@ async def main():
         logger.error(f"데이터베이스 초기화 실패: {e}")
         # 계속 진행 - 폴백으로 작동
     
+    # Bloom 필터 구성, 통계 보정 등 백그라운드 작업 시작
+    start_background_jobs()
+    
     # 텔레그램 애플리케이션 생성
     application = Application.builder().token(bot_token).build()
     
@@ -110,6 +114,9 @@ async def main():
     finally:
         await application.stop()
         await application.shutdown()
+        stop_background_jobs()
+        await close_async_pool()
+        close_pool()
 
 if __name__ == '__main__':
     import asyncio
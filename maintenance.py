@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+TeleDB 유지보수 스크립트
+봇과 같은 DB 설정(DATABASE_URL, 없으면 SQLite)으로 보정/재구성 작업을 실행합니다.
+"""
+
+import os
+import sys
+from dotenv import load_dotenv
+
+# 현재 디렉토리를 모듈 경로에 추가
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+load_dotenv()
+
+from bot.database_postgres import (
+    init_database, reconcile_stats, rebuild_phone_summary, backfill_content_hashes, backfill_quality_flags,
+    get_quality_counts, get_stats, close_pool,
+)
+from bot.quality import describe_flags
+
+def run_reconcile_stats():
+    """통계 카운터를 실제 집계값으로 보정"""
+    print("📊 통계 카운터 보정 중... (완료까지 쓰기가 잠시 대기합니다)")
+    drift = reconcile_stats()
+    for name, diff in drift.items():
+        print(f"  {name}: {diff:+,}")
+    stats = get_stats()
+    print(f"✅ 보정 완료: 데이터 {stats['total_records']:,}개, 번호 {stats['unique_phones']:,}개, "
+          f"조회 {stats['total_queries']:,}회")
+
+def run_rebuild_summary():
+    """phone_summary(번호별 건수/등록일) 전체 재구성"""
+    print("📋 phone_summary 재구성 중... (완료까지 쓰기가 잠시 대기합니다)")
+    count = rebuild_phone_summary()
+    print(f"✅ 재구성 완료: {count:,}개 번호")
+
+def run_backfill_hashes():
+    """content_hash가 없는 기존 행에 중복 제거용 해시 채우기"""
+    print("🔑 content_hash 채우는 중... (중단 후 다시 실행하면 남은 행만 처리)")
+    
+    def report(hashed, duplicates):
+        print(f"   📊 {hashed:,}개 처리, 기존 중복 {duplicates:,}개")
+    
+    result = backfill_content_hashes(progress=report)
+    print(f"✅ 완료: {result['hashed']:,}개 해시 저장")
+    if result['duplicates']:
+        print(f"   ⚠️ 이미 같은 내용이 있는 기존 중복 {result['duplicates']:,}개는 해시 없이 남겨 둠 "
+              f"(정리: clean_export.py)")
+
+def run_backfill_quality():
+    """미분류 행의 품질 플래그 계산 (--all: 규칙 변경 후 전체 재계산)"""
+    rescan = '--all' in sys.argv
+    print(f"🏷️ 품질 분류 중... ({'전체 재계산' if rescan else '미분류 행만'})")
+    
+    def report(scanned, updated):
+        print(f"   📊 {scanned:,}개 확인, {updated:,}개 갱신")
+    
+    result = backfill_quality_flags(rescan=rescan, progress=report)
+    print(f"✅ 완료: {result['scanned']:,}개 확인, {result['updated']:,}개 갱신")
+    run_quality_report()
+
+def run_quality_report():
+    """품질 유형별 행 수 (인덱스만 읽음)"""
+    print("📋 품질 분류 현황:")
+    for flags, total in get_quality_counts().items():
+        print(f"   {describe_flags(flags)}: {total:,}개")
+
+def show_help():
+    """도움말 출력"""
+    print("""
+🛠️ TeleDB 유지보수 스크립트
+
+사용법:
+  python3 maintenance.py reconcile_stats   # /stats 카운터를 실제 집계값으로 보정
+  python3 maintenance.py rebuild_summary   # 번호별 요약(phone_summary) 재구성
+  python3 maintenance.py backfill_hashes   # 기존 행에 중복 제거용 content_hash 채우기
+  python3 maintenance.py backfill_quality  # 미분류 행의 품질 플래그 계산 (--all: 규칙 변경 후 전체 재계산)
+  python3 maintenance.py quality_report    # 품질 유형별 행 수
+""")
+
+COMMANDS = {
+    'reconcile_stats': run_reconcile_stats,
+    'rebuild_summary': run_rebuild_summary,
+    'backfill_hashes': run_backfill_hashes,
+    'backfill_quality': run_backfill_quality,
+    'quality_report': run_quality_report,
+}
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] == 'help':
+        show_help()
+    elif sys.argv[1] in COMMANDS:
+        init_database()
+        try:
+            COMMANDS[sys.argv[1]]()
+        finally:
+            close_pool()
+    else:
+        print(f"❌ 알 수 없는 명령어: {sys.argv[1]}")
+        print(f"사용 가능한 명령어: {', '.join(COMMANDS)}, help")
@@ -1,135 +1,282 @@
 #!/usr/bin/env python3
 """
 데이터베이스 마이그레이션 스크립트
-기존 복잡한 구조를 단순한 phone_number + content 구조로 변경
+기존 구조(이름/회사/주소/이메일/메모 또는 이전 버전 phone_data)를 현재 phone_number + content 구조로 변경
+
+기존 DB를 배치 단위로 스트리밍해 옆의 임시 파일에 새로 만들므로 메모리 사용량은 DB 크기와 관계없습니다.
+인덱스/트리거는 적재 후 만들고, 행 수를 확인한 뒤 파일을 원자적으로 교체합니다.
+
+오프라인 전용: 봇과 다른 스크립트를 모두 중지한 뒤 실행하세요.
+실행 중인 봇은 교체 후에도 이전 파일(백업)에 계속 쓰므로 그 쓰기는 사라집니다.
+시작할 때 기존 DB에 배타 잠금을 걸어 교체가 끝날 때까지 유지하며, 다른 연결이 열려 있으면 중단합니다.
+(WAL 모드에서는 유휴 연결도 잠금을 잡으므로 실행 중인 봇을 감지하지만, SQLITE_JOURNAL_MODE를
+WAL이 아닌 값으로 바꾼 경우에는 유휴 연결을 감지할 수 없습니다.)
 """
 
 import sqlite3
 import os
 import sys
+import time
 from datetime import datetime
+from dotenv import load_dotenv
+
+# 현재 디렉토리를 모듈 경로에 추가
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+load_dotenv()
+
+from bot.database import fill_derived_tables
+from bot.dedup import DEDUP_ENABLED, row_hash
+from bot.migrations import migrate_sqlite
+from bot.quality import quality_flags
+from bot.queries import SCHEMA, SQLITE, REPLICATION_LOG_SCHEMA
+
+# 한 트랜잭션으로 옮기는 행 수
+MIGRATE_BATCH_SIZE = int(os.getenv('MIGRATE_BATCH_SIZE', 10000))
+# 기존 DB 배타 잠금 대기(초) - 잠깐 쓰는 스크립트는 기다리고, 계속 열려 있는 봇 연결이면 중단
+MIGRATE_LOCK_TIMEOUT = float(os.getenv('MIGRATE_LOCK_TIMEOUT', 5))
 
-def backup_existing_data(old_db_path):
-    """기존 데이터 백업"""
-    backup_data = []
+# 이전 버전의 개별 필드 (content 하나로 합침)
+LEGACY_FIELDS = [('name', '이름'), ('company', '회사'), ('address', '주소'), ('email', '이메일'), ('notes', '메모')]
+QUERY_LOG_COLUMNS = ['id', 'user_id', 'username', 'query_phone', 'results_count', 'query_time']
+
+class MigrationError(Exception):
+    """검증 실패 등으로 교체하지 않고 중단"""
+
+def table_columns(conn, table):
+    return [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+
+def build_content(row, columns):
+    """기존 여러 필드를 content 하나로 합치기 (이미 content가 있으면 그대로)"""
+    if 'content' in columns:
+        return row['content']
     
-    if not os.path.exists(old_db_path):
-        print("기존 데이터베이스 파일이 없습니다.")
-        return backup_data
+    content_parts = [f"{label}: {row[field]}" for field, label in LEGACY_FIELDS
+                     if field in columns and row[field]]
+    return " | ".join(content_parts) if content_parts else "정보 없음"
+
+def read_batches(source, table, order='id'):
+    """테이블을 order 순으로 MIGRATE_BATCH_SIZE행씩 읽기 (호출자의 읽기 트랜잭션 안에서)"""
+    cursor = source.execute(f'SELECT * FROM {table} ORDER BY {order}')
+    while True:
+        rows = cursor.fetchmany(MIGRATE_BATCH_SIZE)
+        if not rows:
+            return
+        yield rows
+
+def create_target(path):
+    """새 DB 파일에 테이블만 생성 (트리거는 적재 후)
+    
+    임시 파일이므로 적재 중에는 저널/fsync를 끄고, 교체 전에 한 번 디스크에 씁니다.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=OFF')
+    conn.execute('PRAGMA synchronous=OFF')
+    
+    for statement in SCHEMA[SQLITE]:
+        if not statement.lstrip().startswith('CREATE TRIGGER'):
+            conn.execute(statement)
+    conn.commit()
+    return conn
+
+def copy_phone_data(source, target, columns, progress):
+    """phone_data를 배치 트랜잭션으로 옮기고 옮긴 행 수 반환 (id 유지)"""
+    count = 0
+    for rows in read_batches(source, 'phone_data'):
+        batch = []
+        for row in rows:
+            content = build_content(row, columns)
+            created_at = row['created_at'] if 'created_at' in columns else None
+            batch.append((row['id'], row['phone_number'], content, created_at,
+                          row_hash(row['phone_number'], content), quality_flags(row['phone_number'], content)))
+        with target:
+            target.executemany('''
+                INSERT INTO phone_data (id, phone_number, content, created_at, content_hash, quality_flags)
+                VALUES (?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), ?, ?)
+            ''', batch)
+        count += len(batch)
+        progress(count)
+    return count
+
+def copy_query_logs(source, target):
+    """조회 로그를 그대로 옮기고 옮긴 행 수 반환 (기존 DB에 없으면 0)"""
+    columns = [column for column in QUERY_LOG_COLUMNS if column in table_columns(source, 'query_logs')]
+    if 'id' not in columns:
+        return 0
     
+    count = 0
+    insert = f"INSERT INTO query_logs ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    for rows in read_batches(source, 'query_logs'):
+        with target:
+            target.executemany(insert, [tuple(row[column] for column in columns) for row in rows])
+        count += len(rows)
+    return count
+
+def copy_replication_log(source, target):
+    """복제 중인 원본이면 아직 보내지 않은 변경 로그를 옮기고 트리거 생성
+    
+    이후 중복 제거로 지워지는 행도 로그에 남아 PostgreSQL에서 함께 삭제됩니다.
+    """
+    with target:
+        for statement in REPLICATION_LOG_SCHEMA:
+            target.execute(statement)
+        count = 0
+        for rows in read_batches(source, 'replication_log', order='seq'):
+            target.executemany('INSERT INTO replication_log (seq, row_id, logged_at) VALUES (?, ?, ?)',
+                               [(row['seq'], row['row_id'], row['logged_at']) for row in rows])
+            count += len(rows)
+    return count
+
+def remove_duplicates(target):
+    """같은 (전화번호, content_hash)의 두 번째 이후 행 삭제 (유니크 인덱스 생성 전)"""
+    with target:
+        return target.execute('''
+            DELETE FROM phone_data WHERE id IN (
+                SELECT id FROM (
+                    SELECT id, ROW_NUMBER() OVER (PARTITION BY phone_number, content_hash ORDER BY id) AS n
+                    FROM phone_data
+                    WHERE content_hash IS NOT NULL
+                )
+                WHERE n > 1
+            )
+        ''').rowcount
+
+def finish_target(target):
+    """모든 스키마 버전을 차례로 적용(트리거/인덱스 생성)한 뒤 통계 카운터와 번호별 요약 채우기"""
+    # 버전을 기록만 하지 않고 실제로 적용해야 나중에 추가되는 버전도 새 DB에 반영됨
+    migrate_sqlite(target)
+    with target:
+        fill_derived_tables(target)
+    target.execute('ANALYZE')
+
+def count_rows(conn, table):
+    return conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+
+def sync_file(path):
+    """교체 전에 새 파일 내용을 디스크에 기록"""
+    fd = os.open(path, os.O_RDONLY)
     try:
-        with sqlite3.connect(old_db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM phone_data")
-            
-            for row in cursor.fetchall():
-                # 기존 여러 필드를 content 하나로 합치기
-                content_parts = []
-                
-                if row['name']:
-                    content_parts.append(f"이름: {row['name']}")
-                if row['company']:
-                    content_parts.append(f"회사: {row['company']}")
-                if row['address']:
-                    content_parts.append(f"주소: {row['address']}")
-                if row['email']:
-                    content_parts.append(f"이메일: {row['email']}")
-                if row['notes']:
-                    content_parts.append(f"메모: {row['notes']}")
-                
-                content = " | ".join(content_parts) if content_parts else "정보 없음"
-                
-                backup_data.append({
-                    'phone_number': row['phone_number'],
-                    'content': content
-                })
-                
-        print(f"기존 데이터 {len(backup_data)}개를 백업했습니다.")
-        
-    except sqlite3.Error as e:
-        print(f"백업 중 오류: {e}")
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def lock_source(old_db):
+    """기존 DB를 배타 잠금 모드로 열어 반환 (다른 연결이 열려 있으면 MigrationError)
     
-    return backup_data
+    배타 잠금 모드의 잠금은 연결을 닫을 때까지 유지되므로 마이그레이션과 교체가 끝날 때까지
+    다른 프로세스는 기존 DB를 읽거나 쓸 수 없습니다.
+    """
+    conn = sqlite3.connect(f'file:{old_db}?mode=rw', uri=True, isolation_level=None, timeout=MIGRATE_LOCK_TIMEOUT)
+    conn.row_factory = sqlite3.Row
+    try:
+        # 첫 접근 전에 설정해야 WAL 공유 메모리를 쓰지 않고 파일 잠금을 계속 잡음
+        conn.execute('PRAGMA locking_mode=EXCLUSIVE')
+        conn.execute('BEGIN EXCLUSIVE')
+        conn.execute('COMMIT')
+    except sqlite3.OperationalError as e:
+        conn.close()
+        raise MigrationError("기존 DB를 다른 프로세스(실행 중인 봇 등)가 열고 있습니다. "
+                             "봇과 스크립트를 모두 중지한 뒤 다시 실행하세요.") from e
+    return conn
 
-def create_new_database(db_path):
-    """새로운 단순한 데이터베이스 구조 생성"""
+def swap_files(source, old_db, new_db):
+    """기존 파일을 백업 이름으로 남기고 새 파일로 원자적으로 교체 (경로가 비는 순간 없음)
     
-    # 기존 파일 삭제 (백업은 이미 했음)
-    if os.path.exists(db_path):
-        os.remove(db_path)
+    source는 lock_source()로 연 연결이며, 교체가 끝난 뒤 호출자가 닫아 잠금을 풉니다.
+    """
+    # 기존 DB의 WAL을 본 파일에 반영하고 WAL 모드를 해제해 -wal 파일을 지움
+    # (같은 경로의 WAL이 새 파일과 짝지어지지 않도록, 잠금은 계속 유지)
+    journal_mode = source.execute('PRAGMA journal_mode=DELETE').fetchone()[0]
+    if journal_mode != 'delete':
+        raise MigrationError("기존 DB의 WAL을 비우지 못했습니다. 봇과 스크립트를 모두 중지한 뒤 다시 실행하세요.")
     
-    with sqlite3.connect(db_path) as conn:
-        cursor = conn.cursor()
+    backup = os.path.join(os.path.dirname(old_db) or '.', f'teledb_old_{int(datetime.now().timestamp())}.sqlite')
+    os.link(old_db, backup)
+    os.replace(new_db, old_db)
+    return backup
+
+def migrate(old_db, new_db):
+    """기존 DB를 새 구조로 스트리밍 마이그레이션하고 교체 (기존 DB는 끝날 때까지 배타 잠금)"""
+    source = lock_source(old_db)
+    target = None
+    try:
+        columns = table_columns(source, 'phone_data')
+        if not columns:
+            raise MigrationError("기존 DB에 phone_data 테이블이 없습니다.")
         
-        # 단순한 테이블 구조: phone_number + content만
-        cursor.execute('''
-            CREATE TABLE phone_data (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                phone_number TEXT NOT NULL,
-                content TEXT NOT NULL,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
         
-        # 조회 로그 테이블 (단순화)
-        cursor.execute('''
-            CREATE TABLE query_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                username TEXT,
-                query_phone TEXT,
-                results_count INTEGER DEFAULT 0,
-                query_time DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+        print("1. 새 데이터베이스 구조 생성 중...")
+        target = create_target(new_db)
         
-        # 인덱스 생성 (중복 허용)
-        cursor.execute('CREATE INDEX idx_phone ON phone_data(phone_number)')
+        start = time.perf_counter()
         
-        conn.commit()
-        print("새로운 데이터베이스 구조가 생성되었습니다.")
-
-def migrate_data(backup_data, new_db_path):
-    """백업 데이터를 새 구조로 마이그레이션"""
-    
-    with sqlite3.connect(new_db_path) as conn:
-        cursor = conn.cursor()
+        def progress(count):
+            print(f"   📊 {count:,}개 옮김 ({count / (time.perf_counter() - start):,.0f}행/초)")
         
-        for data in backup_data:
-            cursor.execute('''
-                INSERT INTO phone_data (phone_number, content)
-                VALUES (?, ?)
-            ''', (data['phone_number'], data['content']))
+        # 배타 잠금 중이므로 읽는 동안 다른 쓰기는 없음
+        print("\n2. 데이터 옮기는 중...")
+        source.execute('BEGIN')
+        try:
+            expected = count_rows(source, 'phone_data')
+            moved = copy_phone_data(source, target, columns, progress)
+            logs = copy_query_logs(source, target) if table_columns(source, 'query_logs') else 0
+            # sync_to_postgres.py로 복제 중인 원본만 변경 로그가 있음
+            if table_columns(source, 'replication_log'):
+                copy_replication_log(source, target)
+        finally:
+            source.execute('COMMIT')
         
-        conn.commit()
-        print(f"데이터 {len(backup_data)}개가 마이그레이션되었습니다.")
+        duplicates = remove_duplicates(target) if DEDUP_ENABLED else 0
+        
+        print("\n3. 인덱스/트리거 생성 및 요약 채우는 중...")
+        finish_target(target)
+        
+        print("\n4. 행 수 확인 중...")
+        actual = count_rows(target, 'phone_data')
+        if moved != expected or actual != expected - duplicates:
+            raise MigrationError(f"행 수 불일치: 기존 {expected:,}개, 옮김 {moved:,}개, 새 DB {actual:,}개")
+        print(f"   ✅ phone_data {actual:,}개" + (f" (중복 {duplicates:,}개 제외)" if duplicates else ""))
+        if logs:
+            print(f"   ✅ query_logs {logs:,}개")
+        
+        target.close()
+        target = None
+        sync_file(new_db)
+        
+        print("\n5. 파일 교체 중...")
+        backup = swap_files(source, old_db, new_db)
+        print(f"   기존 파일 백업: {backup}")
+        print(f"   소요 시간: {time.perf_counter() - start:.1f}초")
+    except Exception:
+        if target is not None:
+            target.close()
+        if os.path.exists(new_db):
+            os.remove(new_db)
+        raise
+    finally:
+        source.close()
 
 def main():
     """메인 마이그레이션 실행"""
-    old_db = './teledb.sqlite'
-    new_db = './teledb_new.sqlite'
-    
-    print("🔄 데이터베이스 마이그레이션 시작...")
-    print("=" * 50)
-    
-    # 1. 기존 데이터 백업
-    print("1. 기존 데이터 백업 중...")
-    backup_data = backup_existing_data(old_db)
+    old_db = os.getenv('DATABASE_PATH', './teledb.sqlite')
+    new_db = f'{old_db}.migrating'
     
-    # 2. 새 데이터베이스 구조 생성
-    print("\n2. 새 데이터베이스 구조 생성 중...")
-    create_new_database(new_db)
+    if not os.path.exists(old_db):
+        print("기존 데이터베이스 파일이 없습니다.")
+        return False
     
-    # 3. 데이터 마이그레이션
-    print("\n3. 데이터 마이그레이션 중...")
-    migrate_data(backup_data, new_db)
+    print("🔄 데이터베이스 마이그레이션 시작... (오프라인 전용: 봇을 중지한 상태여야 합니다)")
+    print("=" * 50)
     
-    # 4. 파일 교체
-    print("\n4. 파일 교체 중...")
-    if os.path.exists(old_db):
-        os.rename(old_db, f'./teledb_old_{int(datetime.now().timestamp())}.sqlite')
-    os.rename(new_db, old_db)
+    try:
+        migrate(old_db, new_db)
+    except (MigrationError, sqlite3.Error) as e:
+        print(f"\n❌ 마이그레이션 중단 (기존 DB는 바뀌지 않음): {e}")
+        return False
     
     print("\n✅ 마이그레이션 완료!")
     print("=" * 50)
@@ -137,6 +284,7 @@ def main():
     print("- phone_number: 전화번호 (중복 허용)")
     print("- content: 모든 정보를 하나의 텍스트로")
     print("- 중복 번호 조회시 모든 내용 표시")
+    return True
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    sys.exit(0 if main() else 1)
@@ -11,7 +11,8 @@ from flask import Flask
 from dotenv import load_dotenv
 from telegram.ext import Application
 from bot.handlers import setup_handlers
-from bot.database_postgres import init_database
+from bot.database_postgres import init_database, close_pool, start_background_jobs, stop_background_jobs
+from bot.database_async import close_async_pool
 
 # 환경변수 로드
 load_dotenv()
@@ -49,6 +50,9 @@ async def run_bot():
     except Exception as e:
         logger.error(f"데이터베이스 초기화 실패: {e}")
     
+    # Bloom 필터 구성, 통계 보정 등 백그라운드 작업 시작
+    start_background_jobs()
+    
     # 텔레그램 애플리케이션 생성
     application = Application.builder().token(bot_token).build()
     await application.initialize()
@@ -94,6 +98,9 @@ async def run_bot():
     finally:
         await application.stop()
         await application.shutdown()
+        stop_background_jobs()
+        await close_async_pool()
+        close_pool()
 
 def start_bot():
     """별도 스레드에서 봇 실행"""
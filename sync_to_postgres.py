@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+SQLite → PostgreSQL 증분 동기화 스크립트
+마지막으로 보낸 id 이후의 새 행과 수정/삭제된 행만 배치로 보냅니다.
+한 번 실행하면 따라잡은 뒤 종료하므로 cron에 등록하거나, --follow로 계속 실행할 수 있습니다.
+"""
+
+import os
+import sys
+import time
+from dotenv import load_dotenv
+import logging
+
+# 환경변수 로드 (bot 모듈이 DATABASE_URL을 읽기 전에)
+load_dotenv()
+
+# 현재 디렉토리를 모듈 경로에 추가
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from bot.replication import Replicator, SYNC_INTERVAL
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def report_progress(stats):
+    logger.info(f"동기화 진행: 추가/갱신 {stats.upserted:,}개, 삭제 {stats.deleted:,}개 "
+                f"(id {stats.last_id:,}까지, 배치 {stats.batches})")
+
+def sync_once(replicator):
+    stats = replicator.sync(progress=report_progress)
+    if stats.batches:
+        logger.info(f"✅ 동기화 완료: 추가/갱신 {stats.upserted:,}개, 삭제 {stats.deleted:,}개 "
+                    f"({stats.elapsed:.1f}초)")
+    return stats
+
+def sync_sqlite_to_postgres(sqlite_path, follow=False, reset=False) -> bool:
+    """SQLite 파일의 변경분을 PostgreSQL로 복제"""
+    
+    if not os.getenv('DATABASE_URL'):
+        logger.error("DATABASE_URL 환경변수가 설정되지 않았습니다.")
+        return False
+    
+    if not os.path.exists(sqlite_path):
+        logger.error(f"SQLite 데이터베이스 파일을 찾을 수 없습니다: {sqlite_path}")
+        return False
+    
+    try:
+        replicator = Replicator(sqlite_path)
+    except Exception as e:
+        logger.error(f"연결 오류: {e}")
+        return False
+    
+    try:
+        replicator.prepare()
+        if reset:
+            replicator.reset()
+        elif replicator.load_state() is None and not replicator.target_is_empty():
+            # 다른 방법으로 채운 행은 source_id가 없어 복제하면 같은 데이터가 두 번 들어감
+            logger.error("복제 기록이 없는데 대상 phone_data가 비어 있지 않습니다. "
+                         "처음 한 번은 --reset으로 비운 뒤 전체를 복제하세요.")
+            return False
+        
+        logger.info(f"동기화: {os.path.abspath(sqlite_path)} → PostgreSQL")
+        sync_once(replicator)
+        
+        while follow:
+            time.sleep(SYNC_INTERVAL)
+            sync_once(replicator)
+        return True
+    
+    except KeyboardInterrupt:
+        logger.info("동기화 중지 (반영된 배치까지 저장됨)")
+        return True
+    except Exception as e:
+        logger.error(f"동기화 오류 (반영된 배치까지 저장됨, 다시 실행하면 이어서 진행): {e}")
+        return False
+    finally:
+        replicator.close()
+
+if __name__ == "__main__":
+    # 사용법: python3 sync_to_postgres.py [SQLite 파일] [--follow] [--reset]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    ok = sync_sqlite_to_postgres(args[0] if args else os.getenv('DATABASE_PATH', './teledb.sqlite'),
+                                 follow='--follow' in sys.argv, reset='--reset' in sys.argv)
+    sys.exit(0 if ok else 1)
@@ -84,6 +84,558 @@ def test_database_functions():
     
     print("\n✅ 모든 테스트 완료!")
 
+# unit 명령에서 실패한 검사 수
+failed_checks = 0
+
+def check(label, ok):
+    """검사 결과 한 줄 출력 (실패 수 누적)"""
+    global failed_checks
+    if not ok:
+        failed_checks += 1
+    print(f"   {'✅' if ok else '❌'} {label}")
+
+def test_search_cache():
+    """조회 캐시: 조회 도중 무효화되면 이전 결과를 저장하지 않는지"""
+    print("\n🧪 조회 캐시(LRUCache) 테스트")
+    from bot.cache import LRUCache
+    
+    cache = LRUCache(max_size=2, ttl=60)
+    found, _ = cache.get('01012345678')
+    check("처음 조회는 캐시 미스", not found)
+    
+    # 조회 시작 시점의 세대를 기억한 뒤, 조회 중 같은 번호에 데이터가 추가된 경우
+    generation = cache.generation
+    cache.invalidate(['01012345678'])
+    cache.put('01012345678', ['이전 결과'], generation)
+    found, _ = cache.get('01012345678')
+    check("조회 중 무효화되면 이전 결과는 저장되지 않음", not found)
+    
+    cache.put('01012345678', ['새 결과'], cache.generation)
+    found, value = cache.get('01012345678')
+    check("현재 세대의 결과는 저장됨", found and value == ['새 결과'])
+    
+    cache.put('01098765432', ['두 번째'])
+    cache.put('01011112222', ['세 번째'])
+    found, _ = cache.get('01012345678')
+    check("크기 한도를 넘으면 가장 오래된 항목부터 제거", not found and cache.evictions == 1)
+
+def test_bloom_filter():
+    """Bloom 필터: 추가/따라잡기 이후 등록된 번호를 없다고 답하지 않는지 (미탐 없음)"""
+    print("\n🧪 전화번호 Bloom 필터 테스트")
+    from bot.bloom import BloomFilter, PhoneNumberFilter, CATCHUP_OVERLAP
+    
+    numbers = [f"010{i:08d}" for i in range(0, 20000, 7)]
+    bloom = BloomFilter(len(numbers), 0.01)
+    for phone in numbers:
+        bloom.add(phone)
+    check("BloomFilter: 추가한 번호는 모두 있음", all(phone in bloom for phone in numbers))
+    
+    # scan(after_id)는 DB처럼 id 순서로 (id, 번호) 반환
+    rows = [(i + 1, phone) for i, phone in enumerate(numbers[:1000])]
+    scan = lambda after_id: [row for row in rows if row[0] > after_id]
+    
+    phone_filter = PhoneNumberFilter(len(numbers), 0.01)
+    check("준비 전에는 항상 있을 수 있음", phone_filter.might_contain('01099999999'))
+    
+    phone_filter.rebuild(scan)
+    check("재구성 후 기존 번호는 모두 있음",
+          all(phone_filter.might_contain(phone) for _, phone in rows))
+    
+    # 다른 프로세스가 추가한 행은 따라잡기로, 이 프로세스의 추가는 add로 반영
+    rows.extend((i + 1, numbers[i]) for i in range(1000, 2000))
+    phone_filter.catch_up(scan)
+    phone_filter.add(numbers[2000])
+    check("따라잡기/추가 후 새 번호도 모두 있음",
+          all(phone_filter.might_contain(phone) for phone in numbers[:2001]))
+    check("따라잡기 후 watermark 갱신", phone_filter.watermark == 2000)
+    
+    # PostgreSQL처럼 id가 커밋 전에 발급되는 경우: watermark보다 한참 작은 id가 늦게 커밋됨
+    # horizon()은 (진행 중인 가장 오래된 트랜잭션, 다음 트랜잭션) 번호
+    rows = [(i, f"010{i:08d}") for i in range(100, 3100)]
+    snapshot = [(10, 11)]  # 트랜잭션 10이 id 1~5를 받아 두고 아직 진행 중
+    late_filter = PhoneNumberFilter(10000, 0.01)
+    late_filter.rebuild(scan, lambda: snapshot[0])
+    rows.extend((i, f"010{i + 5000:08d}") for i in range(3100, 5000))
+    snapshot[0] = (10, 12)
+    late_filter.catch_up(scan, lambda: snapshot[0])
+    
+    late_rows = [(i, f"019{i:08d}") for i in range(1, 6)]
+    rows.extend(late_rows)  # 트랜잭션 10 커밋
+    snapshot[0] = (12, 13)
+    late_filter.catch_up(scan, lambda: snapshot[0])
+    check("watermark보다 작은 id로 늦게 커밋된 번호도 반영",
+          all(late_filter.might_contain(phone) for _, phone in late_rows))
+    
+    snapshot[0] = (13, 14)
+    scanned_from = []
+    late_filter.catch_up(lambda after_id: scanned_from.append(after_id) or scan(after_id),
+                         lambda: snapshot[0])
+    check("늦은 트랜잭션이 끝나면 처음부터 다시 읽지 않음", scanned_from[0] == 3099 - CATCHUP_OVERLAP)
+    
+    unknown = [f"011{i:08d}" for i in range(1000)]
+    misses = sum(not phone_filter.might_contain(phone) for phone in unknown)
+    check(f"없는 번호는 대부분 걸러냄 ({misses}/{len(unknown)})", misses > len(unknown) * 0.9)
+    
+    # phone_data가 통째로 교체된 경우: 새 테이블을 읽을 때까지 "없음"으로 답하지 않음
+    swapped = [(i, f"012{i:08d}") for i in range(6000, 6100)]
+    phone_filter.reset()
+    check("교체 후 재구성 전에는 항상 있을 수 있음",
+          not phone_filter.ready and phone_filter.watermark == 0
+          and all(phone_filter.might_contain(phone) for _, phone in swapped))
+    phone_filter.rebuild(lambda after_id: [row for row in swapped if row[0] > after_id])
+    check("교체 후 재구성하면 새 테이블 번호만 반영",
+          all(phone_filter.might_contain(phone) for _, phone in swapped)
+          and phone_filter.watermark == 6099)
+
+def test_circuit_breaker():
+    """회로 차단기: 닫힘 → 열림 → 반열림 → 닫힘 전환과 시험 요청 실패 시 다시 열림"""
+    print("\n🧪 회로 차단기 테스트")
+    import time
+    import threading
+    from bot.circuit import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+    
+    # probe 없이 probe_interval이 지나면 다음 요청을 시험 요청으로 보냄
+    breaker = CircuitBreaker('test', failure_threshold=2, probe_interval=0.05)
+    breaker.record_failure()
+    check("실패 한도 전에는 닫힘 유지", breaker.state == CLOSED and breaker.allow_request())
+    breaker.record_failure()
+    check("연속 실패 한도에서 열림", breaker.state == OPEN)
+    check("열린 동안 요청은 바로 폴백", not breaker.allow_request() and breaker.rejected == 1)
+    
+    time.sleep(0.06)
+    check("대기 후 첫 요청은 시험 요청으로 허용", breaker.allow_request() and breaker.state == HALF_OPEN)
+    check("시험 요청 중 다른 요청은 폴백", not breaker.allow_request())
+    breaker.record_failure()
+    check("시험 요청이 실패하면 다시 열림", breaker.state == OPEN and breaker.opened_count == 2)
+    
+    time.sleep(0.06)
+    breaker.allow_request()
+    breaker.record_success()
+    check("시험 요청이 성공하면 닫힘", breaker.state == CLOSED and breaker.allow_request())
+    
+    # probe가 있으면 백그라운드 확인이 성공해야 반열림
+    probe_ok = threading.Event()
+    def probe():
+        if not probe_ok.is_set():
+            raise ConnectionError("down")
+    breaker = CircuitBreaker('test-probe', failure_threshold=1, probe_interval=0.02, probe=probe)
+    breaker.record_failure()
+    time.sleep(0.1)
+    check("probe가 실패하는 동안 열림 유지", breaker.state == OPEN and breaker.probes > 0)
+    probe_ok.set()
+    deadline = time.monotonic() + 2
+    while breaker.state == OPEN and time.monotonic() < deadline:
+        time.sleep(0.01)
+    check("probe 성공 후 반열림", breaker.state == HALF_OPEN)
+    check("반열림 시험 요청 허용", breaker.allow_request())
+    breaker.record_success()
+    check("시험 요청 성공 후 닫힘", breaker.state == CLOSED)
+    breaker.stop()
+
+def test_query_log_writer():
+    """조회 기록 버퍼: 저장 실패한 배치를 순서대로 되돌려 다음 저장에 포함하는지"""
+    print("\n🧪 조회 기록 버퍼 테스트")
+    from bot.query_log import QueryLogWriter
+    
+    saved = []
+    fail = [True]
+    def write(batch):
+        if fail[0]:
+            raise ConnectionError("DB 연결 실패")
+        saved.extend(batch)
+    
+    writer = QueryLogWriter(write, batch_size=2, flush_interval=60, max_buffered=4)
+    # 백그라운드 스레드 없이 flush()만으로 확인
+    writer._stopping.set()
+    rows = [(1, f"010{i:08d}") for i in range(5)]
+    for row in rows[:3]:
+        writer.add(row)
+    
+    check("저장 실패 시 flush()는 False", not writer.flush())
+    check("실패한 배치는 버퍼에 되돌아감", writer.stats()['pending'] == 3 and not saved)
+    
+    # 보관 한도(4건)를 넘으면 가장 오래된 기록부터 버림
+    writer.add(rows[3])
+    writer.add(rows[4])
+    check("보관 한도 초과분은 오래된 것부터 버림", writer.stats()['dropped'] == 1)
+    
+    fail[0] = False
+    check("복구 후 flush()는 True", writer.flush())
+    check("되돌린 기록이 원래 순서대로 저장됨", saved == rows[1:])
+    stats = writer.stats()
+    check("저장/실패 통계", stats['pending'] == 0 and stats['written'] == 4 and stats['failures'] == 1)
+
+def test_stale_results():
+    """보관된 정상 결과: 경과 시간/최대 보관 시간, 무효화 후 저장 방지, 경과 시간 표시"""
+    print("\n🧪 보관된 정상 결과(StaleStore) 테스트")
+    import time
+    from bot.cache import StaleStore
+    from bot.utils import format_age
+    
+    store = StaleStore(max_size=10, max_age=0.2)
+    found, _, _ = store.get_stale('01012345678')
+    check("보관된 결과가 없으면 찾지 못함", not found and store.unavailable == 1)
+    
+    store.put('01012345678', [{'content': '정상 결과'}])
+    time.sleep(0.05)
+    found, value, age = store.get_stale('01012345678')
+    check("보관된 결과와 경과 시간 반환", found and value == [{'content': '정상 결과'}] and 0.05 <= age < 0.2)
+    check("보관된 결과 응답 수 집계", store.degraded == 1)
+    
+    time.sleep(0.2)
+    found, _, _ = store.get_stale('01012345678')
+    check("최대 보관 시간이 지나면 쓰지 않음", not found)
+    
+    # 조회 도중 같은 번호에 쓰기가 있으면 조회 결과를 보관하지 않음
+    generation = store.generation
+    store.invalidate(['01012345678'])
+    store.put('01012345678', [{'content': '이전 결과'}], generation)
+    found, _, _ = store.get_stale('01012345678')
+    check("조회 중 무효화되면 이전 결과는 보관되지 않음", not found)
+    store.put('01012345678', [{'content': '새 결과'}], store.generation)
+    found, value, _ = store.get_stale('01012345678')
+    check("현재 세대의 결과는 보관됨", found and value == [{'content': '새 결과'}])
+    
+    for seconds, expected in [(0, '0초'), (59.9, '59초'), (60, '1분'), (3599, '59분'),
+                              (3600, '1시간'), (3660, '1시간 1분'), (90000, '25시간')]:
+        check(f"format_age({seconds}) = {expected}", format_age(seconds) == expected)
+
+def test_content_hash():
+    """중복 제거 해시: 정규화 후 같은 내용은 같은 해시, 번호가 다르면 다른 해시"""
+    print("\n🧪 내용 해시(중복 제거) 테스트")
+    import unicodedata
+    from bot import dedup
+    
+    composed = unicodedata.normalize('NFC', '이름: 홍길동')
+    decomposed = unicodedata.normalize('NFD', '이름: 홍길동')
+    check("NFC/NFD 표기가 달라도 정규화 결과는 같음",
+          composed != decomposed and dedup.normalize_content(composed) == dedup.normalize_content(decomposed))
+    check("NFC/NFD 표기가 달라도 해시는 같음",
+          dedup.content_hash('01012345678', composed) == dedup.content_hash('01012345678', decomposed))
+    check("앞뒤/연속 공백 차이는 무시",
+          dedup.content_hash('01012345678', '  이름:  홍길동\t| 회사 ') ==
+          dedup.content_hash('01012345678', '이름: 홍길동 | 회사'))
+    check("번호가 다르면 해시가 다름",
+          dedup.content_hash('01012345678', composed) != dedup.content_hash('01098765432', composed))
+    check("내용이 다르면 해시가 다름",
+          dedup.content_hash('01012345678', '홍길동') != dedup.content_hash('01012345678', '김철수'))
+    digest = dedup.content_hash('01012345678', composed)
+    check("BIGINT 범위의 부호 있는 정수", -2 ** 63 <= digest < 2 ** 63)
+    
+    enabled = dedup.DEDUP_ENABLED
+    try:
+        dedup.DEDUP_ENABLED = False
+        check("DEDUP_ENABLED=false 이면 저장할 해시는 None",
+              dedup.row_hash('01012345678', composed) is None
+              and dedup.with_hash('01012345678', composed) == ('01012345678', composed, None))
+        dedup.DEDUP_ENABLED = True
+        check("DEDUP_ENABLED=true 이면 저장할 해시가 채워짐", dedup.row_hash('01012345678', composed) == digest)
+    finally:
+        dedup.DEDUP_ENABLED = enabled
+
+def test_quality_flags():
+    """품질 분류: 규칙별 비트와 정상(0) 판정"""
+    print("\n🧪 품질 분류(quality_flags) 테스트")
+    from bot.quality import (
+        quality_flags, describe_flags, FLAG_BLOCKED_WORD, FLAG_TEST_DATA, FLAG_NONSTANDARD_PHONE,
+        QUALITY_BLOCKED_WORDS, QUALITY_TEST_WORDS,
+    )
+    
+    blocked = QUALITY_BLOCKED_WORDS[0] if QUALITY_BLOCKED_WORDS else None
+    test_word = QUALITY_TEST_WORDS[0] if QUALITY_TEST_WORDS else None
+    
+    check("정상 데이터는 0", quality_flags('01012345678', '이름: 홍길동 | 회사: 삼성전자') == 0)
+    if blocked:
+        check("금칙어 포함", quality_flags('01012345678', f"메모: {blocked}") == FLAG_BLOCKED_WORD)
+    if test_word:
+        check("테스트 데이터 (대소문자 무시)",
+              quality_flags('01012345678', f"메모: {test_word.upper()} 계정") == FLAG_TEST_DATA)
+    check("비표준 번호", quality_flags('0212345678', '이름: 홍길동') == FLAG_NONSTANDARD_PHONE)
+    if blocked and test_word:
+        check("여러 규칙에 걸리면 비트 합",
+              quality_flags('0212345678', f"{blocked} {test_word}")
+              == FLAG_BLOCKED_WORD | FLAG_TEST_DATA | FLAG_NONSTANDARD_PHONE)
+    check("표시 이름", describe_flags(None) == '미분류' and describe_flags(0) == '정상'
+          and describe_flags(FLAG_BLOCKED_WORD | FLAG_NONSTANDARD_PHONE) == '금칙어, 비표준 번호')
+    
+    # 업그레이드 전 행(quality_flags IS NULL)은 스키마를 올릴 때 분류되어 정리 내보내기에서 빠지지 않음
+    import bot.database as legacy
+    from bot.migrations import migrate_sqlite
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    migrate_sqlite(conn)
+    conn.executemany("INSERT INTO phone_data (phone_number, content) VALUES (?, ?)",
+                     [('01012345678', '홍길동'), ('0212345678', '홍길동')] * 3)
+    batch_size, legacy.BACKFILL_BATCH_SIZE = legacy.BACKFILL_BATCH_SIZE, 4
+    try:
+        with conn:
+            legacy.fill_derived_tables(conn)
+    finally:
+        legacy.BACKFILL_BATCH_SIZE = batch_size
+    counts = dict(conn.execute("SELECT quality_flags, COUNT(*) FROM phone_data GROUP BY quality_flags").fetchall())
+    check(f"기존 미분류 행은 스키마 업그레이드 시 분류 ({counts})",
+          counts == {0: 3, FLAG_NONSTANDARD_PHONE: 3})
+    conn.close()
+
+def write_sample_csv(path, count=30):
+    """따옴표 안 줄바꿈/쉼표/이스케이프된 따옴표가 섞인 가져오기용 CSV 생성 후 행 수 반환"""
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        file.write('이름,전화번호,메모\n')
+        for i in range(count):
+            if i % 3 == 0:
+                memo = f'"{i}번 첫 줄\n둘째 줄"'
+            elif i % 3 == 1:
+                memo = f'"쉼표, 포함 ""{i}"""'
+            else:
+                memo = f'메모{i}'
+            file.write(f'테스트{i},010-{i:04d}-5678,{memo}\n')
+    return count
+
+def test_csv_records():
+    """CSV 가져오기: 따옴표 안 줄바꿈을 한 레코드로 읽고 배치 저장 후 행 수가 맞는지"""
+    print("\n🧪 CSV 레코드 분리/가져오기 테스트")
+    import io
+    import tempfile
+    from bot.importer import iter_records, CsvLayout, import_file
+    from bot.migrations import migrate_sqlite
+    
+    data = b'a,b\n1,"x\ny"\n2,"say ""hi"""\n3,z'
+    records = list(iter_records(io.BytesIO(data)))
+    check("따옴표 안 줄바꿈은 다음 줄과 합쳐 한 레코드",
+          [raw for _, raw in records] == [b'a,b\n', b'1,"x\ny"\n', b'2,"say ""hi"""\n', b'3,z'])
+    check("레코드 끝 오프셋은 누적 바이트 수", [offset for offset, _ in records] == [4, 12, 27, 30])
+    check("end 이전에 시작한 레코드까지만 읽음",
+          [raw for _, raw in iter_records(io.BytesIO(data), 4, 12)] == [b'1,"x\ny"\n'])
+    check("NDJSON(multiline=False)은 한 줄이 한 레코드",
+          len(list(iter_records(io.BytesIO(b'{"a": "\\"x"}\n{"a": 1}\n'), multiline=False))) == 2)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'contacts.csv')
+        expected = write_sample_csv(path)
+        layout = CsvLayout(path, 'utf-8')
+        check("헤더와 전화번호 필드 감지", layout.headers == ['이름', '전화번호', '메모']
+              and layout.mapping.get('phone_number') == '전화번호')
+        
+        conn = sqlite3.connect(':memory:')
+        migrate_sqlite(conn)
+        stats = import_file(conn, layout, batch_size=7)
+        check(f"배치 단위로 모두 저장 ({stats.inserted}/{expected}행, {stats.batches}배치)",
+              stats.rows == expected and stats.inserted == expected and stats.batches == 5)
+        multiline = conn.execute("SELECT content FROM phone_data WHERE phone_number = '01000005678'").fetchone()[0]
+        check("줄바꿈이 포함된 값도 그대로 저장", '0번 첫 줄\n둘째 줄' in multiline)
+        conn.close()
+
+def test_import_chunks():
+    """병렬 가져오기: 구간 경계가 레코드 끝에만 놓이고 구간 합이 순차 읽기와 같은지"""
+    print("\n🧪 가져오기 구간 분할 테스트")
+    import tempfile
+    from bot.importer import CsvLayout, plan_chunks, parse_chunk, import_file_parallel
+    from bot.migrations import migrate_sqlite
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'contacts.csv')
+        expected = write_sample_csv(path)
+        layout = CsvLayout(path, 'utf-8')
+        with open(path, 'rb') as file:
+            record_ends = {offset for offset, _ in layout.read_records(file, layout.data_start)}
+        
+        chunks = list(plan_chunks(layout, layout.data_start, 1, chunk_bytes=100))
+        check(f"작은 chunk_bytes로 여러 구간 생성 ({len(chunks)}개)", len(chunks) > 3)
+        check("구간이 data_start부터 파일 끝까지 빈틈없이 이어짐",
+              chunks[0][0] == layout.data_start and chunks[-1][1] == os.path.getsize(path)
+              and all(a[1] == b[0] for a, b in zip(chunks, chunks[1:])))
+        check("구간 끝은 항상 레코드 끝 (따옴표 안 줄바꿈에서 자르지 않음)",
+              all(end in record_ends for _, end, _ in chunks))
+        
+        rows = []
+        for start, end, first_row in chunks:
+            batches, count, skipped, errors, _ = parse_chunk(layout, start, end, first_row, 4)
+            normalized = [record for _, _, records in batches for record in records]
+            rows.append((first_row, count, len(normalized)))
+        check("구간별 첫 행 번호가 앞 구간 행 수만큼 이어짐",
+              all(b[0] == a[0] + a[1] for a, b in zip(rows, rows[1:])))
+        check(f"구간 행 수 합이 순차 읽기와 같음 ({sum(r[1] for r in rows)}/{expected})",
+              sum(r[1] for r in rows) == expected and sum(r[2] for r in rows) == expected)
+        
+        conn = sqlite3.connect(':memory:')
+        migrate_sqlite(conn)
+        stats = import_file_parallel(conn, layout, workers=2, batch_size=4)
+        stored = conn.execute("SELECT COUNT(*) FROM phone_data").fetchone()[0]
+        check(f"병렬 가져오기 결과가 순차와 같음 ({stored}/{expected}행)",
+              stats.rows == expected and stored == expected)
+        conn.close()
+
+def test_import_checkpoint():
+    """가져오기 재개 지점: 중단 후 이어서 가져오면 중복/누락이 없고, 완료/초기화가 기록되는지"""
+    print("\n🧪 가져오기 재개 지점 테스트")
+    import tempfile
+    from bot.importer import (CsvLayout, ImportCheckpoint, ImportStats, import_file, insert_batch,
+                              normalize_batch, read_batches)
+    from bot.migrations import migrate_sqlite
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'contacts.csv')
+        expected = write_sample_csv(path)
+        layout = CsvLayout(path, 'utf-8')
+        conn = sqlite3.connect(':memory:')
+        migrate_sqlite(conn)
+        
+        checkpoint = ImportCheckpoint(layout)
+        check("저장된 재개 지점이 없으면 load()는 False", not checkpoint.load(conn))
+        
+        # 첫 배치만 저장하고 중단된 상황
+        with open(path, 'rb') as file:
+            offset, raw_batch = next(read_batches(layout, file, layout.data_start, None, 1, 8))
+        insert_batch(conn, normalize_batch(raw_batch, layout, ImportStats()), checkpoint, offset, raw_batch[-1][0])
+        
+        resumed = ImportCheckpoint(layout)
+        check("재개 지점은 배치와 같은 트랜잭션에서 기록됨",
+              resumed.load(conn) and (resumed.offset, resumed.last_row, resumed.batch_id) == (offset, 8, 1)
+              and not resumed.completed)
+        stats = import_file(conn, layout, batch_size=8, checkpoint=resumed)
+        stored = conn.execute("SELECT COUNT(*) FROM phone_data").fetchone()[0]
+        distinct = conn.execute("SELECT COUNT(DISTINCT phone_number) FROM phone_data").fetchone()[0]
+        check(f"재개 후 나머지 행만 가져옴 ({stats.rows}행)", stats.rows == expected - 8)
+        check(f"중복/누락 없이 전체 저장 ({stored}/{expected}행)", stored == distinct == expected)
+        
+        finished = ImportCheckpoint(layout)
+        check("파일 끝까지 저장하면 completed로 기록",
+              finished.load(conn) and finished.completed and finished.last_row == expected
+              and finished.offset == os.path.getsize(path))
+        
+        finished.clear(conn)
+        check("clear()는 재개 지점을 지우고 data_start부터 다시 시작",
+              not ImportCheckpoint(layout).load(conn)
+              and (finished.offset, finished.last_row, finished.completed) == (layout.data_start, 0, False))
+        
+        with open(path, 'a', encoding='utf-8') as file:
+            file.write('추가,010-9999-0000,메모\n')
+        check("파일 내용이 바뀌면 다른 재개 지점으로 인식",
+              ImportCheckpoint(CsvLayout(path, 'utf-8')).file_key != checkpoint.file_key)
+        conn.close()
+
+def test_export_formats():
+    """내보내기 형식: 확장자/매직 바이트로 형식·압축을 판별하고 쓴 행을 그대로 읽어오는지"""
+    print("\n🧪 내보내기 형식/압축 테스트")
+    import shutil
+    import tempfile
+    from bot.formats import (CSV, NDJSON, GZIP, XZ, STDIO, compression_from_name, format_from_name,
+                             detect_compression, detect_format)
+    from bot.exporter import write_rows, read_export_rows
+    
+    names = {
+        'backup.csv': (CSV, None),
+        'backup.csv.gz': (CSV, GZIP),
+        'backup.ndjson.xz': (NDJSON, XZ),
+        'BACKUP.JSONL.GZIP': (NDJSON, GZIP),
+        'backup.txt': (None, None),
+        STDIO: (None, None),
+    }
+    for name, expected in names.items():
+        check(f"확장자 판별: {name} → {expected}", (format_from_name(name), compression_from_name(name)) == expected)
+    
+    rows = [
+        ('01012345678', '홍길동, "대리"\n둘째 줄', '2024-01-01 09:00:00'),
+        ('0212345678', 'café', None),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in (CSV, NDJSON):
+            for compression, ext in ((None, ''), (GZIP, '.gz'), (XZ, '.xz')):
+                path = os.path.join(tmp, f'export.{fmt}{ext}')
+                stats = write_rows(iter(rows), path, fmt, compression)
+                check(f"왕복: {os.path.basename(path)}",
+                      stats.rows == 2 and list(read_export_rows(path)) == rows)
+                
+                # 확장자 없이도 파일 앞부분으로 판별
+                bare = os.path.join(tmp, f'noext-{fmt}-{compression}')
+                shutil.copy(path, bare)
+                check(f"확장자 없이 판별: {fmt}/{compression}",
+                      detect_compression(bare) == compression and detect_format(bare) == fmt)
+        
+        # '-'는 표준 출력에 쓰고 stdout은 닫지 않음
+        path = os.path.join(tmp, 'stdout.ndjson')
+        saved = os.dup(1)
+        try:
+            with open(path, 'wb') as target:
+                sys.stdout.flush()
+                os.dup2(target.fileno(), 1)
+                write_rows(iter(rows), STDIO, NDJSON)
+                stdout_open = os.fstat(1).st_ino == os.fstat(target.fileno()).st_ino
+        finally:
+            os.dup2(saved, 1)
+            os.close(saved)
+        check("'-'는 표준 출력으로 쓰고 왕복 가능", list(read_export_rows(path)) == rows)
+        check("표준 출력 쓰기 후에도 fd 1은 열려 있음", stdout_open)
+
+def test_legacy_stats():
+    """기존 SQLite 모듈: 카운터/요약 테이블로 읽은 통계가 전체 집계와 같은지"""
+    print("\n🧪 SQLite 통계 카운터/요약 테이블 테스트")
+    import tempfile
+    import bot.database as legacy
+    from bot.queries import QUERIES, SQLITE, STATS_COUNTERS
+    from bot.sqlite_manager import close_connections
+    
+    original_path = legacy.DATABASE_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy.DATABASE_PATH = os.path.join(tmp, 'stats.sqlite')
+        try:
+            legacy.init_database()
+            for phone, content in [('01011112222', '가'), ('01011112222', '나'), ('01033334444', '다'),
+                                   ('0212345678', '라')]:
+                legacy.add_phone_data(phone, content)
+            legacy.update_phone_data('01033334444', '다', '다2')
+            legacy.delete_phone_data('0212345678')
+            legacy.log_query(1, 'tester', '01011112222', 2)
+            legacy.log_query(1, 'tester', '01099998888', 0)
+            
+            conn = legacy.get_connection()
+            actual = {name: conn.execute(QUERIES[SQLITE][query]).fetchone()[column]
+                      for name, (query, column) in STATS_COUNTERS.items()}
+            stats = legacy.get_stats()
+            check(f"get_stats가 실제 집계와 같음 ({actual})",
+                  {name: stats[name] for name in actual} == actual and stats['success_rate'] == 50.0)
+            
+            grouped = conn.execute('''
+                SELECT phone_number, COUNT(*) as count, MIN(created_at) as first_added, MAX(created_at) as last_added
+                FROM phone_data GROUP BY phone_number
+            ''').fetchall()
+            summary = legacy.get_phone_summary()
+            check("get_phone_summary가 GROUP BY 결과와 같음",
+                  sorted(map(dict, grouped), key=lambda row: row['phone_number'])
+                  == sorted(summary, key=lambda row: row['phone_number']))
+            check("등록 수 많은 순으로 정렬", [row['phone_number'] for row in summary] == ['01011112222', '01033334444'])
+        finally:
+            close_connections()
+            legacy.DATABASE_PATH = original_path
+
+# unit 명령으로 실행할 검사 목록
+PRIMITIVE_TESTS = [
+    test_search_cache,
+    test_bloom_filter,
+    test_circuit_breaker,
+    test_query_log_writer,
+    test_stale_results,
+    test_content_hash,
+    test_quality_flags,
+    test_csv_records,
+    test_import_chunks,
+    test_import_checkpoint,
+    test_export_formats,
+    test_legacy_stats,
+]
+
+def test_primitives():
+    """DB 없이 캐시/필터/버퍼 등 기본 구성 요소 검사 (실패가 없으면 True)"""
+    print("🧪 기본 구성 요소 테스트 시작...")
+    for test in PRIMITIVE_TESTS:
+        test()
+    
+    if failed_checks:
+        print(f"\n❌ 실패한 검사 {failed_checks}개")
+        return False
+    print("\n✅ 모든 검사 통과!")
+    return True
+
 def create_sample_database():
     """단순화된 샘플 데이터베이스 생성 (중복 허용)"""
     print("📦 단순화된 샘플 데이터베이스 생성 중...")
@@ -153,6 +705,7 @@ def show_help():
   test      - 데이터베이스 함수들 테스트 실행
   sample    - 샘플 데이터베이스 생성 (중복 포함)
   duplicate - 중복 번호 조회 예시
+  unit      - 캐시/필터/버퍼 등 기본 구성 요소 검사 (DB 불필요)
   help      - 이 도움말 출력
 
 새로운 특징:
@@ -164,6 +717,7 @@ def show_help():
   python3 test_bot.py test
   python3 test_bot.py sample
   python3 test_bot.py duplicate
+  python3 test_bot.py unit
 """)
 
 if __name__ == '__main__':
@@ -175,8 +729,10 @@ if __name__ == '__main__':
         create_sample_database()
     elif sys.argv[1] == 'duplicate':
         show_duplicate_examples()
+    elif sys.argv[1] == 'unit':
+        sys.exit(0 if test_primitives() else 1)
     elif sys.argv[1] == 'help':
         show_help()
     else:
         print(f"❌ 알 수 없는 명령어: {sys.argv[1]}")
-        print("사용 가능한 명령어: test, sample, duplicate, help")
\ No newline at end of file
+        print("사용 가능한 명령어: test, sample, duplicate, unit, help")
\ No newline at end of file
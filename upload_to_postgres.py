@@ -1,111 +1,112 @@
 #!/usr/bin/env python3
 """
 CSV 데이터를 PostgreSQL에 업로드하는 스크립트
+COPY 프로토콜로 내보낸 파일(CSV/NDJSON, gzip/xz 압축 포함)을 여러 연결로 동시에 적재합니다.
+묻지 않고 실행되므로 cron에서 그대로 사용할 수 있습니다 (실패 시 종료 코드 1).
 """
 
 import os
-import csv
-import psycopg
+import sys
+import time
 from dotenv import load_dotenv
 import logging
 
-# 환경변수 로드
+# 환경변수 로드 (bot 모듈이 DATABASE_URL을 읽기 전에)
 load_dotenv()
 
+# 현재 디렉토리를 모듈 경로에 추가
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import psycopg
+from bot.database_postgres import init_database, close_pool
+from bot.exporter import read_export_rows
+from bot.pg_loader import REPLACE, APPEND, MODES, LOAD_WORKERS, replace_phone_data, append_phone_data
+
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def upload_csv_to_postgres():
-    """CSV 데이터를 PostgreSQL에 업로드"""
+def report_progress(count, elapsed):
+    rate = count / elapsed if elapsed > 0 else 0
+    logger.info(f"업로드 진행: {count:,}개 ({rate:,.0f}행/초)")
+
+def upload_csv_to_postgres(csv_file='./teledb_clean_export.csv', mode=None, workers=LOAD_WORKERS) -> bool:
+    """CSV 데이터를 PostgreSQL에 업로드
+    
+    replace: 새 테이블에 적재한 뒤 기존 테이블과 한 번에 교체 (적재 중에도 조회 가능)
+             적재하는 동안 봇이 /add, /update, /delete로 쓴 내용은 교체 시 사라지므로 쓰기가 없을 때 실행
+    append: 기존 데이터에 추가
+    mode를 지정하지 않으면 테이블이 비어 있을 때만 추가합니다.
+    """
     
     # PostgreSQL 연결
     DATABASE_URL = os.getenv('DATABASE_URL')
     if not DATABASE_URL:
         logger.error("DATABASE_URL 환경변수가 설정되지 않았습니다.")
-        return
+        return False
     
-    csv_file = './teledb_clean_export.csv'
     if not os.path.exists(csv_file):
         logger.error(f"CSV 파일을 찾을 수 없습니다: {csv_file}")
-        return
+        return False
+    
+    if mode is not None and mode not in MODES:
+        logger.error(f"지원하지 않는 모드: {mode} (사용 가능: {', '.join(MODES)})")
+        return False
     
     try:
-        # PostgreSQL 연결
-        logger.info("PostgreSQL 연결 중...")
-        conn = psycopg.connect(DATABASE_URL)
-        logger.info("PostgreSQL 연결 성공")
+        # 테이블/인덱스/트리거가 없으면 먼저 생성
+        init_database()
         
-        with conn:
-            with conn.cursor() as cursor:
-                
-                # 기존 데이터 확인
-                cursor.execute("SELECT COUNT(*) FROM phone_data")
-                existing_count = cursor.fetchone()[0]
-                logger.info(f"기존 데이터: {existing_count}개")
-                
-                if existing_count > 0:
-                    response = input(f"기존 데이터 {existing_count}개가 있습니다. 삭제하고 새로 업로드하시겠습니까? (y/N): ")
-                    if response.lower() == 'y':
-                        cursor.execute("DELETE FROM phone_data")
-                        logger.info("기존 데이터 삭제 완료")
-                    else:
-                        logger.info("업로드 취소")
-                        return
-                
-                # CSV 파일 읽기 및 업로드
-                logger.info(f"CSV 파일 읽는 중: {csv_file}")
-                
-                upload_count = 0
-                batch_size = 1000
-                batch_data = []
-                
-                with open(csv_file, 'r', encoding='utf-8') as file:
-                    reader = csv.DictReader(file)
-                    
-                    for row in reader:
-                        batch_data.append((
-                            row['phone_number'],
-                            row['content'],
-                            row.get('created_at', 'NOW()')
-                        ))
-                        
-                        # 배치 처리
-                        if len(batch_data) >= batch_size:
-                            cursor.executemany(
-                                "INSERT INTO phone_data (phone_number, content, created_at) VALUES (%s, %s, %s)",
-                                batch_data
-                            )
-                            upload_count += len(batch_data)
-                            logger.info(f"업로드 진행: {upload_count}개")
-                            batch_data = []
-                    
-                    # 남은 데이터 처리
-                    if batch_data:
-                        cursor.executemany(
-                            "INSERT INTO phone_data (phone_number, content, created_at) VALUES (%s, %s, %s)",
-                            batch_data
-                        )
-                        upload_count += len(batch_data)
-                
-                # 커밋
-                conn.commit()
-                logger.info(f"✅ 업로드 완료: 총 {upload_count}개 레코드")
-                
-                # 최종 확인
-                cursor.execute("SELECT COUNT(*) FROM phone_data")
-                final_count = cursor.fetchone()[0]
-                logger.info(f"최종 데이터베이스 레코드 수: {final_count}개")
-                
-                # 샘플 데이터 확인
-                cursor.execute("SELECT phone_number, content FROM phone_data LIMIT 5")
-                samples = cursor.fetchall()
-                logger.info("샘플 데이터:")
-                for i, (phone, content) in enumerate(samples, 1):
-                    logger.info(f"  {i}. {phone} - {content[:50]}...")
-                
-    except Exception as e:
-        logger.error(f"오류 발생: {e}")
+        with psycopg.connect(DATABASE_URL) as conn:
+            existing_count = conn.execute("SELECT COUNT(*) FROM phone_data").fetchone()[0]
+        logger.info(f"기존 데이터: {existing_count}개")
         
+        if mode is None:
+            if existing_count > 0:
+                logger.error("기존 데이터가 있습니다. --mode=replace(교체) 또는 --mode=append(추가)를 지정하세요.")
+                return False
+            mode = APPEND
+        
+        logger.info(f"{'교체' if mode == REPLACE else '추가'} 모드, {workers}개 연결로 COPY 업로드 중: {csv_file}")
+        if mode == REPLACE:
+            logger.warning("교체 모드: 업로드가 끝날 때까지 봇이 추가/수정/삭제한 내용은 교체 시 사라집니다.")
+        
+        start = time.perf_counter()
+        load = replace_phone_data if mode == REPLACE else append_phone_data
+        result = load(read_export_rows(csv_file), workers, progress=report_progress)
+        
+        elapsed = time.perf_counter() - start
+        rate = result['loaded'] / elapsed if elapsed > 0 else 0
+        logger.info(f"✅ 업로드 완료: 총 {result['inserted']:,}개 레코드 ({elapsed:.1f}초, {rate:,.0f}행/초)")
+        if result['skipped']:
+            logger.info(f"빈 전화번호 건너뜀: {result['skipped']:,}개")
+        if result['duplicates']:
+            logger.info(f"중복 건너뜀: {result['duplicates']:,}개")
+        
+        with psycopg.connect(DATABASE_URL) as conn:
+            # 최종 확인
+            final_count = conn.execute("SELECT COUNT(*) FROM phone_data").fetchone()[0]
+            logger.info(f"최종 데이터베이스 레코드 수: {final_count}개")
+            
+            # 샘플 데이터 확인
+            samples = conn.execute("SELECT phone_number, content FROM phone_data LIMIT 5").fetchall()
+            logger.info("샘플 데이터:")
+            for i, (phone, content) in enumerate(samples, 1):
+                logger.info(f"  {i}. {phone} - {content[:50]}...")
+        return True
+    
+    except Exception as e:
+        logger.error(f"오류 발생 (기존 데이터는 바뀌지 않음): {e}")
+        return False
+    finally:
+        close_pool()
+
 if __name__ == "__main__":
-    upload_csv_to_postgres()
\ No newline at end of file
+    # 사용법: python3 upload_to_postgres.py [CSV/NDJSON 파일(.gz/.xz 가능)] [--mode=replace|append] [--workers=N]
+    # --mode=replace는 업로드 중 봇이 쓴 내용을 버리므로 봇의 쓰기가 없을 때 실행하세요
+    # (실행 중인 봇은 TABLE_SWAP_CHECK_INTERVAL초 안에 교체를 감지해 캐시/Bloom 필터를 다시 구성)
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    options = dict(arg[2:].split('=', 1) for arg in sys.argv[1:] if arg.startswith('--') and '=' in arg)
+    ok = upload_csv_to_postgres(args[0] if args else './teledb_clean_export.csv',
+                                mode=options.get('mode'), workers=int(options.get('workers', LOAD_WORKERS)))
+    sys.exit(0 if ok else 1)